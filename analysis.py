@@ -0,0 +1,368 @@
+"""
+===========================================================
+🧠 analysis.py — Chat Analysis Core (no Streamlit)
+===========================================================
+
+One object per parsed chat whose results are computed on first access
+and memoized, scoped to a sender and an optional date window:
+
+    chat = ChatAnalysis(preprocessor.preprocess(text))
+    chat.stats, chat.monthly_timeline, chat.heatmap, chat.sentiment
+    chat.for_user("Alice").between("2023-01-01", "2023-06-30").emojis
+
+A multi-chat workspace frame (see workspace.py) works the same way and
+adds cross-chat comparisons: chat.chat_summary, chat.chat_activity("M"),
+chat.chat_top_senders(5), chat.chat_sentiment.
+
+With an SQL store (store.py), the chat is not held in memory: stats,
+timelines, the heatmap and busy users run as queries, and the frame
+(whole chat or date window) is only loaded for the other views:
+
+    chat = ChatAnalysis(store=MessageStore("archive.sqlite"), store_chats={"team": digest})
+
+chat.sketch is a fixed-size approximate summary (sketches.ChatSketch) of
+the whole chat(s); a store keeps it precomputed, so it reads no messages.
+
+Results live in a cache shared by every view derived from the same
+chat. Pass any object with get_or_create(key, builder) (for example
+charts.FigureCache) to share it across notebooks, the CLI and the app.
+===========================================================
+"""
+
+import hashlib
+import threading
+
+import pandas as pd
+
+import helper
+import sentiment_helper
+import sketches
+import workspace
+
+
+ENGINE_CHECK_MESSAGES = 5000  # messages scored by both engines in backend_comparison (a seeded sample)
+
+
+# ==============================
+# 🗃️ Default Cache
+# ==============================
+class LocalCache:
+    """Unbounded in-process memo used when no shared cache is supplied."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, builder):
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+        value = builder()
+        with self._lock:
+            return self._entries.setdefault(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Content hash of a parsed chat, for callers that don't have the upload digest."""
+    hashed = pd.util.hash_pandas_object(df[["Date", "Sender", "Message"]].astype(str), index=False)
+    return hashlib.sha256(hashed.to_numpy().tobytes()).hexdigest()
+
+
+def _day(value):
+    return None if value is None else pd.Timestamp(value).normalize()
+
+
+# ==============================
+# 🔍 ChatAnalysis
+# ==============================
+class ChatAnalysis:
+    """Lazily computed, memoized analysis results for one chat / sender / date window."""
+
+    def __init__(self, df=None, selected_user="Overall", start=None, end=None,
+                 digest=None, cache=None, sentiment_backend=None, progress=None,
+                 store=None, store_chats=None, frames=None):
+        if df is None and store is None:
+            raise ValueError("ChatAnalysis needs a parsed frame or a store")
+        self._df = df
+        self.store = store  # optional store.MessageStore holding the chats in store_chats ({chat_id: digest})
+        self.store_chats = dict(store_chats or {})
+        # where a store-backed chat's whole frame is kept once loaded (workspace.ChatFrames), not in the cache
+        self.frames = frames if frames is not None else workspace.ChatFrames()
+        self.selected_user = selected_user
+        self.start = _day(start)
+        self.end = _day(end)
+        self.cache = cache if cache is not None else LocalCache()
+        # a private cache only needs keys unique within itself
+        if store is not None:
+            self.digest = digest or workspace.workspace_digest(self.store_chats.items())
+        else:
+            self.digest = digest or (frame_digest(df) if cache is not None else f"local:{id(self.cache)}")
+        self.sentiment_backend = sentiment_backend or sentiment_helper.DEFAULT_BACKEND
+        self.progress = progress  # optional callback(fraction) for long computations (see jobs.Job.report)
+
+    # ---------- derived views (share df, digest and cache) ----------
+    def replace(self, **changes):
+        params = {
+            "selected_user": self.selected_user, "start": self.start, "end": self.end,
+            "sentiment_backend": self.sentiment_backend, "progress": self.progress,
+        }
+        params.update(changes)
+        return ChatAnalysis(self._df, digest=self.digest, cache=self.cache,
+                            store=self.store, store_chats=self.store_chats, frames=self.frames, **params)
+
+    def for_user(self, selected_user):
+        return self.replace(selected_user=selected_user)
+
+    def between(self, start=None, end=None):
+        return self.replace(start=start, end=end)
+
+    def with_sentiment_backend(self, backend):
+        return self.replace(sentiment_backend=backend)
+
+    def with_progress(self, progress):
+        return self.replace(progress=progress)
+
+    # ---------- memo plumbing ----------
+    @property
+    def window(self):
+        return (self.start, self.end)
+
+    def key(self, name, params=(), per_user=True):
+        user = self.selected_user if per_user else "*"
+        return (self.digest, user, self.window, name, tuple(params))
+
+    def _memo(self, name, builder, params=(), per_user=True):
+        return self.cache.get_or_create(self.key(name, params, per_user), builder)
+
+    # ---------- data ----------
+    @property
+    def df(self) -> pd.DataFrame:
+        """The whole chat; a store-backed chat is loaded (into self.frames) only when a view needs it."""
+        if self._df is not None:
+            return self._df
+        return self.frames.get_or_create(workspace.parsed_key(self.digest),
+                                         lambda: self.store.frame(self.store_chats))
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The chat restricted to the date window (all senders)."""
+        if self.start is None and self.end is None:
+            return self.df
+        return self._memo("frame", self._window_frame, per_user=False)
+
+    def _window_frame(self):
+        if self.store is not None:  # the timestamp index reads just the window
+            return self.store.frame(self.store_chats, self.start, self.end)
+        mask = pd.Series(True, index=self.df.index)
+        if self.start is not None:
+            mask &= self.df["Date"] >= self.start
+        if self.end is not None:
+            mask &= self.df["Date"] < self.end + pd.Timedelta(days=1)
+        return self.df[mask]
+
+    @property
+    def users(self) -> list:
+        """Sorted senders with "Overall" first (Meta AI excluded), for user pickers."""
+        def build():
+            senders = self.store.senders(self.store_chats) if self.store is not None else self.df["Sender"].unique().tolist()
+            users = sorted(senders)
+            if "Meta AI" in users:
+                users.remove("Meta AI")
+            return ["Overall"] + users
+        return self.cache.get_or_create((self.digest, "*", (None, None), "users", ()), build)
+
+    @property
+    def date_bounds(self):
+        """(first day, last day) of the whole chat, as datetime.date."""
+        def build():
+            if self.store is not None:
+                return self.store.date_bounds(self.store_chats)
+            return self.df["Date"].min().date(), self.df["Date"].max().date()
+        return self.cache.get_or_create((self.digest, "*", (None, None), "date_bounds", ()), build)
+
+    @property
+    def message_count(self) -> int:
+        """Messages in the date window (all senders)."""
+        if self.store is not None:
+            return self._memo("message_count", lambda: self.store.count(self.store_chats, start=self.start,
+                                                                         end=self.end), per_user=False)
+        return len(self.frame)
+
+    def head(self, n=5) -> pd.DataFrame:
+        """First n messages of the chat, without loading a store-backed chat."""
+        if self.store is not None:
+            return self.cache.get_or_create((self.digest, "*", (None, None), "head", (n,)),
+                                            lambda: self.store.frame(dict(list(self.store_chats.items())[:1]), limit=n))
+        return self.df.head(n)
+
+    @property
+    def chats(self) -> list:
+        """chat_ids of a multi-chat workspace in upload order ([] for a single chat)."""
+        if self.store is not None:
+            return list(self.store_chats) if len(self.store_chats) > 1 else []
+        return self.cache.get_or_create((self.digest, "*", (None, None), "chats", ()),
+                                        lambda: workspace.chat_ids(self.df))
+
+    # ---------- helper results ----------
+    def _query(self, name, *args):
+        """Run a store aggregation (same result as the helper of that name) over the chats and window."""
+        return getattr(self.store, name)(*args, self.store_chats, start=self.start, end=self.end)
+
+    @property
+    def stats(self):
+        """(messages, words, media, links)"""
+        if self.store is not None:
+            return self._memo("stats", lambda: self._query("fetch_stats", self.selected_user))
+        return self._memo("stats", lambda: helper.fetch_stats(self.selected_user, self.frame))
+
+    @property
+    def monthly_timeline(self):
+        if self.store is not None:
+            return self._memo("monthly_timeline", lambda: self._query("monthly_timeline", self.selected_user))
+        return self._memo("monthly_timeline", lambda: helper.monthly_timeline(self.selected_user, self.frame))
+
+    @property
+    def daily_timeline(self):
+        if self.store is not None:
+            return self._memo("daily_timeline", lambda: self._query("daily_timeline", self.selected_user))
+        return self._memo("daily_timeline", lambda: helper.daily_timeline(self.selected_user, self.frame))
+
+    @property
+    def week_activity(self):
+        return self._memo("week_activity", lambda: helper.week_activity_map(self.selected_user, self.frame))
+
+    @property
+    def month_activity(self):
+        return self._memo("month_activity", lambda: helper.month_activity_map(self.selected_user, self.frame))
+
+    @property
+    def heatmap(self):
+        if self.store is not None:
+            return self._memo("heatmap", lambda: self._query("activity_heatmap", self.selected_user))
+        return self._memo("heatmap", lambda: helper.activity_heatmap(self.selected_user, self.frame))
+
+    @property
+    def busy_users(self):
+        """(top-5 counts, percentage table) across all senders."""
+        if self.store is not None:
+            return self._memo("busy_users", lambda: self._query("most_busy_users"), per_user=False)
+        return self._memo("busy_users", lambda: helper.most_busy_users(self.frame), per_user=False)
+
+    @property
+    def wordcloud(self):
+        return self._memo("wordcloud", lambda: helper.create_wordcloud(self.selected_user, self.frame))
+
+    @property
+    def common_words(self):
+        return self._memo("common_words", lambda: helper.most_common_words(self.selected_user, self.frame))
+
+    @property
+    def emojis(self):
+        return self._memo("emojis", lambda: helper.emoji_helper(self.selected_user, self.frame))
+
+    @property
+    def interaction_matrix(self):
+        return self._memo("interaction_matrix", lambda: helper.interaction_matrix(self.selected_user, self.frame))
+
+    def interaction_graph(self, dynamic=True):
+        """PyVis HTML for the interaction network, or None."""
+        return self._memo("interaction_graph", lambda: helper.create_interaction_graph(
+            self.selected_user, self.frame, dynamic=dynamic, matrix=self.interaction_matrix
+        ), params=(dynamic,))
+
+    @property
+    def sketch(self):
+        """Approximate words / emojis / domains / distinct counts / quantiles of the whole chat(s), all senders."""
+        def build():
+            if self.store is not None:
+                return self.store.sketch(self.store_chats)
+            return sketches.ChatSketch.from_frame(self.df)
+        return self.cache.get_or_create((self.digest, "*", (None, None), "sketch", ()), build)
+
+    # ---------- sentiment ----------
+    @property
+    def sentiment(self):
+        """(summary dict | None, scored messages DataFrame) for the current engine."""
+        return self._memo("sentiment", lambda: sentiment_helper.analyze_sentiments(
+            self.selected_user, self.frame, backend=self.sentiment_backend, progress=self.progress
+        ), params=(self.sentiment_backend,))
+
+    @property
+    def sentiment_ranking(self):
+        """SentimentResult over the scored messages, for paged top/bottom lists."""
+        def build():
+            _, sentiment_df = self.sentiment
+            return sentiment_helper.SentimentResult(sentiment_df, self.frame.loc[sentiment_df.index, "Date"])
+        return self._memo("sentiment_ranking", build, params=(self.sentiment_backend,))
+
+    @property
+    def backend_comparison(self):
+        """compare_backends() report (TextBlob vs the lexicon engine) on a sample of the scored messages."""
+        def build():
+            _, sentiment_df = self.sentiment
+            messages = sentiment_df["Message"]
+            if len(messages) > ENGINE_CHECK_MESSAGES:
+                messages = messages.sample(ENGINE_CHECK_MESSAGES, random_state=0).sort_index()
+            return sentiment_helper.compare_backends(messages)
+        return self._memo("backend_comparison", build, params=(self.sentiment_backend,))
+
+    @property
+    def sentiment_cube(self):
+        """Date x Sender sentiment cube over the window; trend() re-aggregates it per user."""
+        return self._memo("sentiment_cube", lambda: sentiment_helper.SentimentCube.from_chat(
+            self.frame, backend=self.sentiment_backend, progress=self.progress
+        ), params=(self.sentiment_backend,), per_user=False)
+
+    # ---------- cross-chat comparison (multi-chat workspaces, all senders) ----------
+    @property
+    def chat_cube(self):
+        """Counts per (chat, day, hour, sender) over the window: the one pass every comparison reads."""
+        return self._memo("chat_cube", lambda: workspace.chat_cube(self.frame), per_user=False)
+
+    @property
+    def chat_summary(self):
+        return self._memo("chat_summary", lambda: workspace.chat_summary(self.chat_cube), per_user=False)
+
+    def chat_activity(self, freq="M"):
+        """Messages per day / week / month ('D', 'W', 'M') and chat."""
+        return self._memo("chat_activity", lambda: workspace.activity_by_chat(self.chat_cube, freq),
+                          params=(freq,), per_user=False)
+
+    @property
+    def chat_hours(self):
+        return self._memo("chat_hours", lambda: workspace.hourly_share_by_chat(self.chat_cube), per_user=False)
+
+    def chat_top_senders(self, n=5):
+        return self._memo("chat_top_senders", lambda: workspace.top_senders_by_chat(self.chat_cube, n),
+                          params=(n,), per_user=False)
+
+    @property
+    def chat_sentiment(self):
+        """Sentiment per chat, from the (cached) scores of all senders."""
+        def build():
+            _, sentiment_df = self.for_user("Overall").sentiment
+            return workspace.sentiment_by_chat(sentiment_df, self.frame[workspace.CHAT_ID])
+        return self._memo("chat_sentiment", build, params=(self.sentiment_backend,), per_user=False)
+
+    # ---------- exports ----------
+    @property
+    def enriched_messages(self):
+        """Full message table with derived columns (see export_helper.enrich_messages), reusing the engine's scores."""
+        import export_helper
+
+        def build():
+            _, sentiment_df = self.for_user("Overall").sentiment
+            return export_helper.enrich_messages(self.frame, sentiment_df=sentiment_df if not sentiment_df.empty else None,
+                                                 sentiment_backend=self.sentiment_backend)
+        return self._memo("enriched_messages", build, params=(self.sentiment_backend,), per_user=False)
+
+    @property
+    def date_range(self) -> str:
+        frame = self.frame
+        if "Date" not in frame.columns or frame.empty:
+            return "N/A"
+        return f"{frame['Date'].min().date()} to {frame['Date'].max().date()}"
@@ -1,18 +1,819 @@
 # app.py (Unified: Analysis + Sentiment + Exports)
 import streamlit as st
-import preprocessor, helper, sentiment_helper, export_helper
-import matplotlib.pyplot as plt
-import seaborn as sns
+import functools
+import hashlib
+import os
+import time
+import uuid
+import profiling
+import warmup
 import pandas as pd
 from datetime import datetime
-import export_sentiment_helper
 
+# repo modules import their heavy dependencies lazily (see warmup.py)
+with warmup.timed("app modules"):
+    import preprocessor, sentiment_helper, export_helper, analysis, charts, export_manager, jobs, workspace, store
+    import export_sentiment_helper, polars_backend, preview
+
+
+# derived frames must never write through to the shared parsed chat (always on from pandas 3)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 # =========================================
 # Page config
 # =========================================
 st.set_page_config(page_title="📱 WhatsApp Chat Analyzer", page_icon="💬", layout="wide")
 
+# =========================================
+# Profiling (per-session spans, off unless the debug panel is enabled)
+# =========================================
+if "profile_enabled" not in st.session_state:
+    st.session_state.profile_enabled = os.environ.get("WCA_PROFILE") == "1"
+if st.session_state.profile_enabled and "profiler" not in st.session_state:
+    st.session_state.profiler = profiling.Recorder()
+
+_run_started, _run_rss = time.perf_counter(), profiling.rss_bytes()
+_profiler = st.session_state.get("profiler") if st.session_state.profile_enabled else None
+if _profiler is not None:
+    _profiler.start_request("rerun")
+profiling.activate(_profiler)  # None turns recording off for this run
+
+
+def fragment(fn, run_every=None):
+    """st.fragment whose partial reruns also record into this session's profiler."""
+    @functools.wraps(fn)
+    def body(*args, **kwargs):
+        recorder = st.session_state.get("profiler") if st.session_state.get("profile_enabled") else None
+        if recorder is profiling.current():  # inside a full rerun: already recording (or both off)
+            return fn(*args, **kwargs)
+        token = profiling.activate(recorder)
+        if recorder is not None:
+            recorder.start_request(f"fragment {fn.__name__}")
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profiling.deactivate(token)
+    return st.fragment(body, run_every=run_every)
+
+
+# =========================================
+# Shared result cache (one per server process)
+# =========================================
+@st.cache_resource
+def get_result_cache():
+    """
+    Analysis results and figures for every session, keyed by content digest: any number
+    of users opening the same chat cost one parse (get_chat_frames) and one analysis.
+    Budget and optional disk spill come from WCA_CACHE_MB / WCA_CACHE_SPILL_DIR / WCA_CACHE_SPILL_MB.
+    """
+    spill_mb = os.environ.get("WCA_CACHE_SPILL_MB")
+    return charts.FigureCache(
+        max_bytes=int(float(os.environ.get("WCA_CACHE_MB", charts.DEFAULT_BUDGET_BYTES / 2**20)) * 2**20),
+        spill_dir=os.environ.get("WCA_CACHE_SPILL_DIR") or None,
+        max_spill_bytes=int(float(spill_mb) * 2**20) if spill_mb else charts.DEFAULT_SPILL_BYTES,
+    )
+
+
+@st.cache_resource
+def get_chat_frames():
+    """
+    Parsed chats for every session, outside the result cache's byte budget (a large
+    chat would be evicted and parsed again on each rerun): the most recent ones plus
+    any a session still holds (see pin_frames).
+    """
+    return workspace.ChatFrames(keep=int(os.environ.get("WCA_PARSED_CHATS", 8)))
+
+
+def load_chats(entries):
+    """Parse uploads ([(chat_id, digest, upload)]) once per content digest, concurrently.
+    The frames are shared by every session and rerun without pickling or copying, so
+    callers must treat them as read-only; filtered/derived frames are copy-on-write
+    and safe to modify."""
+    with st.spinner("Parsing chats..."):
+        return workspace.parse_chats(
+            [(chat_id, digest, upload.getvalue) for chat_id, digest, upload in entries], cache=get_chat_frames()
+        )
+
+
+def pin_frames(*frames):
+    """Hold this session's frames, so get_chat_frames() keeps them for as long as the session uses them."""
+    st.session_state.pinned_frames = frames
+
+
+@st.cache_resource
+def get_message_store():
+    """Optional SQL message store (WCA_STORE_PATH): chats are streamed to disk instead of held in memory."""
+    path = os.environ.get("WCA_STORE_PATH")
+    return store.MessageStore(path) if path else None
+
+
+def store_chats(entries):
+    """Load uploads ([(chat_id, digest, upload)]) into the message store once per digest; returns {chat_id: messages}."""
+    message_store = get_message_store()
+    counts = {}
+    with st.spinner("Loading chats into the message store..."):
+        for chat_id, digest, upload in entries:
+            upload.seek(0)
+            counts[chat_id] = message_store.load(chat_id, digest, upload)
+    return counts
+
+
+def load_workspace(frames, digests):
+    """The selected chats as one frame with a chat_id column, and its digest (a single chat is used as parsed)."""
+    if len(frames) == 1:
+        (chat_id, df), = frames.items()
+        return df, digests[chat_id]
+    digest = workspace.workspace_digest((chat_id, digests[chat_id]) for chat_id in frames)
+    df = get_chat_frames().get_or_create(workspace.parsed_key(digest), lambda: workspace.combine_chats(frames))
+    return df, digest
+
+
+# =========================================
+# Background jobs (shared by all sessions)
+# =========================================
+@st.cache_resource
+def get_job_executor():
+    """One executor per server process; caps concurrent CPU-heavy jobs across sessions."""
+    return jobs.JobExecutor()
+
+
+def _widget_key(key):
+    return hashlib.md5(repr(key).encode()).hexdigest()[:12]
+
+
+def _background_body(title, key, render, polling):
+    job = get_job_executor().get(key)
+    if job is None:  # evicted; the next full run resubmits it
+        st.rerun()
+    if not job.done():
+        st.progress(job.progress, text=f"⏳ {title}: {job.message or 'working'}... ({job.elapsed:.0f}s)")
+        if st.button("✖️ Cancel", key=f"cancel_{_widget_key(key)}"):
+            st.session_state.cancelled_jobs.add(key)
+            job.cancel()
+        return
+    if polling:
+        st.rerun()  # finished while polling: redraw once in place and stop polling
+    if job.status == jobs.FAILED:
+        st.error(f"{title} failed: {job.error}")
+    elif job.status == jobs.CANCELLED:
+        st.info(f"{title} was cancelled.")
+    else:
+        render()
+
+
+def _fill_cache(work, job):
+    work(job)  # the value stays in the shared result cache only, within its byte budget
+
+
+def background_section(title, key, work, render, section):
+    """
+    Runs work(job) on the shared executor to fill the result cache, then calls render(),
+    which reads the results from there (the job keeps none, so they never outlive an
+    eviction). Until then only this section polls and shows progress. Each (session,
+    section) runs one job at a time: a new key (e.g. another selected user) cancels the stale job.
+    """
+    if key in st.session_state.cancelled_jobs:
+        st.info(f"{title} was cancelled.")
+        if not st.button("🔁 Run again", key=f"retry_{_widget_key(key)}"):
+            return
+        st.session_state.cancelled_jobs.discard(key)
+    job = get_job_executor().submit(key, functools.partial(_fill_cache, work),
+                                    group=(st.session_state.session_token, section))
+    polling = not job.done()
+    fragment(_background_body, run_every=0.5 if polling else None)(title, key, render, polling)
+
+
+# =========================================
+# Progressive first paint (large uploads)
+# =========================================
+def _upload_size(upload):
+    return upload.getbuffer().nbytes
+
+
+def _sample_round(upload, round_number):
+    return preview.sample_chat(upload.getvalue(), round_number)
+
+
+def chat_preview(entries, rounds):
+    """Estimates from the first `rounds` sampling rounds of each upload (each round sampled once per digest)."""
+    cache = get_result_cache()
+    return preview.ChatPreview({
+        chat_id: (_upload_size(upload), [
+            cache.get_or_create((digest, "*", (None, None), "preview", (r,)),
+                                functools.partial(_sample_round, upload, r))
+            for r in range(rounds)
+        ])
+        for chat_id, digest, upload in entries
+    })
+
+
+def _parse_uploads(entries, job):
+    job.report(None, "parsing")
+    frames = workspace.parse_chats(
+        [(chat_id, digest, upload.getvalue) for chat_id, digest, upload in entries], cache=get_chat_frames()
+    )
+    return {chat_id: len(frame) for chat_id, frame in frames.items()}  # the frames themselves stay in get_chat_frames()
+
+
+def _first_paint_body(entries, key):
+    job = get_job_executor().get(key)
+    if job is None or job.done():
+        st.rerun()  # parsed (or failed): the full run takes over
+    rounds = min(preview.ROUNDS, 1 + int(job.elapsed // preview.REFINE_SECONDS))
+    estimate = chat_preview(entries, rounds)
+    stats = estimate.stats()
+
+    st.info(f"⏳ **Partial results**: estimated from {estimate.coverage:.1%} of the chat while it is parsed "
+            f"({job.elapsed:.0f}s so far). Exact numbers replace them when parsing finishes.")
+    st.subheader("📊 Chat Preview (partial)")
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Total Messages", f"~{stats['messages']:,}")
+    col2.metric("Total Words", f"~{stats['words']:,}")
+    col3.metric("Media Shared", f"~{stats['media']:,}")
+    col4.metric("Senders Seen", stats["senders"])
+    st.write(f"📅 **Date range:** {stats['first_day']} → {stats['last_day']}")
+
+    col_u, col_t = st.columns(2)
+    with col_u:
+        st.subheader("🏆 Top Senders (estimated)")
+        st.dataframe(estimate.top_senders(), hide_index=True)
+    with col_t:
+        st.subheader("🗓️ Monthly Timeline (partial)")
+        st.bar_chart(estimate.monthly_activity())
+
+
+def parse_in_background(entries):
+    """
+    Large uploads are parsed by a shared background job while the page paints estimates
+    from a sample of them (preview.py), refined every few seconds. Returns True when
+    load_chats() can go ahead: small uploads, chats already parsed or a finished job (a
+    failed parse is raised again by load_chats). Otherwise the partial preview is shown
+    and reruns the app once parsing finishes, so the final page is the same as a full run.
+    """
+    if sum(_upload_size(upload) for _, _, upload in entries) < preview.PREVIEW_MIN_BYTES:
+        return True
+    executor = get_job_executor()
+    key = ("parse",) + tuple(digest for _, digest, _ in entries)
+    job = executor.get(key)
+    if job is not None and job.done():
+        return True
+    try:
+        chat_preview(entries, 1)  # sampled before the parse starts competing for the CPU
+    except Exception as e:
+        st.warning(f"⚠️ Chat preview failed, parsing without it: {e}")
+        return True
+    job = executor.submit(key, functools.partial(_parse_uploads, entries),
+                          group=(st.session_state.session_token, "parse"))
+    if job.wait(0.2):  # already parsed: the job only hit the result cache
+        return True
+    fragment(_first_paint_body, run_every=preview.REFINE_SECONDS)(entries, key)
+    return False
+
+
+# =========================================
+# On-demand exports
+# =========================================
+@st.cache_resource
+def get_export_manager():
+    """One artifact builder per server process, shared by all sessions; builds run as background jobs
+    and finished files are kept in the result cache, under its byte budget."""
+    return export_manager.ExportManager(executor=get_job_executor(), cache=get_result_cache())
+
+
+def _export_button_body(label, key, file_name, mime, builder, heavy):
+    manager = get_export_manager()
+    widget_key = _widget_key(key)
+    status = manager.status(key)
+
+    if status == export_manager.READY:
+        artifact = manager.result(key)
+        if not isinstance(artifact, (bytes, bytearray)):  # a file: read only when the download is clicked
+            artifact = functools.partial(export_manager.read_artifact, artifact)
+        st.download_button(label, data=artifact, file_name=file_name, mime=mime, key=f"dl_{widget_key}")
+    elif status == export_manager.RUNNING:
+        st.button(f"⏳ Preparing {label}...", disabled=True, key=f"wait_{widget_key}")
+    else:
+        if status == export_manager.FAILED:
+            st.error(f"Export failed: {manager.error(key)}")
+        if st.button(f"⚙️ Prepare {label}", key=f"prep_{widget_key}"):
+            manager.submit(key, builder, heavy=heavy)
+            st.rerun()
+
+
+def export_button(label, key, file_name, mime, builder, heavy=True):
+    """Prepare-on-click download: the artifact is built once in the background and cached by key.
+    While it builds, only this button's fragment polls for the result."""
+    running = get_export_manager().status(key) == export_manager.RUNNING
+    fragment(_export_button_body, run_every=1.0 if running else None)(label, key, file_name, mime, builder, heavy)
+
+
+# =========================================
+# View sections (fragments: a widget inside one reruns only that section)
+# =========================================
+def job_key(chat, name):
+    """Background job key for one analysis result. Results land in the shared result
+    cache, so sessions viewing the same chat, user and window share one job."""
+    return (chat.digest, chat.selected_user, chat.window, chat.sentiment_backend, name)
+
+
+def show_chart(view, chart_id, what, empty_message=None):
+    """Display a cached chart as its cached PNG, so reruns don't re-render the figure."""
+    try:
+        png = view.image(chart_id)
+    except Exception as e:
+        st.warning(f"{what} failed: {e}")
+        return
+    if png is not None:
+        st.image(png, width="stretch")
+    elif empty_message:
+        st.warning(empty_message)
+
+
+def lazy_tabs(labels, key):
+    """Tabs whose content only runs while selected (switching reruns the enclosing fragment)."""
+    return st.tabs(labels, key=key, on_change="rerun")
+
+
+@fragment
+def analysis_sections(chat, scope, stats):
+    view = charts.ChartView(chat)
+    labels = ["🗓️ Timelines", "🗺️ Activity", "💬 Words & Emojis"]
+    if chat.selected_user == "Overall":
+        labels.append("🏆 Users")
+    labels.append("📦 Export")
+    tabs = dict(zip(labels, lazy_tabs(labels, key="analysis_tabs")))
+
+    with tabs["🗓️ Timelines"]:
+        if tabs["🗓️ Timelines"].open:
+            st.title("🗓️ Monthly Timeline")
+            show_chart(view, "monthly_timeline", "Monthly timeline")
+            st.title("📆 Daily Timeline")
+            show_chart(view, "daily_timeline", "Daily timeline")
+
+    with tabs["🗺️ Activity"]:
+        if tabs["🗺️ Activity"].open:
+            st.title("🗺️ Activity Map")
+            col_d1, col_d2 = st.columns(2)
+            with col_d1:
+                st.header("Most Active Days")
+                show_chart(view, "busy_days", "Most Active Days chart")
+            with col_d2:
+                st.header("Most Active Months")
+                show_chart(view, "busy_months", "Most Active Months chart")
+
+            st.title("🔥 Weekly Activity Heatmap")
+            show_chart(view, "heatmap", "Heatmap generation",
+                       "No activity data available to generate heatmap for this chat.")
+
+    with tabs["💬 Words & Emojis"]:
+        if tabs["💬 Words & Emojis"].open:
+            background_section(
+                "Counting words and emojis", job_key(chat, "words"),
+                lambda job: _prepare_words(view, job), lambda: _words_section(view), section="words"
+            )
+
+    if "🏆 Users" in tabs:
+        with tabs["🏆 Users"]:
+            if tabs["🏆 Users"].open:
+                st.title("🏆 Most Active Users")
+                _, busy_users_df = chat.busy_users
+                col_u1, col_u2 = st.columns(2)
+                with col_u1:
+                    st.subheader("Top 5 Yappers")
+                    show_chart(view, "top_users", "Top users chart")
+                with col_u2:
+                    st.subheader("Contribution (%)")
+                    st.dataframe(busy_users_df)
+
+    with tabs["📦 Export"]:
+        if tabs["📦 Export"].open:
+            complete_export_section(chat, scope, stats)
+
+
+def _prepare_words(view, job):
+    steps = [("wordcloud", "building word cloud"), ("common_words", "counting words")]
+    for i, (chart_id, message) in enumerate(steps):
+        job.report(i / (len(steps) + 1), message)
+        view.image(chart_id)
+    job.report(len(steps) / (len(steps) + 1), "counting emojis")
+    return view.analysis.emojis  # (a bare expression here would be Streamlit "magic" st.write)
+
+
+def _words_section(view):
+    st.title("☁️ Word Cloud")
+    show_chart(view, "wordcloud", "WordCloud generation",
+               "No words available to generate the Word Cloud for this user.")
+
+    st.title("💬 Most Common Words")
+    show_chart(view, "common_words", "Most common words chart")
+
+    st.title("😀 Most Common Emojis")
+    try:
+        st.dataframe(view.analysis.emojis)
+    except Exception as e:
+        st.warning(f"Emoji extraction failed: {e}")
+
+    if st.checkbox("📊 Show Emoji Usage Chart"):
+        show_chart(view, "emoji_bar", "Emoji chart", "No emojis detected 😅")
+
+
+def complete_export_section(chat, scope, stats):
+    """Complete-analysis exports; builders read the cached results and figures when clicked."""
+    selected_user, chat_digest = chat.selected_user, scope[0]
+    view = charts.ChartView(chat)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    def busy_users_df():
+        return chat.busy_users[1] if selected_user == "Overall" else None
+
+    st.subheader("📦 Export Complete Analysis")
+    pdf_profile = st.selectbox(
+        "🖨️ PDF chart quality", list(export_helper.EXPORT_PROFILES), index=1,
+        help="draft = fast, small file; print = high DPI, best compression."
+    )
+    build_stats_csv = lambda: export_helper.export_statistics_csv(
+        stats['messages'], stats['words'], stats['media'], stats['links'])
+    build_complete_xlsx = lambda: export_helper.export_complete_analysis_csv(
+        selected_user, chat.frame, stats,
+        timeline_df=chat.monthly_timeline,
+        daily_timeline_df=chat.daily_timeline,
+        common_words_df=chat.common_words,
+        emoji_df=chat.emojis,
+        busy_users_df=busy_users_df()
+    )
+    build_complete_pdf = lambda: export_helper.export_complete_analysis_pdf(
+        selected_user, stats, chat.date_range,
+        common_words_df=chat.common_words,
+        emoji_df=chat.emojis,
+        busy_users_df=busy_users_df(),
+        charts=view.export_charts(),
+        profile=pdf_profile
+    )
+    build_parquet = lambda: export_helper.export_messages_parquet(
+        chat.enriched_messages, {'source_digest': chat_digest}
+    )
+    build_arrow = lambda: export_helper.export_messages_arrow(
+        chat.enriched_messages, {'source_digest': chat_digest}
+    )
+
+    col_ex1, col_ex2 = st.columns(2)
+    with col_ex1:
+        export_button(
+            "📊 Download Complete Analysis (Excel)",
+            key=scope + ("complete_xlsx",),
+            file_name=f"whatsapp_complete_analysis_{selected_user}_{stamp}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            builder=build_complete_xlsx
+        )
+
+    with col_ex2:
+        export_button(
+            "📄 Download Complete Analysis (PDF)",
+            key=scope + ("complete_pdf", pdf_profile),
+            file_name=f"whatsapp_complete_analysis_{selected_user}_{stamp}.pdf",
+            mime="application/pdf",
+            builder=build_complete_pdf
+        )
+
+    # full enriched message table for data tooling (pandas / DuckDB / Spark)
+    col_ex3, col_ex4 = st.columns(2)
+    with col_ex3:
+        export_button(
+            "🧱 Download Message Table (Parquet)",
+            key=(chat_digest, chat.window, chat.sentiment_backend, "messages_parquet"),
+            file_name=f"whatsapp_messages_{stamp}.parquet",
+            mime="application/vnd.apache.parquet",
+            builder=build_parquet
+        )
+    with col_ex4:
+        export_button(
+            "🏹 Download Message Table (Arrow)",
+            key=(chat_digest, chat.window, chat.sentiment_backend, "messages_arrow"),
+            file_name=f"whatsapp_messages_{stamp}.arrow",
+            mime="application/vnd.apache.arrow.file",
+            builder=build_arrow
+        )
+
+    # everything in one ZIP: artifacts build concurrently, and any already
+    # prepared above (same content key) are reused instead of rebuilt
+    def build_sentiment_doc(exporter, *args):
+        summary, sentiment_df = chat.sentiment
+        if summary is None:
+            raise ValueError("no text messages to score")
+        return exporter(*args, summary, sentiment_df)
+
+    def build_bundle():
+        spool = get_export_manager().build_bundle(bundle_entries)
+        spool.rollover()  # the finished ZIP waits on disk, not in the result cache's memory
+        return spool
+
+    sentiment_key = scope + (chat.sentiment_backend,)
+    bundle_entries = [
+        (f"statistics_{selected_user}.csv", scope + ("stats_csv",), build_stats_csv),
+        (f"complete_analysis_{selected_user}.xlsx", scope + ("complete_xlsx",), build_complete_xlsx),
+        (f"complete_analysis_{selected_user}.pdf", scope + ("complete_pdf", pdf_profile), build_complete_pdf),
+        (f"sentiment_analysis_{selected_user}.xlsx", sentiment_key + ("sentiment_xlsx",),
+         lambda: build_sentiment_doc(export_sentiment_helper.export_sentiment_excel)),
+        (f"sentiment_analysis_{selected_user}.docx", sentiment_key + ("sentiment_docx",),
+         lambda: build_sentiment_doc(export_sentiment_helper.export_sentiment_word, selected_user)),
+        ("messages.parquet", (chat_digest, chat.window, chat.sentiment_backend, "messages_parquet"), build_parquet),
+    ]
+    export_button(
+        "🗂️ Download Everything (ZIP)",
+        key=scope + ("bundle", pdf_profile),
+        file_name=f"whatsapp_analysis_bundle_{selected_user}_{stamp}.zip",
+        mime="application/zip",
+        builder=build_bundle,
+        heavy=False  # only waits on its parts, each of which runs as its own heavy job
+    )
+
+
+def _sentiment_counts_chart(summary, kind):
+    import matplotlib.pyplot as plt
+
+    counts = [summary["positive"], summary["neutral"], summary["negative"]]
+    labels, colors = ["Positive", "Neutral", "Negative"], ["#2ecc71", "#f1c40f", "#e74c3c"]
+    fig, ax = plt.subplots()
+    if kind == "bar":
+        ax.bar(labels, counts, color=colors)
+        ax.set_ylabel("Message Count")
+    else:
+        ax.pie(counts, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+        ax.axis('equal')
+    st.pyplot(fig)
+    plt.close(fig)
+
+
+def _sentiment_trend(cube, selected_user):
+    import matplotlib.pyplot as plt
+
+    try:
+        col_f, col_w = st.columns(2)
+        granularity = col_f.radio("Granularity", ["Daily", "Weekly", "Monthly"], horizontal=True)
+        window = col_w.slider("Rolling window (periods)", 1, 30, 7)
+        trend = cube.trend(selected_user, freq=granularity[0], window=window)
+        if trend.empty:
+            st.info("No scored messages to plot over time.")
+        else:
+            fig, ax = plt.subplots(figsize=(10, 4))
+            ax.plot(trend.index, trend['mean_polarity'], color='#95a5a6', linewidth=1, label='Mean polarity')
+            ax.plot(trend.index, trend['rolling_mean'], color='#2980b9', linewidth=2, label=f'Rolling mean ({window})')
+            ax.axhline(0, color='black', linewidth=0.5)
+            ax.set_ylabel("Polarity")
+            ax.legend()
+            ax.tick_params(axis='x', labelrotation=45)
+            st.pyplot(fig)
+            plt.close(fig)
+    except Exception as e:
+        st.warning(f"Sentiment trend failed: {e}")
+
+
+def _backend_comparison(report):
+    report = dict(report)  # the cached report is shared: don't pop from it
+    confusion = report.pop("confusion")
+    st.json(report)
+    st.dataframe(confusion)
+
+
+@fragment
+def sentiment_sections(chat, scope):
+    selected_user = chat.selected_user
+    sentiment_summary, sentiment_df = chat.sentiment
+    labels = ["📊 Distribution", "📈 Over Time", "💬 Samples", "🏅 Extremes", "🧪 Engine Check", "📤 Export"]
+    tabs = dict(zip(labels, lazy_tabs(labels, key="sentiment_tabs")))
+
+    with tabs["📊 Distribution"]:
+        if tabs["📊 Distribution"].open:
+            st.subheader("📊 Sentiment Distribution")
+            try:
+                _sentiment_counts_chart(sentiment_summary, "bar")
+            except Exception as e:
+                st.warning(f"Sentiment bar chart failed: {e}")
+
+            st.subheader("🧩 Sentiment Composition")
+            try:
+                _sentiment_counts_chart(sentiment_summary, "pie")
+            except Exception as e:
+                st.warning(f"Sentiment pie chart failed: {e}")
+
+    # sentiment over time (cube is built once per chat + window + engine, then re-aggregated)
+    with tabs["📈 Over Time"]:
+        if tabs["📈 Over Time"].open:
+            st.subheader("📈 Sentiment Over Time")
+            # the cube covers every sender, so it is keyed (and reused) independently of the selected user
+            background_section(
+                "Building sentiment timeline", job_key(chat.for_user("Overall"), "sentiment_cube"),
+                lambda job: chat.with_progress(job.report).sentiment_cube,
+                lambda: _sentiment_trend(chat.sentiment_cube, selected_user), section="sentiment_cube"
+            )
+
+    # sample messages with polarity and sender
+    with tabs["💬 Samples"]:
+        if tabs["💬 Samples"].open:
+            st.subheader("💬 Sample Messages by Sentiment (with Scores)")
+            try:
+                col_p, col_n, col_u = st.columns(3)
+                with col_p:
+                    st.markdown("**😊 Positive Messages**")
+                    st.dataframe(sentiment_df[sentiment_df['Sentiment'] == 'Positive'][['Sender', 'Message', 'Polarity']].head(5))
+                with col_n:
+                    st.markdown("**😐 Neutral Messages**")
+                    st.dataframe(sentiment_df[sentiment_df['Sentiment'] == 'Neutral'][['Sender', 'Message', 'Polarity']].head(5))
+                with col_u:
+                    st.markdown("**😡 Negative Messages**")
+                    st.dataframe(sentiment_df[sentiment_df['Sentiment'] == 'Negative'][['Sender', 'Message', 'Polarity']].head(5))
+            except Exception as e:
+                st.warning(f"Failed to render sample messages: {e}")
+
+    # extremes, paged (selection over the scores already computed)
+    with tabs["🏅 Extremes"]:
+        if tabs["🏅 Extremes"].open:
+            st.subheader("🏅 Most Positive / Negative Messages")
+            try:
+                result = chat.sentiment_ranking
+                page_size = 10
+                page = st.number_input("Page", min_value=1, max_value=max(1, -(-len(result) // page_size)), value=1, step=1)
+                offset = (int(page) - 1) * page_size
+                col_top, col_bottom = st.columns(2)
+                with col_top:
+                    st.markdown("**😊 Most Positive**")
+                    st.dataframe(result.top(page_size, offset=offset), use_container_width=True)
+                with col_bottom:
+                    st.markdown("**😡 Most Negative**")
+                    st.dataframe(result.bottom(page_size, offset=offset), use_container_width=True)
+            except Exception as e:
+                st.warning(f"Failed to rank messages: {e}")
+
+    with tabs["🧪 Engine Check"]:
+        if tabs["🧪 Engine Check"].open:
+            st.subheader("🧪 Engine agreement vs TextBlob")
+            st.caption(f"Compares the engines on up to {analysis.ENGINE_CHECK_MESSAGES:,} sampled messages.")
+            key = job_key(chat, "backend_comparison")
+            if st.button("Run comparison", key="compare_backends") or get_job_executor().get(key) is not None:
+                background_section(
+                    "Comparing engines", key, lambda job: chat.backend_comparison,
+                    lambda: _backend_comparison(chat.backend_comparison), section="backend_comparison"
+                )
+
+    with tabs["📤 Export"]:
+        if tabs["📤 Export"].open:
+            sentiment_export_section(chat, scope, sentiment_summary, sentiment_df)
+
+
+def sentiment_page(chat, scope, result):
+    sentiment_summary, _ = result  # (summary_dict, sentiment_df)
+    if sentiment_summary is None:
+        st.warning("⚠️ No valid messages available for sentiment analysis.")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("😊 Positive", sentiment_summary["positive"])
+    col2.metric("😐 Neutral", sentiment_summary["neutral"])
+    col3.metric("😡 Negative", sentiment_summary["negative"])
+    col4.metric("📈 Avg Sentiment", round(sentiment_summary["avg_sentiment"], 3))
+
+    st.markdown("---")
+    sentiment_sections(chat, scope)
+
+
+def sentiment_export_section(chat, scope, sentiment_summary, sentiment_df):
+    selected_user = chat.selected_user
+    st.subheader("📤 Export Sentiment Analysis Results")
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    sentiment_key = scope + (chat.sentiment_backend,)
+
+    with col1:
+        export_button(
+            "⬇️  📄 Download CSV",
+            key=sentiment_key + ("sentiment_csv",),
+            file_name=f"sentiment_analysis_{selected_user}.csv",
+            mime="text/csv",
+            builder=lambda: export_sentiment_helper.export_sentiment_csv(sentiment_df)
+        )
+
+    with col2:
+        export_button(
+            "⬇️  📘 Download Excel",
+            key=sentiment_key + ("sentiment_xlsx",),
+            file_name=f"sentiment_analysis_{selected_user}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            builder=lambda: export_sentiment_helper.export_sentiment_excel(sentiment_summary, sentiment_df)
+        )
+
+    with col3:
+        export_button(
+            "⬇️  🧾 Download PDF",
+            key=sentiment_key + ("sentiment_pdf",),
+            file_name=f"sentiment_analysis_{selected_user}.pdf",
+            mime="application/pdf",
+            builder=lambda: export_sentiment_helper.export_sentiment_pdf(selected_user, sentiment_summary, sentiment_df)
+        )
+
+    with col4:
+        export_button(
+            "⬇️  📝 Download Word",
+            key=sentiment_key + ("sentiment_docx",),
+            file_name=f"sentiment_analysis_{selected_user}.docx",
+            mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            builder=lambda: export_sentiment_helper.export_sentiment_word(selected_user, sentiment_summary, sentiment_df)
+        )
+
+    with col5:
+        export_button(
+            "⬇️  🧬 Download NDJSON (gzip)",
+            key=sentiment_key + ("sentiment_ndjson",),
+            file_name=f"sentiment_analysis_{selected_user}.ndjson.gz",
+            mime="application/gzip",
+            builder=lambda: export_sentiment_helper.stream_sentiment_ndjson(sentiment_df)
+        )
+
+
+@fragment
+def interaction_section(chat):
+    dynamic_mode = st.checkbox("🌀 Enable 3D Motion", value=True)
+
+    html = chat.interaction_graph(dynamic=dynamic_mode)
+    if html:
+        st.components.v1.html(html, height=750, scrolling=False)
+        # 🧭 Add legend/info section
+        st.markdown("""
+        ### 🔍 Graph Legend  
+        - 🟢 **Node (Circle)** → Represents a chat participant.  
+        - 🌈 **Node Color** → Randomly assigned; used to visually separate users.  
+        - 🔵 **Line (Edge)** → Represents messages exchanged between two users.  
+        - 📏 **Line Thickness** → Shows interaction strength — thicker = more messages.  
+        - 🎨 **Line Color Intensity** → Warmer (red/yellow) = higher message frequency, cooler (blue/purple) = fewer messages.  
+        - ⚙️ **Motion Mode** → When ON, the graph slowly rotates like a 3D web.  
+        - 🔒 **Stable Mode** → When OFF, the graph stays still; zoom and drag freely.  
+        """)
+    else:
+        st.warning("⚠️ No sufficient interaction data available to build a network graph.")
+
+
+@fragment
+def comparison_sections(chat):
+    labels = ["📊 Overview", "🗓️ Activity", "🏆 Top Senders", "🧠 Sentiment"]
+    tabs = dict(zip(labels, lazy_tabs(labels, key="comparison_tabs")))
+
+    with tabs["📊 Overview"]:
+        if tabs["📊 Overview"].open:
+            st.subheader("📊 Chats at a Glance")
+            st.dataframe(chat.chat_summary, width="stretch")
+
+    with tabs["🗓️ Activity"]:
+        if tabs["🗓️ Activity"].open:
+            st.subheader("🗓️ Messages Over Time")
+            granularity = st.radio("Granularity", ["Daily", "Weekly", "Monthly"], index=2, horizontal=True,
+                                   key="comparison_granularity")
+            st.line_chart(chat.chat_activity(granularity[0]))
+            st.subheader("🕐 Share of Messages by Hour (%)")
+            st.line_chart(chat.chat_hours)
+
+    with tabs["🏆 Top Senders"]:
+        if tabs["🏆 Top Senders"].open:
+            st.subheader("🏆 Top Senders per Chat")
+            st.dataframe(chat.chat_top_senders(5), hide_index=True, width="stretch")
+
+    # scores of all senders are shared with the sentiment view (same chat, window and engine)
+    with tabs["🧠 Sentiment"]:
+        if tabs["🧠 Sentiment"].open:
+            st.subheader("🧠 Sentiment per Chat")
+            engine = st.selectbox("🧮 Sentiment engine", list(sentiment_helper.SENTIMENT_BACKENDS),
+                                  key="comparison_engine")
+            scored = chat.for_user("Overall").with_sentiment_backend(engine)
+            background_section(
+                "Scoring sentiment", job_key(scored, "chat_sentiment"),
+                lambda job: scored.with_progress(job.report).chat_sentiment,
+                lambda: _chat_sentiment_table(scored.chat_sentiment), section="chat_sentiment"
+            )
+
+
+def _chat_sentiment_table(table):
+    if table.empty:
+        st.info("No text messages to score.")
+        return
+    st.dataframe(table, width="stretch")
+    st.bar_chart(table[["positive_%", "neutral_%", "negative_%"]])
+
+
+def archive_summary(chat):
+    """Approximate whole-archive numbers from the store's fixed-size sketches (reads no messages)."""
+    with st.expander("🧮 Archive summary (approximate)"):
+        sketch = chat.sketch
+        (words, words_error), (senders, senders_error) = sketch.distinct_words(), sketch.active_senders()
+        col1, col2 = st.columns(2)
+        col1.metric("Distinct words", f"~{words:,}", help=f"±{words_error:.1%} standard error")
+        col2.metric("Active senders", f"~{senders:,}", help=f"±{senders_error:.1%} standard error")
+        st.caption("Top counts are lower bounds: each true count lies between the count and count + Max Error.")
+        col3, col4, col5 = st.columns(3)
+        col3.dataframe(sketch.most_common_words(10), hide_index=True)
+        col4.dataframe(sketch.emoji_helper(), hide_index=True)
+        col5.dataframe(sketch.top_domains(), hide_index=True)
+        st.dataframe(sketch.quantiles())
+
+
 # =========================================
 # Sidebar - Clear cache + upload + actions
 # =========================================
@@ -24,6 +825,8 @@ if st.sidebar.button("🧹 Clear Cache"):
         st.cache_data.clear()
     except Exception:
         pass
+    get_result_cache().clear()
+    get_chat_frames().clear()
     try:
         st.cache_resource.clear()
     except Exception:
@@ -32,130 +835,148 @@ if st.sidebar.button("🧹 Clear Cache"):
         del st.session_state[key]
     st.sidebar.success("✅ Cache and session cleared! Please reload or upload a new file.")
 
-uploaded_file = st.sidebar.file_uploader("📁 Choose a WhatsApp chat file (.txt)")
+uploaded_files = st.sidebar.file_uploader("📁 Choose WhatsApp chat files (.txt)", accept_multiple_files=True)
 
 # ensure flags exist in session
 if "analysis_generated" not in st.session_state:
     st.session_state.analysis_generated = False
 if "show_sentiment" not in st.session_state:
     st.session_state.show_sentiment = False
+if "show_comparison" not in st.session_state:
+    st.session_state.show_comparison = False
 if "last_uploaded" not in st.session_state:
     st.session_state.last_uploaded = None
-if "df" not in st.session_state:
-    st.session_state.df = None
-if "stats" not in st.session_state:
-    st.session_state.stats = None
+if "session_token" not in st.session_state:
+    st.session_state.session_token = uuid.uuid4().hex
+if "cancelled_jobs" not in st.session_state:
+    st.session_state.cancelled_jobs = set()
+if "chat_digests" not in st.session_state:
+    st.session_state.chat_digests = {}
 
 # =========================================
 # File upload handling
 # =========================================
-if uploaded_file is not None:
-    uploaded_filename = uploaded_file.name
+if uploaded_files:
+    upload_ids = tuple(getattr(f, "file_id", None) or f.name for f in uploaded_files)
 
-    # reset state when a different file is uploaded
-    if st.session_state.get("last_uploaded") != uploaded_filename:
+    # new upload set: reset state and hash each new file's bytes once; reruns reuse the digests
+    if st.session_state.get("last_uploaded") != upload_ids:
         st.session_state.analysis_generated = False
         st.session_state.show_sentiment = False
-        st.session_state.last_uploaded = uploaded_filename
-        st.session_state.df = None
-        st.session_state.stats = None
-
-    bytes_data = uploaded_file.getvalue()
-    # robust decoding
-    try:
-        data = bytes_data.decode("utf-8")
-    except Exception:
-        # fallback encodings; final fallback ignore errors
-        decoded = None
-        for enc in ("utf-8-sig", "cp1252", "latin-1"):
-            try:
-                decoded = bytes_data.decode(enc)
-                break
-            except Exception:
-                continue
-        if decoded is None:
-            data = bytes_data.decode("utf-8", errors="ignore")
-        else:
-            data = decoded
+        st.session_state.show_comparison = False
+        st.session_state.last_uploaded = upload_ids
+        known = st.session_state.chat_digests
+        st.session_state.chat_digests = {
+            upload_id: known.get(upload_id) or hashlib.sha256(f.getvalue()).hexdigest()
+            for upload_id, f in zip(upload_ids, uploaded_files)
+        }
+    chat_ids = workspace.chat_names(f.name for f in uploaded_files)
+    digests = {chat_id: st.session_state.chat_digests[upload_id] for chat_id, upload_id in zip(chat_ids, upload_ids)}
 
     # basic extension hint
-    if not uploaded_filename.lower().endswith((".txt",)):
+    if any(not f.name.lower().endswith((".txt",)) for f in uploaded_files):
         st.sidebar.warning("Uploaded file does not have .txt extension. The app will still try to parse it.")
 
-    # validate content roughly using preprocessor HEADER_RE if available
-    header_ok = True
+    # each file parsed once per digest and shared (Date is already parsed and validated by the preprocessor);
+    # with a message store, streamed into it instead and only queried / loaded per view
+    entries = [(chat_id, digests[chat_id], f) for chat_id, f in zip(chat_ids, uploaded_files)]
+    message_store = get_message_store()
+    if message_store is None and not parse_in_background(entries):
+        st.stop()  # the partial preview reruns the app when parsing finishes
     try:
-        header_ok = bool(preprocessor.HEADER_RE.search(data))
-    except Exception:
-        header_ok = True  # if preprocessor doesn't expose HEADER_RE, skip strict check
+        if message_store is not None:
+            sizes = store_chats(entries)
+            frames = {chat_id: None for chat_id in sizes}
+        else:
+            frames = load_chats(entries)
+            sizes = {chat_id: len(frame) for chat_id, frame in frames.items()}
+    except Exception as e:
+        st.error(f"Preprocessing failed: {e}")
+        st.stop()
+
+    skipped = [chat_id for chat_id, size in sizes.items() if not size]
+    frames = {chat_id: frame for chat_id, frame in frames.items() if sizes[chat_id]}
+    if skipped and frames:
+        st.sidebar.warning(f"Skipped files that don't look like WhatsApp exports: {', '.join(skipped)}")
 
-    if not header_ok:
+    # chat filter: analyze one chat, a subset or all of them together (kept in upload order)
+    if len(frames) > 1:
+        selected_chats = st.sidebar.multiselect("🗂️ Chats", list(frames), default=list(frames)) or list(frames)
+        frames = {chat_id: frame for chat_id, frame in frames.items() if chat_id in selected_chats}
+
+    if not frames:
         st.error(
             "Uploaded file doesn't look like a WhatsApp chat export.\n"
             "Expected lines like 'dd/mm/yy, hh:mm - Sender: message'.\n"
             "Please upload a valid WhatsApp chat export (usually .txt)."
         )
         st.stop()
-
-    # preprocess once and cache in session
-    try:
-        df = preprocessor.preprocess(data)
-    except Exception as e:
-        st.error(f"Preprocessing failed: {e}")
-        st.stop()
-
-    # make sure Date exists and is parsed
-    try:
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        df = df.dropna(subset=['Date'])
-    except Exception:
-        # if Date column absent or invalid, continue but warn
-        st.warning("Warning: 'Date' column couldn't be parsed fully. Some timeline charts may be empty.")
-
-    st.session_state.df = df
+    # every view below reads from one memoized analysis of these chats
+    if message_store is not None:
+        chat_digest = (digests[next(iter(frames))] if len(frames) == 1
+                       else workspace.workspace_digest((chat_id, digests[chat_id]) for chat_id in frames))
+        chat = analysis.ChatAnalysis(store=message_store, store_chats={chat_id: digests[chat_id] for chat_id in frames},
+                                     digest=chat_digest, cache=get_result_cache(), frames=get_chat_frames())
+    else:
+        df, chat_digest = load_workspace(frames, digests)
+        pin_frames(df, *frames.values())
+        chat = analysis.ChatAnalysis(df, digest=chat_digest, cache=get_result_cache())
+    first_day, last_day = chat.date_bounds
 
     # show basic parsed summary
     st.subheader("📊 Parsed Chat Summary")
-    st.write(f"📋 **Total messages parsed:** {len(df)}")
-    if 'Date' in df.columns and len(df) > 0:
-        st.write(f"📅 **Date range:** {df['Date'].min().date()} → {df['Date'].max().date()}")
-    st.dataframe(df.head(), use_container_width=True)
+    if len(frames) > 1:
+        st.write(f"🗂️ **Chats:** {len(frames)} ({', '.join(frames)})")
+    st.write(f"📋 **Total messages parsed:** {chat.message_count}")
+    st.write(f"📅 **Date range:** {first_day} → {last_day}")
+    st.dataframe(chat.head(), use_container_width=True)
+    if message_store is not None:
+        archive_summary(chat)
 
     # user selection
-    user_list = df['Sender'].unique().tolist()
-    user_list.sort()
-    if "Meta AI" in user_list:
-        user_list.remove("Meta AI")
-    user_list.insert(0, "Overall")
-    selected_user = st.sidebar.selectbox("👤 Show analysis for", user_list)
+    selected_user = st.sidebar.selectbox("👤 Show analysis for", chat.users)
+
+    # optional date window (the full range keeps the unfiltered cache entries)
+    window = st.sidebar.date_input("📅 Date range", (first_day, last_day), min_value=first_day, max_value=last_day)
+    start, end = window if isinstance(window, (tuple, list)) and len(window) == 2 else (first_day, last_day)
+    if (start, end) == (first_day, last_day):
+        start, end = None, None
+    chat = chat.for_user(selected_user).between(start, end)
+    scope = (chat_digest, selected_user, chat.window)
 
     # === Sidebar Buttons (Modes) ===
     if st.sidebar.button("🚀 Generate Analysis", key="generate_analysis"):
         st.session_state.analysis_generated = True
         st.session_state.show_sentiment = False
         st.session_state.show_interaction = False
+        st.session_state.show_comparison = False
 
     if st.sidebar.button("🩵 Analyze Chat Sentiment", key="sentiment_analysis"):
         st.session_state.show_sentiment = True
         st.session_state.analysis_generated = False
         st.session_state.show_interaction = False
+        st.session_state.show_comparison = False
 
     if st.sidebar.button("👥 Show Interaction Graph", key="interaction_graph"):
         st.session_state.show_interaction = True
         st.session_state.analysis_generated = False
         st.session_state.show_sentiment = False
+        st.session_state.show_comparison = False
+
+    if len(frames) > 1 and st.sidebar.button("🗂️ Compare Chats", key="compare_chats"):
+        st.session_state.show_comparison = True
+        st.session_state.analysis_generated = False
+        st.session_state.show_sentiment = False
+        st.session_state.show_interaction = False
 
 
     # =========================================
     # MAIN ANALYSIS VIEW
     # =========================================
     if st.session_state.analysis_generated:
-        df = st.session_state.df  # fresh reference
-
         # top stats
-        num_messages, words, num_media_messages, num_links = helper.fetch_stats(selected_user, df)
-        # store stats for export
-        st.session_state.stats = {
+        num_messages, words, num_media_messages, num_links = chat.stats
+        stats = {
             'messages': num_messages,
             'words': words,
             'media': num_media_messages,
@@ -172,479 +993,122 @@ if uploaded_file is not None:
         # Export quick stats (CSV / PDF)
         st.markdown("---")
         st.subheader("📥 Export Analysis Results")
-        date_range = f"{df['Date'].min().date()} to {df['Date'].max().date()}" if 'Date' in df.columns else "N/A"
+        date_range = chat.date_range
 
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         col_e1, col_e2 = st.columns(2)
         with col_e1:
-            try:
-                csv_stats = export_helper.export_statistics_csv(num_messages, words, num_media_messages, num_links)
-                st.download_button(
-                    "📊 Download Statistics (CSV)",
-                    data=csv_stats,
-                    file_name=f"whatsapp_stats_{selected_user}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv"
-                )
-            except Exception as e:
-                st.error(f"Unable to prepare CSV stats: {e}")
+            export_button(
+                "📊 Download Statistics (CSV)",
+                key=scope + ("stats_csv",),
+                file_name=f"whatsapp_stats_{selected_user}_{stamp}.csv",
+                mime="text/csv",
+                builder=lambda: export_helper.export_statistics_csv(num_messages, words, num_media_messages, num_links)
+            )
 
         with col_e2:
-            try:
-                pdf_stats = export_helper.export_statistics_pdf(selected_user, num_messages, words, num_media_messages, num_links, date_range)
-                st.download_button(
-                    "📄 Download Statistics (PDF)",
-                    data=pdf_stats,
-                    file_name=f"whatsapp_stats_{selected_user}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                    mime="application/pdf"
-                )
-            except Exception as e:
-                st.error(f"Unable to prepare PDF stats: {e}")
-
-        st.markdown("---")
-
-        # monthly timeline
-        st.title("🗓️ Monthly Timeline")
-        try:
-            timeline = helper.monthly_timeline(selected_user, df)
-            fig, ax = plt.subplots()
-            ax.plot(timeline['time'], timeline['Message'], color='green')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
-        except Exception as e:
-            st.warning(f"Monthly timeline failed: {e}")
-
-        # daily timeline
-        st.title("📆 Daily Timeline")
-        try:
-            daily_timeline = helper.daily_timeline(selected_user, df)
-            fig, ax = plt.subplots()
-            ax.plot(daily_timeline['only_date'], daily_timeline['Message'], color='black')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
-        except Exception as e:
-            st.warning(f"Daily timeline failed: {e}")
-
-        # Emoji usage chart toggle
-        if selected_user == "Overall":
-            df_for_emoji = st.session_state.df
-        else:
-            df_for_emoji = df
-
-        if st.checkbox("📊 Show Emoji Usage Chart"):
-            try:
-                # helper should produce a figure or do plotting inside
-                helper.create_emoji_bar_chart(df_for_emoji)  # earlier you had create_emoji_bar_chart; adapt if signature differs
-            except Exception as e:
-                st.warning(f"Emoji chart failed: {e}")
-
-        # activity map
-        st.title("🗺️ Activity Map")
-        col_d1, col_d2 = st.columns(2)
-        with col_d1:
-            st.header("Most Active Days")
-            busy_day = helper.week_activity_map(selected_user, df)
-            try:
-                fig, ax = plt.subplots()
-                ax.bar(busy_day.index, busy_day.values, color='orange')
-                plt.xticks(rotation='vertical')
-                st.pyplot(fig)
-            except Exception as e:
-                st.warning(f"Most Active Days chart failed: {e}")
-
-        with col_d2:
-            st.header("Most Active Months")
-            busy_month = helper.month_activity_map(selected_user, df)
-            try:
-                fig, ax = plt.subplots()
-                ax.bar(busy_month.index, busy_month.values, color='purple')
-                plt.xticks(rotation='vertical')
-                st.pyplot(fig)
-            except Exception as e:
-                st.warning(f"Most Active Months chart failed: {e}")
-
-        # weekly heatmap
-        st.title("🔥 Weekly Activity Heatmap")
-        try:
-            user_heatmap = helper.activity_heatmap(selected_user, df)
-            if user_heatmap.empty or user_heatmap.isnull().all().all():
-                st.warning("No activity data available to generate heatmap for this chat.")
-            else:
-                fig, ax = plt.subplots(figsize=(12, 5))
-                sns.heatmap(user_heatmap, ax=ax)
-                st.pyplot(fig)
-        except Exception as e:
-            st.warning(f"Heatmap generation failed: {e}")
-
-        # most busy users (overall)
-        if selected_user == "Overall":
-            st.title("🏆 Most Active Users")
-            x, new_df = helper.most_busy_users(df)
-            col_u1, col_u2 = st.columns(2)
-            with col_u1:
-                st.subheader("Top 5 Yappers")
-                fig, ax = plt.subplots()
-                ax.bar(x.index, x.values, color='green')
-                plt.xticks(rotation='vertical')
-                st.pyplot(fig)
-            with col_u2:
-                st.subheader("Contribution (%)")
-                st.dataframe(new_df)
-
-        # wordcloud
-        st.title("☁️ Word Cloud")
-        try:
-            df_wcl = helper.create_wordcloud(selected_user, df)
-            if df_wcl is not None:
-                fig, ax = plt.subplots(figsize=(8, 5))
-                ax.imshow(df_wcl, interpolation="bilinear")
-                ax.axis("off")
-                st.pyplot(fig)
-            else:
-                st.warning("No words available to generate the Word Cloud for this user.")
-        except Exception as e:
-            st.warning(f"WordCloud generation failed: {e}")
-
-        # most common words
-        st.title("💬 Most Common Words")
-        try:
-            most_common_df = helper.most_common_words(selected_user, df)
-            fig, ax = plt.subplots(figsize=(8, 6))
-            ax.barh(most_common_df['Word'], most_common_df['Frequency'], color='teal')
-            plt.xticks(rotation='vertical')
-            st.pyplot(fig)
-        except Exception as e:
-            st.warning(f"Most common words chart failed: {e}")
-
-        # emoji list
-        st.title("😀 Most Common Emojis")
-        try:
-            emoji_df = helper.emoji_helper(selected_user, df)
-            st.dataframe(emoji_df)
-        except Exception as e:
-            st.warning(f"Emoji extraction failed: {e}")
+            export_button(
+                "📄 Download Statistics (PDF)",
+                key=scope + ("stats_pdf",),
+                file_name=f"whatsapp_stats_{selected_user}_{stamp}.pdf",
+                mime="application/pdf",
+                builder=lambda: export_helper.export_statistics_pdf(selected_user, num_messages, words, num_media_messages, num_links, date_range)
+            )
 
-        # Export complete analysis (Excel / PDF)
         st.markdown("---")
-        st.subheader("📦 Export Complete Analysis")
-        col_ex1, col_ex2 = st.columns(2)
-        with col_ex1:
-            try:
-                timeline_df = helper.monthly_timeline(selected_user, df)
-                daily_timeline_df = helper.daily_timeline(selected_user, df)
-                busy_users_df = None
-                if selected_user == 'Overall':
-                    _, busy_users_df = helper.most_busy_users(df)
-                excel_data = export_helper.export_complete_analysis_csv(
-                    selected_user, df, st.session_state.stats,
-                    timeline_df=timeline_df,
-                    daily_timeline_df=daily_timeline_df,
-                    common_words_df=most_common_df if 'most_common_df' in locals() else pd.DataFrame(),
-                    emoji_df=emoji_df if 'emoji_df' in locals() else pd.DataFrame(),
-                    busy_users_df=busy_users_df
-                )
-                st.download_button(
-                    "📊 Download Complete Analysis (Excel)",
-                    data=excel_data,
-                    file_name=f"whatsapp_complete_analysis_{selected_user}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-            except Exception as e:
-                st.error(f"Error preparing Excel export: {e}")
 
-        with col_ex2:
-            try:
-                # prepare charts dictionary (figures) for PDF export
-                charts_dict = {}
-
-                # monthly timeline fig
-                try:
-                    fig_monthly, ax_monthly = plt.subplots(figsize=(10, 4))
-                    ax_monthly.plot(timeline['time'], timeline['Message'], color='green', linewidth=2)
-                    ax_monthly.set_xlabel('Time Period')
-                    ax_monthly.set_ylabel('Messages')
-                    ax_monthly.set_title('Monthly Timeline')
-                    plt.xticks(rotation=45)
-                    plt.tight_layout()
-                    charts_dict['Monthly Timeline'] = fig_monthly
-                except Exception:
-                    pass
-
-                # daily timeline fig
-                try:
-                    fig_daily, ax_daily = plt.subplots(figsize=(10, 4))
-                    ax_daily.plot(daily_timeline_df['only_date'], daily_timeline_df['Message'], color='black', linewidth=2)
-                    ax_daily.set_xlabel('Date')
-                    ax_daily.set_ylabel('Messages')
-                    ax_daily.set_title('Daily Timeline')
-                    plt.xticks(rotation=45)
-                    plt.tight_layout()
-                    charts_dict['Daily Timeline'] = fig_daily
-                except Exception:
-                    pass
-
-                # most active days fig
-                try:
-                    busy_day = helper.week_activity_map(selected_user, df)
-                    if not busy_day.empty:
-                        fig_days, ax_days = plt.subplots(figsize=(10, 4))
-                        ax_days.bar(busy_day.index, busy_day.values, color='orange')
-                        ax_days.set_xlabel('Day of Week')
-                        ax_days.set_ylabel('Messages')
-                        ax_days.set_title('Most Active Days')
-                        plt.xticks(rotation=45)
-                        plt.tight_layout()
-                        charts_dict['Most Active Days'] = fig_days
-                except Exception:
-                    pass
-
-                # most active months fig
-                try:
-                    busy_month = helper.month_activity_map(selected_user, df)
-                    if not busy_month.empty:
-                        fig_months, ax_months = plt.subplots(figsize=(10, 4))
-                        ax_months.bar(busy_month.index, busy_month.values, color='purple')
-                        ax_months.set_xlabel('Month')
-                        ax_months.set_ylabel('Messages')
-                        ax_months.set_title('Most Active Months')
-                        plt.xticks(rotation=45)
-                        plt.tight_layout()
-                        charts_dict['Most Active Months'] = fig_months
-                except Exception:
-                    pass
-
-                # heatmap
-                try:
-                    user_heatmap = helper.activity_heatmap(selected_user, df)
-                    if not user_heatmap.empty and not user_heatmap.isnull().all().all():
-                        fig_heatmap, ax_heatmap = plt.subplots(figsize=(12, 6))
-                        sns.heatmap(user_heatmap, ax=ax_heatmap, cmap='YlOrRd')
-                        ax_heatmap.set_title('Activity Heatmap')
-                        plt.tight_layout()
-                        charts_dict['Activity Heatmap'] = fig_heatmap
-                except Exception:
-                    pass
-
-                # wordcloud fig
-                try:
-                    df_wcl = helper.create_wordcloud(selected_user, df)
-                    if df_wcl is not None:
-                        fig_wc, ax_wc = plt.subplots(figsize=(10, 6))
-                        ax_wc.imshow(df_wcl, interpolation="bilinear")
-                        ax_wc.axis("off")
-                        ax_wc.set_title('Word Cloud')
-                        plt.tight_layout()
-                        charts_dict['Word Cloud'] = fig_wc
-                except Exception:
-                    pass
-
-                # most common words fig
-                try:
-                    fig_words, ax_words = plt.subplots(figsize=(10, 6))
-                    ax_words.barh(most_common_df['Word'], most_common_df['Frequency'], color='teal')
-                    ax_words.set_xlabel('Frequency')
-                    ax_words.set_ylabel('Words')
-                    ax_words.set_title('Most Common Words')
-                    plt.tight_layout()
-                    charts_dict['Most Common Words'] = fig_words
-                except Exception:
-                    pass
-
-                # emoji bar chart (helper returns a fig or None)
-                try:
-                    fig_emoji_bar = helper.generate_emoji_bar_chart_figure(selected_user, df)
-                    if fig_emoji_bar is not None:
-                        charts_dict['Emoji Usage Bar Chart'] = fig_emoji_bar
-                except Exception:
-                    pass
-
-                # top contributors fig
-                try:
-                    if selected_user == 'Overall':
-                        x, _ = helper.most_busy_users(df)
-                        fig_users, ax_users = plt.subplots(figsize=(10, 4))
-                        ax_users.bar(x.index, x.values, color='green')
-                        ax_users.set_xlabel('User')
-                        ax_users.set_ylabel('Messages')
-                        ax_users.set_title('Top 5 Contributors')
-                        plt.xticks(rotation=45)
-                        plt.tight_layout()
-                        charts_dict['Top Contributors'] = fig_users
-                except Exception:
-                    pass
-
-                # call export helper to create PDF from charts + data
-                pdf_complete = export_helper.export_complete_analysis_pdf(
-                    selected_user, st.session_state.stats, date_range,
-                    common_words_df=(most_common_df if 'most_common_df' in locals() else pd.DataFrame()),
-                    emoji_df=(emoji_df if 'emoji_df' in locals() else pd.DataFrame()),
-                    busy_users_df=(busy_users_df if 'busy_users_df' in locals() else None),
-                    charts=charts_dict
-                )
-
-                # close figures to free memory
-                for fig in charts_dict.values():
-                    try:
-                        plt.close(fig)
-                    except Exception:
-                        pass
-
-                st.download_button(
-                    "📄 Download Complete Analysis (PDF)",
-                    data=pdf_complete,
-                    file_name=f"whatsapp_complete_analysis_{selected_user}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                    mime="application/pdf"
-                )
-            except Exception as e:
-                st.error(f"Error preparing PDF export: {e}")
-
-        st.success("✅ Analysis complete! Use the export buttons above to save your results.")
+        # charts, word/emoji tables and complete exports: only the open tab computes
+        analysis_sections(chat, scope, stats)
 
     # =========================================
     # SENTIMENT VIEW
     # =========================================
     elif st.session_state.show_sentiment:
-        df = st.session_state.df
         st.title("🧠 Sentiment Analysis Dashboard")
         st.caption("Understand the emotional tone and polarity of each message.")
 
-        # returns a (summary_dict, sentiment_df)
-        try:
-            sentiment_summary, sentiment_df = sentiment_helper.analyze_sentiments(selected_user, df)
-        except Exception as e:
-            st.error(f"Sentiment analysis failed: {e}")
-            sentiment_summary, sentiment_df = None, pd.DataFrame()
-
-        if sentiment_summary is not None:
-            col1, col2, col3, col4 = st.columns(4)
-            col1.metric("😊 Positive", sentiment_summary["positive"])
-            col2.metric("😐 Neutral", sentiment_summary["neutral"])
-            col3.metric("😡 Negative", sentiment_summary["negative"])
-            col4.metric("📈 Avg Sentiment", round(sentiment_summary["avg_sentiment"], 3))
-
-            st.markdown("---")
-
-            # bar chart
-            st.subheader("📊 Sentiment Distribution")
-            try:
-                fig, ax = plt.subplots()
-                ax.bar(
-                    ["Positive", "Neutral", "Negative"],
-                    [sentiment_summary["positive"], sentiment_summary["neutral"], sentiment_summary["negative"]],
-                    color=["#2ecc71", "#f1c40f", "#e74c3c"]
-                )
-                ax.set_ylabel("Message Count")
-                st.pyplot(fig)
-            except Exception as e:
-                st.warning(f"Sentiment bar chart failed: {e}")
-
-            # pie chart
-            st.subheader("🧩 Sentiment Composition")
-            try:
-                fig, ax = plt.subplots()
-                ax.pie(
-                    [sentiment_summary["positive"], sentiment_summary["neutral"], sentiment_summary["negative"]],
-                    labels=["Positive", "Neutral", "Negative"],
-                    colors=["#2ecc71", "#f1c40f", "#e74c3c"],
-                    autopct='%1.1f%%',
-                    startangle=90
-                )
-                ax.axis('equal')
-                st.pyplot(fig)
-            except Exception as e:
-                st.warning(f"Sentiment pie chart failed: {e}")
-
-            # sample messages with polarity and sender
-            st.subheader("💬 Sample Messages by Sentiment (with Scores)")
-            try:
-                col_p, col_n, col_u = st.columns(3)
-                with col_p:
-                    st.markdown("**😊 Positive Messages**")
-                    st.dataframe(sentiment_df[sentiment_df['Sentiment'] == 'Positive'][['Sender', 'Message', 'Polarity']].head(5))
-                with col_n:
-                    st.markdown("**😐 Neutral Messages**")
-                    st.dataframe(sentiment_df[sentiment_df['Sentiment'] == 'Neutral'][['Sender', 'Message', 'Polarity']].head(5))
-                with col_u:
-                    st.markdown("**😡 Negative Messages**")
-                    st.dataframe(sentiment_df[sentiment_df['Sentiment'] == 'Negative'][['Sender', 'Message', 'Polarity']].head(5))
-            except Exception as e:
-                st.warning(f"Failed to render sample messages: {e}")
-
-
-            # =============================
-# 📤 EXPORT SENTIMENT ANALYSIS
-# =============================
-
-            st.markdown("---")
-            st.subheader("📤 Export Sentiment Analysis Results")
-
-            col1, col2, col3, col4 = st.columns(4)
-
-            with col1:
-                csv_data = export_sentiment_helper.export_sentiment_csv(sentiment_df)
-                st.download_button(
-                    label="⬇️  📄 Download CSV",
-                    data=csv_data,
-                    file_name=f"sentiment_analysis_{selected_user}.csv",
-                    mime="text/csv"
-                    )
-
-            with col2:
-                excel_data = export_sentiment_helper.export_sentiment_excel(sentiment_summary, sentiment_df)
-                st.download_button(
-                    label="⬇️  📘 Download Excel",
-                    data=excel_data,
-                    file_name=f"sentiment_analysis_{selected_user}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-
-            with col3:
-                pdf_data = export_sentiment_helper.export_sentiment_pdf(selected_user, sentiment_summary, sentiment_df)
-                st.download_button(
-                    label="⬇️  🧾 Download PDF",
-                    data=pdf_data,
-                    file_name=f"sentiment_analysis_{selected_user}.pdf",
-                    mime="application/pdf"
-                    )
- 
-            with col4:
-                word_data = export_sentiment_helper.export_sentiment_word(selected_user, sentiment_summary, sentiment_df)
-                st.download_button(
-                    label="⬇️  📝 Download Word",
-                    data=word_data,
-                    file_name=f"sentiment_analysis_{selected_user}.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                    )
+        sentiment_engine = st.sidebar.selectbox(
+            "🧮 Sentiment engine", list(sentiment_helper.SENTIMENT_BACKENDS),
+            help="'textblob' is the reference scorer; 'lexicon' is a vectorized engine for large chats."
+        )
 
+        chat = chat.with_sentiment_backend(sentiment_engine)
 
-        else:
-            st.warning("No sentiment data available for this chat or the chat contains no valid text messages.")
+        # scored in the background; switching user/engine cancels a stale run
+        background_section(
+            "Scoring sentiment", job_key(chat, "sentiment"),
+            lambda job: chat.with_progress(job.report).sentiment,
+            lambda: sentiment_page(chat, scope, chat.sentiment), section="sentiment"
+        )
 
-        # ======================================================
-# 👥 INTERACTION GRAPH SECTION (Stylish Visualization)
-# ======================================================
+    # ======================================================
+    # 👥 INTERACTION GRAPH SECTION (Stylish Visualization)
+    # ======================================================
     elif st.session_state.get("show_interaction", False):
         st.title("👥 User Relationship Graph")
         st.caption("Each circle represents a user. Line thickness = frequency of interaction.")
-        dynamic_mode = st.checkbox("🌀 Enable 3D Motion", value=True)
-
-        html = helper.create_interaction_graph(selected_user, st.session_state.df, dynamic=dynamic_mode)
-        if html:
-            st.components.v1.html(html, height=750, scrolling=False)
-            # 🧭 Add legend/info section
-            st.markdown("""
-            ### 🔍 Graph Legend  
-            - 🟢 **Node (Circle)** → Represents a chat participant.  
-            - 🌈 **Node Color** → Randomly assigned; used to visually separate users.  
-            - 🔵 **Line (Edge)** → Represents messages exchanged between two users.  
-            - 📏 **Line Thickness** → Shows interaction strength — thicker = more messages.  
-            - 🎨 **Line Color Intensity** → Warmer (red/yellow) = higher message frequency, cooler (blue/purple) = fewer messages.  
-            - ⚙️ **Motion Mode** → When ON, the graph slowly rotates like a 3D web.  
-            - 🔒 **Stable Mode** → When OFF, the graph stays still; zoom and drag freely.  
-            """)
-        else:
-            st.warning("⚠️ No sufficient interaction data available to build a network graph.")
+        interaction_section(chat)
 
+    # ======================================================
+    # 🗂️ CROSS-CHAT COMPARISON (multi-chat workspaces)
+    # ======================================================
+    elif st.session_state.show_comparison and len(frames) > 1:
+        st.title("🗂️ Chat Comparison")
+        st.caption("Activity, top senders and sentiment side by side for the selected chats (all senders).")
+        comparison_sections(chat)
 
 
 else:
     st.info("📂 Please upload your WhatsApp chat file to begin analysis.")
 
+# =========================================
+# Sidebar - shared cache / job metrics
+# =========================================
+with st.sidebar.expander("📈 Cache & job metrics"):
+    cache_stats = get_result_cache().stats()
+    st.write(
+        f"**Cache:** {cache_stats['entries']} entries, "
+        f"{cache_stats['bytes'] / 2**20:.1f} / {cache_stats['max_bytes'] / 2**20:.0f} MB"
+    )
+    st.write(
+        f"**Hits / misses:** {cache_stats['hits']} / {cache_stats['misses']} "
+        f"(hit rate {cache_stats['hit_rate']:.0%}), **evictions:** {cache_stats['evictions']}"
+    )
+    frame_stats = get_chat_frames().stats()
+    st.write(
+        f"**Parsed chats:** {frame_stats['frames']} in memory ({frame_stats['held']} most recent held), "
+        f"{frame_stats['bytes'] / 2**20:.1f} MB, {frame_stats['misses']} parses"
+    )
+    if get_result_cache().spill_dir:
+        st.write(
+            f"**Disk spill:** {cache_stats['spilled_entries']} entries, "
+            f"{cache_stats['spill_bytes'] / 2**20:.1f} MB, {cache_stats['spill_hits']} reloads"
+        )
+    st.json(get_job_executor().stats(), expanded=False)
+    st.caption("⏱️ Import times (cold, per server process)")
+    st.dataframe(pd.DataFrame(warmup.import_report(), columns=["name", "seconds", "phase"]), hide_index=True)
+
+# =========================================
+# Sidebar - performance debug panel
+# =========================================
+st.sidebar.toggle("🐞 Performance debug panel", key="profile_enabled",
+                  help="Record timing/memory spans for this session (decode, parsing, analytics, charts, exports).")
+if _profiler is not None:
+    _profiler.add("app.rerun", _run_started, time.perf_counter(), _run_rss, profiling.rss_bytes(), {})
+    with st.sidebar.expander("🐞 Performance spans", expanded=True):
+        request = _profiler.request_id
+        st.caption(f"This rerun (request #{request}); background jobs add their spans when they finish.")
+        st.dataframe(pd.DataFrame(_profiler.summary(request), columns=["name", "calls", "total_ms", "mean_ms", "max_ms"]),
+                     hide_index=True)
+        with st.expander("All recorded requests"):
+            st.dataframe(pd.DataFrame(_profiler.summary(), columns=["name", "calls", "total_ms", "mean_ms", "max_ms"]),
+                         hide_index=True)
+        col_json, col_trace = st.columns(2)
+        col_json.download_button("⬇️ JSON", _profiler.to_json(), file_name="spans.json", mime="application/json")
+        col_trace.download_button("⬇️ Chrome trace", _profiler.to_chrome_trace(), file_name="trace.json",
+                                  mime="application/json", help="Open in chrome://tracing or ui.perfetto.dev")
+        if st.button("🧹 Clear spans"):
+            _profiler.clear()
+
+# heavy libraries load in the background once the page has painted
+warmup.start_warmup(("polars",) + warmup.WARMUP_TARGETS if polars_backend.active() else warmup.WARMUP_TARGETS)
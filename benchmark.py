@@ -0,0 +1,293 @@
+"""
+===========================================================
+⏱️ benchmark.py — Benchmark Suite
+===========================================================
+
+Times the public parsing, analytics, sentiment and export functions on
+seeded synthetic chats (see synthetic_chat.py) and records each call's
+wall time and peak traced memory as JSON, so runs can be compared.
+
+Usage:
+    python benchmark.py --sizes 10000,100000,1000000 --out bench.json
+    python benchmark.py --sizes 10000 --only helper. --compare bench.json
+    python benchmark.py --sizes 1000000 --backend polars --compare bench.json
+
+Peak memory comes from tracemalloc in a second, untimed call, so timings
+carry no tracing overhead. It covers Python, NumPy and pandas buffers
+but not allocations made inside Arrow.
+===========================================================
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+TEXTBLOB_MAX = 100_000  # the reference scorer is one TextBlob parse per message
+
+
+# ==============================
+# 📋 Benchmarked Functions
+# ==============================
+def _benchmarks():
+    """[(name, fn(ctx), max_size or None)] in pipeline order."""
+    import preprocessor
+    import message_types
+    import helper
+    import sentiment_helper
+    import export_helper
+    import export_sentiment_helper
+
+    overall = "Overall"
+    return [
+        ("preprocessor.decode_chat", lambda c: preprocessor.decode_chat(c["raw"]), None),
+        ("preprocessor.preprocess", lambda c: preprocessor.preprocess(c["text"]), None),
+        ("message_types.classify", lambda c: message_types.classify(c["df"]["Message"], c["df"]["Sender"]), None),
+
+        ("helper.fetch_stats", lambda c: helper.fetch_stats(overall, c["df"]), None),
+        ("helper.fetch_stats[user]", lambda c: helper.fetch_stats(c["user"], c["df"]), None),
+        ("helper.most_busy_users", lambda c: helper.most_busy_users(c["df"]), None),
+        ("helper.monthly_timeline", lambda c: helper.monthly_timeline(overall, c["df"]), None),
+        ("helper.daily_timeline", lambda c: helper.daily_timeline(overall, c["df"]), None),
+        ("helper.week_activity_map", lambda c: helper.week_activity_map(overall, c["df"]), None),
+        ("helper.month_activity_map", lambda c: helper.month_activity_map(overall, c["df"]), None),
+        ("helper.activity_heatmap", lambda c: helper.activity_heatmap(overall, c["df"]), None),
+        ("helper.create_wordcloud", lambda c: helper.create_wordcloud(overall, c["df"]), None),
+        ("helper.most_common_words", lambda c: helper.most_common_words(overall, c["df"]), None),
+        ("helper.emoji_helper", lambda c: helper.emoji_helper(overall, c["df"]), None),
+        ("helper.generate_emoji_bar_chart_figure",
+         lambda c: helper.generate_emoji_bar_chart_figure(overall, c["df"]), None),
+        ("helper.interaction_matrix", lambda c: helper.interaction_matrix(overall, c["df"]), None),
+        ("helper.create_interaction_graph", lambda c: helper.create_interaction_graph(overall, c["df"]), None),
+
+        ("sentiment_helper.analyze_sentiments[lexicon]",
+         lambda c: sentiment_helper.analyze_sentiments(overall, c["df"], backend="lexicon"), None),
+        ("sentiment_helper.analyze_sentiments[textblob]",
+         lambda c: sentiment_helper.analyze_sentiments(overall, c["df"], backend="textblob"), TEXTBLOB_MAX),
+        ("sentiment_helper.SentimentCube.from_chat",
+         lambda c: sentiment_helper.SentimentCube.from_chat(c["df"], backend="lexicon"), None),
+        ("sentiment_helper.SentimentResult.top",
+         lambda c: sentiment_helper.SentimentResult(c["sentiment_df"]).top(10), None),
+
+        ("export_helper.enrich_messages",
+         lambda c: export_helper.enrich_messages(c["df"], sentiment_df=c["sentiment_df"]), None),
+        ("export_helper.stream_csv", lambda c: export_helper.stream_csv(c["enriched"]).read(), None),
+        ("export_helper.stream_ndjson", lambda c: export_helper.stream_ndjson(c["enriched"]).read(), None),
+        ("export_helper.stream_excel",
+         lambda c: export_helper.stream_excel({"Messages": c["enriched"]}).read(), TEXTBLOB_MAX),
+        ("export_helper.export_messages_parquet", lambda c: export_helper.export_messages_parquet(c["enriched"]), None),
+        ("export_helper.export_messages_arrow", lambda c: export_helper.export_messages_arrow(c["enriched"]), None),
+        ("export_helper.export_statistics_pdf",
+         lambda c: export_helper.export_statistics_pdf(overall, *c["stats"]), None),
+        ("export_helper.export_complete_analysis_pdf", lambda c: export_helper.export_complete_analysis_pdf(
+            overall, dict(zip(("messages", "words", "media", "links"), c["stats"])),
+            common_words_df=helper.most_common_words(overall, c["df"]),
+            emoji_df=helper.emoji_helper(overall, c["df"]),
+            busy_users_df=helper.most_busy_users(c["df"])[1],
+            profile="draft"), None),
+        ("export_sentiment_helper.export_sentiment_pdf", lambda c: export_sentiment_helper.export_sentiment_pdf(
+            overall, c["sentiment_summary"], c["sentiment_df"]), None),
+        ("export_sentiment_helper.export_sentiment_word", lambda c: export_sentiment_helper.export_sentiment_word(
+            overall, c["sentiment_summary"], c["sentiment_df"]), None),
+    ]
+
+
+class _Context(dict):
+    """Inputs for one size; intermediate results are built on first use and kept."""
+
+    def __init__(self, builders):
+        super().__init__()
+        self.builders = builders
+
+    def __missing__(self, key):
+        value = self[key] = self.builders[key](self)
+        return value
+
+
+def _context(size, seed, generator_options):
+    """Synthetic chat of `size` messages plus the intermediate results later stages consume."""
+    import preprocessor
+    import helper
+    import sentiment_helper
+    import export_helper
+    import synthetic_chat
+
+    ctx = _Context({
+        "raw": lambda c: c["text"].encode("utf-8"),
+        "user": lambda c: c["df"]["Sender"].value_counts().index[0],
+        "stats": lambda c: helper.fetch_stats("Overall", c["df"]),
+        "sentiment": lambda c: sentiment_helper.analyze_sentiments("Overall", c["df"], backend="lexicon"),
+        "sentiment_summary": lambda c: c["sentiment"][0],
+        "sentiment_df": lambda c: c["sentiment"][1],
+        "enriched": lambda c: export_helper.enrich_messages(c["df"], sentiment_df=c["sentiment_df"]),
+    })
+    ctx["text"] = synthetic_chat.generate_chat(messages=size, seed=seed, **generator_options)
+    ctx["df"] = preprocessor.preprocess(ctx["text"])
+    return ctx
+
+
+# ==============================
+# ⏱️ Measurement
+# ==============================
+def _cleanup():
+    if "matplotlib.pyplot" in sys.modules:
+        sys.modules["matplotlib.pyplot"].close("all")
+    gc.collect()
+
+
+def measure(fn, ctx, repeat=1, memory=True) -> dict:
+    """Best-of-`repeat` wall time, then (optionally) one traced call for peak memory."""
+    times = []
+    while len(times) < max(1, repeat):
+        inputs = len(ctx)
+        _cleanup()
+        start = time.perf_counter()
+        fn(ctx)
+        if len(ctx) == inputs:  # a call that first had to build its inputs doesn't count
+            times.append(time.perf_counter() - start)
+    row = {"seconds": round(min(times), 6)}
+
+    if memory:
+        _cleanup()
+        tracemalloc.start()
+        try:
+            fn(ctx)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        row["peak_mb"] = round(peak / 2**20, 3)
+    _cleanup()
+    return row
+
+
+def _meta(args):
+    import numpy as np
+    import pandas as pd
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "backend": args.backend,
+        "polars_threads": _polars_threads() if args.backend == "polars" else None,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "generator": args.generator_options,
+    }
+
+
+def _polars_threads():
+    import polars
+    return polars.thread_pool_size()
+
+
+def run(sizes=DEFAULT_SIZES, only=None, seed=0, repeat=1, memory=True, generator_options=None, log=print):
+    """Runs every selected benchmark at every size; returns result rows."""
+    import matplotlib
+    matplotlib.use("Agg")
+
+    benchmarks = [b for b in _benchmarks() if not only or any(o in b[0] for o in only)]
+    results = []
+    for size in sizes:
+        start = time.perf_counter()
+        ctx = _context(size, seed, generator_options or {})
+        log(f"📦 {size:,} messages ({len(ctx['df']):,} parsed) ready in {time.perf_counter() - start:.1f}s")
+        for name, fn, max_size in benchmarks:
+            row = {"function": name, "size": size, "rows": len(ctx["df"])}
+            if max_size is not None and size > max_size:
+                row["skipped"] = f"size above {max_size:,}"
+            else:
+                try:
+                    row.update(measure(fn, ctx, repeat, memory))
+                except Exception as e:
+                    row["error"] = f"{type(e).__name__}: {e}"
+            results.append(row)
+            log(_format_row(row))
+        del ctx
+        _cleanup()
+    return results
+
+
+def _format_row(row, baseline=None):
+    if "seconds" not in row:
+        return f"  {row['function']:<50} {row.get('skipped') or row.get('error')}"
+    line = f"  {row['function']:<50} {row['seconds']:>10.4f}s"
+    if "peak_mb" in row:
+        line += f" {row['peak_mb']:>10.1f} MB"
+    if baseline and baseline.get("seconds"):
+        line += f"   x{baseline['seconds'] / max(row['seconds'], 1e-9):.2f} vs baseline"
+    return line
+
+
+# ==============================
+# 🖥️ Command Line
+# ==============================
+def compare(results, baseline_path, log=print):
+    """Print speed-ups against a previous JSON report (matched by function and size)."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["function"], r["size"]): r for r in json.load(f)["results"]}
+    log(f"\n📊 Compared with {baseline_path} (x > 1 means faster now)")
+    for row in results:
+        log(_format_row(row, baseline.get((row["function"], row["size"]))))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the chat analyzer on synthetic WhatsApp exports.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated message counts (default: 10000,100000,1000000)")
+    parser.add_argument("--only", default="", help="comma-separated substrings of function names to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="timed calls per function; the best is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory call")
+    parser.add_argument("--backend", choices=("pandas", "polars"), default="pandas",
+                        help="dataframe backend for preprocess and the helpers (see polars_backend.py)")
+    parser.add_argument("--senders", type=int, default=8, help="synthetic chat: number of senders")
+    parser.add_argument("--time-format", choices=("24h", "12h"), default="24h", help="synthetic chat: clock format")
+    parser.add_argument("--out", default="benchmark.json", help="JSON report path (default: benchmark.json)")
+    parser.add_argument("--compare", default=None, help="previous JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    args.sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    args.only = [o.strip() for o in args.only.split(",") if o.strip()]
+    args.generator_options = {"senders": args.senders, "time_format": args.time_format}
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out = os.path.abspath(args.out)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))  # helpers read stop_hinglish.txt from here
+    warnings.simplefilter("ignore")  # missing emoji glyphs etc. would drown the table
+    import polars_backend
+    polars_backend.use(args.backend)
+
+    results = run(args.sizes, args.only, args.seed, args.repeat, not args.no_memory, args.generator_options)
+    report = {"meta": _meta(args), "results": results}
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {out}")
+    if baseline:
+        compare(results, baseline)
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+"""
+===========================================================
+🖼️ charts.py — Shared Chart & Result Cache
+===========================================================
+
+Builds every analysis chart once and serves the same objects to the
+on-screen view and to every export format.
+
+    - FigureCache: thread-safe LRU cache with a memory budget and
+      optional disk spill, keyed by
+      (chat digest, selected_user, date window, name, parameters)
+    - ChartView: figures for one analysis.ChatAnalysis (chat + user +
+      date window); the underlying results come from the same cache
+===========================================================
+"""
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pandas as pd
+
+import export_helper
+import helper
+import profiling
+
+
+DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024
+DEFAULT_SPILL_BYTES = 1024 * 1024 * 1024
+SCREEN_DPI = 200  # matches st.pyplot's default rendering
+
+
+# ==============================
+# 📏 Size Estimation
+# ==============================
+def _is_figure(value) -> bool:
+    # without importing matplotlib: a Figure can only exist once it is loaded
+    # (the module may still be initializing on the warm-up thread)
+    figure_class = getattr(sys.modules.get("matplotlib.figure"), "Figure", None)
+    return figure_class is not None and isinstance(value, figure_class)
+
+
+def _close(fig):
+    import matplotlib.pyplot as plt
+    with export_helper.figure_lock(fig):  # not while an export is still drawing it
+        plt.close(fig)
+
+
+def estimate_size(value) -> int:
+    """Rough in-memory footprint of a cached value, in bytes."""
+    if value is None:
+        return 0
+    if _is_figure(value):
+        width, height = value.get_size_inches()
+        return int(width * height * value.dpi ** 2 * 4)  # one RGBA raster
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_size(v) for v in value)
+    if hasattr(value, "table"):  # SentimentCube
+        return estimate_size(value.table)
+    if hasattr(value, "frame") and hasattr(value, "dates"):  # SentimentResult
+        return estimate_size(value.frame) + estimate_size(value.dates)
+    if isinstance(value, tempfile.SpooledTemporaryFile):  # streamed export: only its in-memory part counts
+        return 0 if value._rolled else value._file.getbuffer().nbytes
+    if isinstance(value, str):
+        return len(value)
+    if hasattr(value, "width") and hasattr(value, "height"):  # WordCloud
+        return int(value.width * value.height * 3)
+    return sys.getsizeof(value)
+
+
+# ==============================
+# 🗃️ LRU Cache
+# ==============================
+_MISSING = object()
+
+
+class _Absent(Exception):
+    """FigureCache.get(): the key was neither cached nor spilled."""
+
+
+def _absent():
+    raise _Absent()
+
+
+class FigureCache:
+    """
+    Thread-safe LRU cache for helper results and figures with a
+    byte budget. One instance can serve every session of a server process.
+
+    With spill_dir set, evicted results (not figures) are pickled to disk and
+    loaded back on the next request instead of being recomputed; the spill
+    directory has its own byte budget.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_BUDGET_BYTES, spill_dir: str | None = None,
+                 max_spill_bytes: int = DEFAULT_SPILL_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.max_spill_bytes = max_spill_bytes
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._inflight = {}  # key -> Future, while a builder runs
+        self._spilled = OrderedDict()  # key -> (path, file size)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.spill_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spills = 0
+        self.spill_hits = 0
+
+    def get_or_create(self, key, builder):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            # Single-flight: concurrent callers for the same key wait for one build.
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+                spilled = self._spilled.pop(key, None)
+            else:
+                self.hits += 1
+
+        if not owner:
+            return pending.result()
+
+        try:
+            value = self._load_spill(spilled) if spilled else _MISSING
+            if value is _MISSING:
+                with self._lock:
+                    self.misses += 1
+                value = builder()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            pending.set_exception(e)
+            raise
+        size = estimate_size(value)
+
+        with self._lock:
+            del self._inflight[key]
+            evicted = self._store(key, value, size)
+        pending.set_result(value)
+        self._release(evicted)
+        return value
+
+    def get(self, key, default=None):
+        """The cached (or spilled) value of key, without building it; default if there is none."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            if key not in self._spilled and key not in self._inflight:
+                return default
+        try:
+            return self.get_or_create(key, _absent)
+        except _Absent:
+            return default
+
+    def put(self, key, value):
+        """Store a value built elsewhere (e.g. a finished export) under the same byte budget."""
+        size = estimate_size(value)
+        with self._lock:
+            spilled = self._spilled.pop(key, None)
+            if spilled:
+                self.spill_bytes -= spilled[1]
+            evicted = self._store(key, value, size)
+        if spilled:
+            _remove(spilled[0])
+        self._release(evicted)
+        return value
+
+    def _store(self, key, value, size):
+        # under the lock; returns the evicted (key, value) pairs for _release()
+        previous = self._entries.pop(key, None)
+        if previous:
+            self.bytes -= previous[1]
+        self._entries[key] = (value, size)
+        self.bytes += size
+        evicted = []
+        # Always keep the newest entry, even if it alone exceeds the budget.
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            old_key, (old_value, old_size) = self._entries.popitem(last=False)
+            self.bytes -= old_size
+            self.evictions += 1
+            evicted.append((old_key, old_value))
+        return evicted
+
+    def _release(self, evicted):
+        for old_key, old_value in evicted:
+            if _is_figure(old_value):
+                _close(old_value)
+            elif self.spill_dir:
+                self._spill(old_key, old_value)
+
+    # ---------- disk spill ----------
+    def _spill(self, key, value):
+        path = os.path.join(self.spill_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".pkl")
+        try:
+            with open(path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(path)
+        except Exception as e:  # unpicklable values are simply dropped
+            print(f"⚠️ Could not spill cache entry: {e}")
+            _remove(path)
+            return
+
+        stale = []
+        with self._lock:
+            previous = self._spilled.pop(key, None)
+            if previous:
+                self.spill_bytes -= previous[1]
+            self._spilled[key] = (path, size)
+            self.spill_bytes += size
+            self.spills += 1
+            while self.spill_bytes > self.max_spill_bytes and self._spilled:
+                _, (old_path, old_size) = self._spilled.popitem(last=False)
+                self.spill_bytes -= old_size
+                stale.append(old_path)
+        for old_path in stale:
+            _remove(old_path)
+
+    def _load_spill(self, spilled):
+        path, size = spilled
+        with self._lock:
+            self.spill_bytes -= size
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except Exception:
+            return _MISSING
+        finally:
+            _remove(path)
+        with self._lock:
+            self.spill_hits += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            for value, _ in self._entries.values():
+                if _is_figure(value):
+                    _close(value)
+            self._entries.clear()
+            self.bytes = 0
+            paths = [path for path, _ in self._spilled.values()]
+            self._spilled.clear()
+            self.spill_bytes = 0
+        for path in paths:
+            _remove(path)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.spill_hits
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "spilled_entries": len(self._spilled),
+                "spill_bytes": self.spill_bytes,
+                "spills": self.spills,
+                "spill_hits": self.spill_hits,
+            }
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# ==============================
+# 🖌️ Chart Builders
+# ==============================
+def _line_chart(data, x, y, color, title, xlabel):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.plot(data[x], data[y], color=color, linewidth=2)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('Messages')
+    ax.set_title(title)
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+
+def _bar_chart(series, color, title, xlabel):
+    if series.empty:
+        return None
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.bar(series.index, series.values, color=color)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel('Messages')
+    ax.set_title(title)
+    ax.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+    return fig
+
+
+def _heatmap(view):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    user_heatmap = view.analysis.heatmap
+    if user_heatmap.empty or user_heatmap.isnull().all().all():
+        return None
+    fig, ax = plt.subplots(figsize=(12, 6))
+    sns.heatmap(user_heatmap, ax=ax, cmap='YlOrRd')
+    ax.set_title('Activity Heatmap')
+    fig.tight_layout()
+    return fig
+
+
+def _wordcloud(view):
+    import matplotlib.pyplot as plt
+
+    wordcloud = view.analysis.wordcloud
+    if wordcloud is None:
+        return None
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.imshow(wordcloud, interpolation="bilinear")
+    ax.axis("off")
+    ax.set_title('Word Cloud')
+    fig.tight_layout()
+    return fig
+
+
+def _common_words(view):
+    import matplotlib.pyplot as plt
+
+    most_common_df = view.analysis.common_words
+    if most_common_df.empty:
+        return None
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.barh(most_common_df['Word'], most_common_df['Frequency'], color='teal')
+    ax.set_xlabel('Frequency')
+    ax.set_ylabel('Words')
+    ax.set_title('Most Common Words')
+    fig.tight_layout()
+    return fig
+
+
+def _top_users(view):
+    if view.analysis.selected_user != 'Overall':
+        return None
+    x, _ = view.analysis.busy_users
+    return _bar_chart(x, 'green', 'Top 5 Contributors', 'User')
+
+
+# chart id -> (export title, builder(view) -> Figure | None), in report order
+CHARTS = OrderedDict([
+    ("monthly_timeline", ("Monthly Timeline", lambda v: _line_chart(
+        v.analysis.monthly_timeline, 'time', 'Message', 'green', 'Monthly Timeline', 'Time Period'))),
+    ("daily_timeline", ("Daily Timeline", lambda v: _line_chart(
+        v.analysis.daily_timeline, 'only_date', 'Message', 'black', 'Daily Timeline', 'Date'))),
+    ("busy_days", ("Most Active Days", lambda v: _bar_chart(
+        v.analysis.week_activity, 'orange', 'Most Active Days', 'Day of Week'))),
+    ("busy_months", ("Most Active Months", lambda v: _bar_chart(
+        v.analysis.month_activity, 'purple', 'Most Active Months', 'Month'))),
+    ("heatmap", ("Activity Heatmap", _heatmap)),
+    ("wordcloud", ("Word Cloud", _wordcloud)),
+    ("common_words", ("Most Common Words", _common_words)),
+    ("emoji_bar", ("Emoji Usage Bar Chart", lambda v: helper.generate_emoji_bar_chart_figure(v.analysis.selected_user, v.analysis.frame))),
+    ("top_users", ("Top Contributors", _top_users)),
+])
+
+
+# ==============================
+# 🔭 Per-chat View
+# ==============================
+class ChartView:
+    """Figures for one ChatAnalysis, cached next to its results."""
+
+    def __init__(self, analysis):
+        self.analysis = analysis
+
+    def figure(self, chart_id: str, **params):
+        key = self.analysis.key(f"figure:{chart_id}", sorted(params.items()))
+        _, builder = CHARTS[chart_id]
+
+        def build():
+            with profiling.span("charts.figure", chart=chart_id):
+                return builder(self)
+        return self.analysis.cache.get_or_create(key, build)
+
+    def image(self, chart_id: str, dpi: int = SCREEN_DPI, **params):
+        """PNG bytes of a chart (None when it has no data), rasterized once per dpi."""
+        key = self.analysis.key(f"image:{chart_id}", sorted(params.items()) + [("dpi", dpi)])
+
+        def build():
+            fig = self.figure(chart_id, **params)
+            return None if fig is None else export_helper.rasterize_figure(fig, dpi=dpi).getvalue()
+        return self.analysis.cache.get_or_create(key, build)
+
+    def export_charts(self) -> dict:
+        """All available charts as {title: Figure}, in report order."""
+        charts = {}
+        for chart_id, (title, _) in CHARTS.items():
+            try:
+                fig = self.figure(chart_id)
+            except Exception as e:
+                print(f"⚠️ Chart '{chart_id}' failed: {e}")
+                continue
+            if fig is not None:
+                charts[title] = fig
+        return charts
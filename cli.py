@@ -0,0 +1,264 @@
+"""
+===========================================================
+🖥️ cli.py — Headless Batch Analyzer
+===========================================================
+
+Parses and analyzes many exported chats without Streamlit, using the
+same analysis.ChatAnalysis core as the app.
+
+Usage:
+    python cli.py chats/ more_chats/group.txt --out reports \
+        --formats csv,parquet,pdf --workers 4 --max-memory-mb 2048
+
+Each chat gets its own folder under --out; a summary index of every
+chat (index.csv + index.json) is written at the top level.
+===========================================================
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+FORMATS = ("csv", "parquet", "pdf")
+
+
+# ==============================
+# 🧩 Worker Setup
+# ==============================
+def _limit_memory(max_memory_mb):
+    """Cap the worker's address space so one huge chat fails alone instead of taking the box down."""
+    if not max_memory_mb:
+        return
+    try:
+        import resource
+        limit = int(max_memory_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"⚠️ Could not apply memory limit: {e}", file=sys.stderr)
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # KiB on Linux
+    except ImportError:
+        return None
+
+
+# ==============================
+# 🔍 Per-chat Analysis
+# ==============================
+def analyze_chat(path, out_dir, formats, sentiment_engine="lexicon", pdf_profile="draft"):
+    """Parse + analyze one exported chat and write its reports. Returns a summary row."""
+    import matplotlib
+    matplotlib.use("Agg")  # headless rendering
+
+    start = time.perf_counter()
+    path = Path(path)
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    row = {"file": str(path), "digest": digest, "status": "ok"}
+
+    try:
+        _analyze_into(row, path, raw, digest, out_dir, formats, sentiment_engine, pdf_profile)
+    except MemoryError:
+        row.update(status="failed", error="memory limit exceeded")
+    except Exception as e:
+        row.update(status="failed", error=f"{type(e).__name__}: {e}")
+        traceback.print_exc()
+
+    row["seconds"] = round(time.perf_counter() - start, 3)
+    row["peak_rss_mb"] = _peak_rss_mb()
+    return row
+
+
+def _analyze_into(row, path, raw, digest, out_dir, formats, sentiment_engine, pdf_profile):
+    """Fills `row` with the chat's summary and writes the requested report files."""
+    import pandas as pd
+    import preprocessor
+    import export_helper
+    import analysis
+    import charts
+
+    df = preprocessor.preprocess(preprocessor.decode_chat(raw))
+    if df.empty:
+        row.update(status="failed", error="no WhatsApp messages found")
+        return
+
+    chat_dir = Path(out_dir) / f"{path.stem}-{digest[:8]}"
+    chat_dir.mkdir(parents=True, exist_ok=True)
+
+    cache = charts.FigureCache()
+    chat = analysis.ChatAnalysis(df, digest=digest, cache=cache, sentiment_backend=sentiment_engine)
+    num_messages, words, num_media, num_links = chat.stats
+    summary, sentiment_df = chat.sentiment
+    summary = summary or {"positive": 0, "neutral": 0, "negative": 0, "avg_sentiment": 0.0}
+
+    row.update({
+        "messages": num_messages,
+        "senders": int(df["Sender"].nunique()),
+        "first_date": str(df["Date"].min().date()),
+        "last_date": str(df["Date"].max().date()),
+        "words": words,
+        "media": num_media,
+        "links": num_links,
+        "positive": summary["positive"],
+        "neutral": summary["neutral"],
+        "negative": summary["negative"],
+        "avg_sentiment": float(summary["avg_sentiment"]),
+    })
+
+    outputs = []
+    if "csv" in formats:
+        metrics = ["messages", "senders", "words", "media", "links",
+                   "positive", "neutral", "negative", "avg_sentiment"]
+        pd.DataFrame({"Metric": metrics, "Value": [row[m] for m in metrics]}).to_csv(chat_dir / "stats.csv", index=False)
+        with open(chat_dir / "sentiment.csv.gz", "wb") as f:
+            shutil.copyfileobj(export_helper.stream_csv(sentiment_df), f)
+        outputs += ["stats.csv", "sentiment.csv.gz"]
+
+    if "parquet" in formats:
+        enriched = export_helper.enrich_messages(df, sentiment_df=sentiment_df)
+        (chat_dir / "messages.parquet").write_bytes(
+            export_helper.export_messages_parquet(enriched, {"source_file": path.name, "source_digest": digest})
+        )
+        outputs.append("messages.parquet")
+
+    if "pdf" in formats:
+        stats = {"messages": num_messages, "words": words, "media": num_media, "links": num_links}
+        _, busy_users_df = chat.busy_users
+        pdf = export_helper.export_complete_analysis_pdf(
+            "Overall", stats, chat.date_range,
+            common_words_df=chat.common_words,
+            emoji_df=chat.emojis,
+            busy_users_df=busy_users_df,
+            charts=charts.ChartView(chat).export_charts(),
+            profile=pdf_profile,
+        )
+        (chat_dir / "report.pdf").write_bytes(pdf)
+        outputs.append("report.pdf")
+    cache.clear()
+
+    row["output_dir"] = str(chat_dir)
+    row["outputs"] = ";".join(outputs)
+
+
+# ==============================
+# 📂 Batch Driver
+# ==============================
+def collect_chats(paths, pattern="*.txt", recursive=False):
+    """Expand files and directories into a sorted list of chat files."""
+    found = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            found.extend(sorted(p.rglob(pattern) if recursive else p.glob(pattern)))
+        elif p.is_file():
+            found.append(p)
+        else:
+            print(f"⚠️ Skipping missing path: {p}", file=sys.stderr)
+    return found
+
+
+def write_index(rows, out_dir):
+    import pandas as pd
+
+    out_dir = Path(out_dir)
+    pd.DataFrame(rows).convert_dtypes().to_csv(out_dir / "index.csv", index=False)
+    with open(out_dir / "index.json", "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2, default=str)
+
+
+def run_batch(chats, out_dir, formats, workers=1, max_memory_mb=None, max_tasks_per_child=None,
+              sentiment_engine="lexicon", pdf_profile="draft"):
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    args = (out_dir, formats, sentiment_engine, pdf_profile)
+    rows = []
+
+    if workers <= 1:
+        _limit_memory(max_memory_mb)
+        for chat in chats:
+            rows.append(analyze_chat(chat, *args))
+            _report(rows[-1], len(rows), len(chats))
+    else:
+        pool_kwargs = {"max_workers": workers, "initializer": _limit_memory, "initargs": (max_memory_mb,)}
+        if max_tasks_per_child:
+            pool_kwargs["max_tasks_per_child"] = max_tasks_per_child
+        with ProcessPoolExecutor(**pool_kwargs) as pool:
+            futures = {pool.submit(analyze_chat, chat, *args): chat for chat in chats}
+            for future in as_completed(futures):
+                try:
+                    row = future.result()
+                except Exception as e:  # worker died (e.g. killed by the OOM killer)
+                    row = {"file": str(futures[future]), "status": "failed", "error": f"{type(e).__name__}: {e}"}
+                rows.append(row)
+                _report(row, len(rows), len(chats))
+
+    rows.sort(key=lambda r: r["file"])
+    write_index(rows, out_dir)
+    return rows
+
+
+def _report(row, done, total):
+    status = "✅" if row["status"] == "ok" else f"❌ {row.get('error', '')}"
+    print(f"[{done}/{total}] {row['file']} {status} ({row.get('seconds', '?')}s)")
+
+
+def parse_args(argv=None):
+    import export_helper
+    import sentiment_helper
+
+    parser = argparse.ArgumentParser(description="Batch-analyze exported WhatsApp chats without the Streamlit UI.")
+    parser.add_argument("paths", nargs="+", help="chat export files and/or directories containing them")
+    parser.add_argument("--out", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--formats", default="csv,parquet",
+                        help=f"comma-separated report formats: {','.join(FORMATS)} (default: csv,parquet)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="parallel worker processes (default: CPU count; 1 = run inline)")
+    parser.add_argument("--max-memory-mb", type=int, default=None,
+                        help="address-space limit per worker; chats exceeding it are marked failed")
+    parser.add_argument("--max-tasks-per-child", type=int, default=None,
+                        help="recycle each worker after this many chats to release memory")
+    parser.add_argument("--pattern", default="*.txt", help="file glob used inside directories (default: *.txt)")
+    parser.add_argument("--recursive", action="store_true", help="search directories recursively")
+    parser.add_argument("--sentiment-engine", default="lexicon", choices=list(sentiment_helper.SENTIMENT_BACKENDS),
+                        help="sentiment backend (default: lexicon)")
+    parser.add_argument("--pdf-profile", default="draft", choices=list(export_helper.EXPORT_PROFILES),
+                        help="PDF chart quality (default: draft)")
+    args = parser.parse_args(argv)
+
+    args.formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()]
+    unknown = set(args.formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    chats = collect_chats(args.paths, args.pattern, args.recursive)
+    if not chats:
+        print("No chat files found.", file=sys.stderr)
+        return 2
+
+    rows = run_batch(
+        chats, args.out, args.formats,
+        workers=min(args.workers, len(chats)),
+        max_memory_mb=args.max_memory_mb,
+        max_tasks_per_child=args.max_tasks_per_child,
+        sentiment_engine=args.sentiment_engine,
+        pdf_profile=args.pdf_profile,
+    )
+    failed = sum(r["status"] != "ok" for r in rows)
+    print(f"Done: {len(rows) - failed} ok, {failed} failed. Index: {Path(args.out) / 'index.csv'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,64 @@
 import pandas as pd
 import io
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-import matplotlib.pyplot as plt
+import gzip
+import json
 import tempfile
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import os
+import threading
+import weakref
+import profiling
+
+
+# =========================
+# 🖼️ Chart Rasterization
+# =========================
+
+# DPI / PNG compression presets for chart images embedded in PDFs.
+EXPORT_PROFILES = {
+    'draft': {'dpi': 100, 'compress_level': 1},
+    'standard': {'dpi': 200, 'compress_level': 6},
+    'print': {'dpi': 300, 'compress_level': 9},
+}
+
+
+_figure_locks = weakref.WeakKeyDictionary()
+_figure_locks_guard = threading.Lock()
+
+
+def figure_lock(fig):
+    """Lock for drawing one figure: cached figures are shared by sessions and export threads"""
+    with _figure_locks_guard:
+        lock = _figure_locks.get(fig)
+        if lock is None:
+            lock = _figure_locks[fig] = threading.Lock()
+        return lock
+
+
+@profiling.traced()
+def rasterize_figure(fig, profile='standard', dpi=None):
+    """Render a matplotlib figure to an in-memory PNG buffer (one thread at a time per figure)"""
+    settings = EXPORT_PROFILES[profile]
+    buffer = io.BytesIO()
+    with figure_lock(fig):
+        fig.savefig(buffer, format='png', dpi=dpi or settings['dpi'], bbox_inches='tight',
+                    facecolor='white', edgecolor='none',
+                    pil_kwargs={'compress_level': settings['compress_level']})
+    buffer.seek(0)
+    return buffer
+
+
+def _chart_pool(max_workers=None):
+    return ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1),
+                              thread_name_prefix='chart-raster')
 
 
 # =========================
 # 📊 CSV Export Functions
 # =========================
 
+@profiling.traced()
 def export_statistics_csv(num_messages, words, num_media_messages, num_links):
     """Export basic statistics to CSV format"""
     data = {
@@ -25,58 +69,229 @@ def export_statistics_csv(num_messages, words, num_media_messages, num_links):
     return df.to_csv(index=False).encode('utf-8')
 
 
+@profiling.traced()
 def export_dataframe_csv(df, columns=None):
-    """Export any dataframe to CSV format"""
-    if columns:
-        df = df[columns]
-    return df.to_csv(index=False).encode('utf-8')
+    """Export any dataframe to CSV format; returns a file-like object at position 0"""
+    return stream_csv(df, columns, compress=False)
 
 
+@profiling.traced()
 def export_complete_analysis_csv(selected_user, df, stats_dict, timeline_df=None, 
                                   daily_timeline_df=None, common_words_df=None, 
                                   emoji_df=None, busy_users_df=None):
-    """Export complete analysis to a single CSV with multiple sheets (requires Excel format)"""
-    output = io.BytesIO()
-    
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Statistics sheet
-        stats_df = pd.DataFrame({
+    """Export complete analysis to a single workbook with multiple sheets (Excel format); returns a file-like object"""
+    # Statistics sheet
+    sheets = {
+        'Statistics': pd.DataFrame({
             'Metric': ['Total Messages', 'Total Words', 'Total Media Shared', 'Total Links Shared'],
             'Value': [stats_dict['messages'], stats_dict['words'], 
                      stats_dict['media'], stats_dict['links']]
         })
-        stats_df.to_excel(writer, sheet_name='Statistics', index=False)
-        
-        # Timeline sheets
-        if timeline_df is not None and not timeline_df.empty:
-            timeline_df.to_excel(writer, sheet_name='Monthly Timeline', index=False)
-        
-        if daily_timeline_df is not None and not daily_timeline_df.empty:
-            daily_timeline_df.to_excel(writer, sheet_name='Daily Timeline', index=False)
-        
-        # Common words
-        if common_words_df is not None and not common_words_df.empty:
-            common_words_df.to_excel(writer, sheet_name='Common Words', index=False)
-        
-        # Emoji analysis
-        if emoji_df is not None and not emoji_df.empty:
-            emoji_df.to_excel(writer, sheet_name='Emoji Analysis', index=False)
-        
-        # Busy users (if Overall view)
-        if busy_users_df is not None and not busy_users_df.empty:
-            busy_users_df.to_excel(writer, sheet_name='Top Users', index=False)
+    }
+    
+    # Timelines, common words, emoji analysis, busy users (if Overall view)
+    optional = [
+        ('Monthly Timeline', timeline_df),
+        ('Daily Timeline', daily_timeline_df),
+        ('Common Words', common_words_df),
+        ('Emoji Analysis', emoji_df),
+        ('Top Users', busy_users_df),
+    ]
+    for sheet_name, sheet_df in optional:
+        if sheet_df is not None and not sheet_df.empty:
+            sheets[sheet_name] = sheet_df
     
-    output.seek(0)
-    return output.getvalue()
+    return stream_excel(sheets)
+
+
+# =========================
+# 🌊 Streaming Export Functions
+# =========================
+
+# Exports stay in memory up to this size, then spill to a temp file on disk.
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+CHUNK_ROWS = 50_000
+
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode='w+b')
+
+
+def _chunks(df, columns=None, chunk_rows=CHUNK_ROWS):
+    if columns:
+        df = df[columns]
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield start, df.iloc[start:start + chunk_rows]
+
+
+@profiling.traced()
+def stream_csv(df, columns=None, compress=True, chunk_rows=CHUNK_ROWS):
+    """Write a dataframe as (gzip) CSV in row chunks; returns a file-like object at position 0"""
+    spool = _spool()
+    sink = gzip.GzipFile(fileobj=spool, mode='wb') if compress else spool
+    for start, chunk in _chunks(df, columns, chunk_rows):
+        sink.write(chunk.to_csv(index=False, header=(start == 0)).encode('utf-8'))
+    if compress:
+        sink.close()  # flushes the gzip trailer; leaves the spool open
+    spool.seek(0)
+    return spool
+
+
+@profiling.traced()
+def stream_ndjson(df, columns=None, compress=True, chunk_rows=CHUNK_ROWS):
+    """Write a dataframe as (gzip) newline-delimited JSON in row chunks; returns a file-like object"""
+    spool = _spool()
+    sink = gzip.GzipFile(fileobj=spool, mode='wb') if compress else spool
+    for _, chunk in _chunks(df, columns, chunk_rows):
+        if not chunk.empty:
+            text = chunk.to_json(orient='records', lines=True, date_format='iso', force_ascii=False)
+            sink.write(text.encode('utf-8'))
+            if not text.endswith('\n'):
+                sink.write(b'\n')
+    if compress:
+        sink.close()
+    spool.seek(0)
+    return spool
+
+
+@profiling.traced()
+def stream_excel(sheets, chunk_rows=CHUNK_ROWS):
+    """Write {sheet name: dataframe} with openpyxl's write-only (constant-memory) mode.
+
+    Rows are appended chunk by chunk instead of holding every cell object in RAM;
+    the workbook is saved into a spooled temp file and returned as a file-like object.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    for sheet_name, df in sheets.items():
+        if df is None:
+            continue
+        ws = wb.create_sheet(title=sheet_name[:31])
+        ws.append([str(c) for c in df.columns])
+        for _, chunk in _chunks(df, chunk_rows=chunk_rows):
+            # openpyxl cannot write pd.NA / NaT; blank those cells instead
+            chunk = chunk.astype(object).where(chunk.notna(), None)
+            for row in chunk.itertuples(index=False, name=None):
+                ws.append(row)
+    spool = _spool()
+    wb.save(spool)
+    spool.seek(0)
+    return spool
+
+
+# =========================
+# 🧱 Columnar Export (Parquet / Arrow)
+# =========================
+
+MONTH_ORDER = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+               'August', 'September', 'October', 'November', 'December']
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+PERIOD_ORDER = ["00-1"] + [f"{h}-{h + 1}" for h in range(1, 23)] + ["23-00"]
+
+ENRICHED_COLUMNS = {
+    'Polarity': 'sentiment polarity in [-1, 1]',
+    'Sentiment': 'Positive / Neutral / Negative label',
+    'Word_count': 'whitespace-separated words',
+    'Emoji_count': 'emoji characters',
+    'URL_count': 'URLs found by urlextract',
+    'Is_media': "media message (message_types, any locale)",
+}
+
+
+@profiling.traced()
+def enrich_messages(df, sentiment_df=None, sentiment_backend='lexicon'):
+    """Add per-message derived columns (sentiment, word / emoji / URL counts) to the preprocessed frame.
+
+    Pass an existing ``sentiment_df`` (index-aligned with ``df``) to reuse scores;
+    otherwise messages are scored with ``sentiment_backend``.
+    """
+    import emoji
+    import helper
+    import sentiment_helper
+
+    extractor = helper.get_url_extractor()
+    enriched = df.copy()
+    messages = enriched['Message'].astype(str)
+    enriched['Is_media'] = enriched['Type'].eq('media')
+
+    if sentiment_df is None:
+        sentiment_df = sentiment_helper.analyze_sentiment('Overall', df, sentiment_backend)
+    enriched['Polarity'] = sentiment_df['Polarity'].reindex(enriched.index).fillna(0.0)
+    enriched['Sentiment'] = sentiment_helper.label_polarity(enriched['Polarity'])
+
+    enriched['Word_count'] = messages.str.split().str.len().astype('int32')
+    enriched['Emoji_count'] = messages.map(lambda m: sum(ch in emoji.EMOJI_DATA for ch in m)).astype('int32')
+    enriched['URL_count'] = messages.map(lambda m: len(extractor.find_urls(m))).astype('int32')
+
+    # Dictionary-encode repeated labels (Arrow turns categoricals into dictionary arrays)
+    enriched['Sender'] = enriched['Sender'].astype('category')
+    enriched['Sentiment'] = pd.Categorical(enriched['Sentiment'], categories=['Positive', 'Neutral', 'Negative'])
+    for column, order in (('Month', MONTH_ORDER), ('DayName', DAY_ORDER), ('Period', PERIOD_ORDER)):
+        if column in enriched.columns:
+            enriched[column] = pd.Categorical(enriched[column], categories=order, ordered=True)
+    return enriched
+
+
+@profiling.traced()
+def messages_to_arrow(enriched_df, metadata=None):
+    """Convert an enriched message frame to a pyarrow Table with schema metadata"""
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("Parquet / Arrow export requires pyarrow: pip install pyarrow") from e
+
+    table = pa.Table.from_pandas(enriched_df.reset_index(drop=True), preserve_index=False)
+    info = {
+        'generator': 'WhatsApp Chat Analyzer',
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'rows': len(enriched_df),
+        'derived_columns': {c: d for c, d in ENRICHED_COLUMNS.items() if c in enriched_df.columns},
+    }
+    info.update(metadata or {})
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[b'whatsapp_chat_analyzer'] = json.dumps(info, default=str).encode('utf-8')
+    return table.replace_schema_metadata(schema_metadata)
+
+
+@profiling.traced()
+def export_messages_parquet(enriched_df, metadata=None, compression='zstd'):
+    """Export the enriched message table as Parquet (dictionary-encoded, compressed)"""
+    import pyarrow.parquet as pq
+
+    table = messages_to_arrow(enriched_df, metadata)
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression=compression, use_dictionary=True)
+    return buffer.getvalue()
+
+
+@profiling.traced()
+def export_messages_arrow(enriched_df, metadata=None, compression='zstd'):
+    """Export the enriched message table as an Arrow IPC file (Feather v2)"""
+    import pyarrow as pa
+
+    table = messages_to_arrow(enriched_df, metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=compression)) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
 
 
 # =========================
 # 📄 PDF Export Functions
 # =========================
 
+@profiling.traced()
 def export_statistics_pdf(selected_user, num_messages, words, num_media_messages, 
                           num_links, date_range=None):
     """Export basic statistics to PDF format"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib.enums import TA_CENTER
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter)
     story = []
@@ -146,10 +361,28 @@ def export_statistics_pdf(selected_user, num_messages, words, num_media_messages
     return buffer.getvalue()
 
 
+@profiling.traced()
 def export_complete_analysis_pdf(selected_user, stats_dict, date_range=None,
                                   common_words_df=None, emoji_df=None, 
-                                  busy_users_df=None, charts=None):
-    """Export complete analysis to PDF with tables and charts"""
+                                  busy_users_df=None, charts=None, profile='standard',
+                                  max_workers=None):
+    """Export complete analysis to PDF with tables and charts.
+
+    Charts are rasterized to in-memory PNGs in a thread pool while the rest of
+    the document is assembled; ``profile`` picks an EXPORT_PROFILES preset.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib.enums import TA_CENTER
+    import matplotlib.pyplot as plt
+
+    pool = _chart_pool(max_workers)
+    chart_futures = {name: pool.submit(profiling.propagate(rasterize_figure), fig, profile)
+                     for name, fig in (charts or {}).items()}
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     story = []
@@ -200,9 +433,6 @@ def export_complete_analysis_pdf(selected_user, stats_dict, date_range=None,
     story.append(stats_table)
     story.append(Spacer(1, 30))
     
-    # Initialize temp files list for cleanup
-    temp_files = []
-    
     # === Common Words Section ===
     if common_words_df is not None and not common_words_df.empty:
         story.append(Paragraph("Most Common Words (Top 10)", styles['Heading2']))
@@ -314,24 +544,18 @@ def export_complete_analysis_pdf(selected_user, stats_dict, date_range=None,
                 cell.set_edgecolor('black')
                 cell.set_linewidth(1)
             
-            plt.tight_layout()
+            fig.tight_layout()
             
-            # Save to temp file
-            tmp = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-            tmp_path = tmp.name
-            tmp.close()
-            fig.savefig(tmp_path, format='png', dpi=150, bbox_inches='tight', 
-                       facecolor='white', edgecolor='none')
+            # Rasterize in memory (emoji table is rendered at 3/4 of the chart DPI)
+            emoji_png = pool.submit(profiling.propagate(rasterize_figure), fig, profile,
+                                    int(EXPORT_PROFILES[profile]['dpi'] * 0.75)).result()
             plt.close(fig)
             
             # Add to PDF
-            img = Image(tmp_path, width=4*inch, height=(num_emojis * 0.4 + 0.6)*inch)
+            img = Image(emoji_png, width=4*inch, height=(num_emojis * 0.4 + 0.6)*inch)
             story.append(img)
             story.append(Spacer(1, 20))
             
-            # Track temp file for cleanup
-            temp_files.append(tmp_path)
-            
         except Exception as e:
             print(f"Error creating emoji table image: {e}")
             import traceback
@@ -388,18 +612,10 @@ def export_complete_analysis_pdf(selected_user, stats_dict, date_range=None,
         story.append(Spacer(1, 20))
         
         chart_count = 0
-        for chart_name, fig in charts.items():
+        for chart_name, future in chart_futures.items():
             try:
-                # Save figure to temporary file with high quality
-                # Use delete=False to keep the file until after PDF is built
-                tmp = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-                tmp_path = tmp.name
-                tmp.close()  # Close but don't delete
-                
-                # Save the figure
-                fig.savefig(tmp_path, format='png', dpi=200, bbox_inches='tight', 
-                           facecolor='white', edgecolor='none')
-                temp_files.append(tmp_path)  # Track for cleanup
+                # Wait for the pooled rasterization of this chart
+                png = future.result()
                 
                 # Add chart title
                 chart_title_style = ParagraphStyle(
@@ -414,11 +630,11 @@ def export_complete_analysis_pdf(selected_user, stats_dict, date_range=None,
                 
                 # Add chart image - adjust size based on chart type
                 if 'Heatmap' in chart_name:
-                    img = Image(tmp_path, width=6.5*inch, height=4*inch)
+                    img = Image(png, width=6.5*inch, height=4*inch)
                 elif 'Word Cloud' in chart_name:
-                    img = Image(tmp_path, width=6*inch, height=4*inch)
+                    img = Image(png, width=6*inch, height=4*inch)
                 else:
-                    img = Image(tmp_path, width=6.5*inch, height=3*inch)
+                    img = Image(png, width=6.5*inch, height=3*inch)
                 
                 story.append(img)
                 story.append(Spacer(1, 15))
@@ -449,15 +665,10 @@ def export_complete_analysis_pdf(selected_user, stats_dict, date_range=None,
     story.append(Paragraph("Generated by WhatsApp Chat Analyzer", footer_style))
     
     # Build the PDF
-    doc.build(story)
-    
-    # Clean up temp files AFTER PDF is built
-    for tmp_path in temp_files:
-        try:
-            if os.path.exists(tmp_path):
-                os.unlink(tmp_path)
-        except Exception as e:
-            print(f"Warning: Could not delete temp file {tmp_path}: {e}")
+    try:
+        doc.build(story)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
     
     buffer.seek(0)
     return buffer.getvalue()
@@ -0,0 +1,206 @@
+"""
+===========================================================
+📦 export_manager.py — On-demand Export Artifacts
+===========================================================
+
+Builds export files (CSV, Excel, PDF, Word, ...) only when a user asks
+for them, on a background thread pool, and keeps the finished bytes
+cached by content key so page reruns never rebuild them.
+
+Content keys should capture everything the artifact depends on, e.g.
+(chat digest, selected_user, artifact name, options).
+
+Given a jobs.JobExecutor, builds run there instead of on a private pool,
+so exports count against the server-wide cap on CPU-heavy jobs. Given a
+result cache (charts.FigureCache), finished bytes are kept there, within
+its byte budget, instead of in the manager; an evicted artifact simply
+goes back to "idle" and is built again on request.
+===========================================================
+"""
+
+import functools
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+import profiling
+
+
+# Formats that are already compressed are stored in bundles as-is.
+PRECOMPRESSED = (".xlsx", ".docx", ".pdf", ".parquet", ".arrow", ".gz", ".zip", ".png")
+
+IDLE = "idle"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+_artifact_locks = weakref.WeakKeyDictionary()
+_artifact_locks_guard = threading.Lock()
+
+
+def _artifact_lock(artifact):
+    # a file artifact is shared by every session, and reading it moves its position
+    with _artifact_locks_guard:
+        lock = _artifact_locks.get(artifact)
+        if lock is None:
+            lock = _artifact_locks[artifact] = threading.Lock()
+        return lock
+
+
+def read_artifact(artifact) -> bytes:
+    """The bytes of a finished artifact: bytes as they are, a file (e.g. a bundle's spool) read from its start."""
+    if isinstance(artifact, (bytes, bytearray)):
+        return artifact
+    with _artifact_lock(artifact):
+        artifact.seek(0)
+        return artifact.read()
+
+
+def copy_artifact(artifact, dest):
+    """Write a finished artifact (bytes or a file) to a binary file, in chunks for files."""
+    if isinstance(artifact, (bytes, bytearray)):
+        dest.write(artifact)
+        return
+    with _artifact_lock(artifact):
+        artifact.seek(0)
+        shutil.copyfileobj(artifact, dest)
+
+
+class ExportManager:
+    """Thread-pooled artifact builder with an LRU of finished results."""
+
+    def __init__(self, max_workers: int = 2, max_artifacts: int = 32, executor=None, cache=None):
+        self.max_artifacts = max_artifacts
+        self.cache = cache
+        self._jobs = executor
+        self._executor = None if executor else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._futures = OrderedDict()  # key -> Future
+        self._lock = threading.Lock()
+
+    def submit(self, key, builder, heavy: bool = True) -> Future:
+        """Starts building `key` unless it is already built or in progress.
+        Pass heavy=False for builders that mostly wait on other work (e.g. bundles)."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._futures.move_to_end(key)
+                return future
+            future = self._start(key, builder, heavy)
+            self._futures[key] = future
+            self._evict()
+            return future
+
+    def _start(self, key, builder, heavy=True) -> Future:
+        builder = self._storing(key, builder)
+        if self._jobs is None:
+            return self._executor.submit(profiling.propagate(builder))
+        job_key = ("export",) + tuple(key)
+        # a finished job for this key means its artifact was evicted (or the build failed): run it again
+        self._jobs.forget(job_key)
+        return self._jobs.submit(job_key, lambda job: builder(), heavy=heavy).future
+
+    def _storing(self, key, builder):
+        # with a cache the artifact goes there and the build's future resolves to None
+        return builder if self.cache is None else functools.partial(self._build_into_cache, key, builder)
+
+    def _build_into_cache(self, key, builder):
+        self.cache.put(("export",) + tuple(key), builder())
+
+    def _evict(self):
+        # Drop the oldest finished artifacts; never drop ones still building.
+        excess = len(self._futures) - self.max_artifacts
+        for key in list(self._futures):
+            if excess <= 0:
+                break
+            if self._futures[key].done():
+                del self._futures[key]
+                excess -= 1
+
+    def get(self, key) -> Future | None:
+        with self._lock:
+            return self._futures.get(key)
+
+    def status(self, key) -> str:
+        future = self.get(key)
+        if future is None:
+            return IDLE
+        if not future.done():
+            return RUNNING
+        if future.exception() is not None:
+            return FAILED
+        if self.cache is not None and self.result(key) is None:  # evicted from the cache
+            self.discard(key)
+            return IDLE
+        return READY
+
+    def result(self, key) -> bytes:
+        if self.cache is not None:
+            return self.cache.get(("export",) + tuple(key))
+        return self._futures[key].result()
+
+    def error(self, key) -> BaseException | None:
+        future = self.get(key)
+        return future.exception() if future is not None and future.done() else None
+
+    def discard(self, key):
+        with self._lock:
+            self._futures.pop(key, None)
+
+    def build_bundle(self, entries, max_workers: int | None = None):
+        """
+        Builds several artifacts concurrently and streams them into one ZIP.
+
+        entries is a list of (file name in archive, content key, builder).
+        Artifacts already built or building under the same key are reused;
+        the rest are submitted like single exports (heavy jobs on the
+        JobExecutor, or a dedicated pool without one, so a bundle never waits
+        on its own manager's workers) and cached for later single downloads.
+        Each file is written as soon as it finishes; failures are listed in
+        ERRORS.txt. Returns a file-like object at position 0.
+        """
+        pool = None
+        if self._jobs is None:
+            pool = ThreadPoolExecutor(max_workers=max_workers or max(1, len(entries)), thread_name_prefix="bundle")
+        pending = {}
+        with self._lock:
+            for arcname, key, builder in entries:
+                future = self._futures.get(key)
+                if future is None or (future.done() and future.exception() is not None):
+                    future = (self._start(key, builder) if pool is None
+                              else pool.submit(profiling.propagate(self._storing(key, builder))))
+                    self._futures[key] = future
+                pending.setdefault(future, []).append((arcname, key, builder))
+            self._evict()
+
+        errors = []
+        spool = tempfile.SpooledTemporaryFile(max_size=64 * 1024 * 1024, mode="w+b")
+        try:
+            with zipfile.ZipFile(spool, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for future in as_completed(pending):
+                    for arcname, key, builder in pending[future]:
+                        try:
+                            data = future.result()
+                            if self.cache is not None:
+                                data = self.result(key)
+                                if data is None:  # already evicted again: build it here
+                                    data = builder()
+                        except Exception as e:
+                            errors.append(f"{arcname}: {e}")
+                            continue
+                        compress = zipfile.ZIP_STORED if arcname.lower().endswith(PRECOMPRESSED) else zipfile.ZIP_DEFLATED
+                        info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+                        info.compress_type = compress
+                        with archive.open(info, "w") as dest:
+                            copy_artifact(data, dest)
+                if errors:
+                    archive.writestr("ERRORS.txt", "\n".join(errors) + "\n")
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False)
+        spool.seek(0)
+        return spool
@@ -13,50 +13,64 @@ Dependencies:
 
 import io
 import pandas as pd
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet
-from docx import Document
+from export_helper import stream_csv, stream_ndjson, stream_excel
 from datetime import datetime
+import profiling
+
+# reportlab and python-docx are imported inside the exporters that need them.
 
 
 # ==============================
 # 1️⃣ CSV EXPORT
 # ==============================
-def export_sentiment_csv(sentiment_df: pd.DataFrame) -> bytes:
-    csv_data = sentiment_df.to_csv(index=False).encode("utf-8")
-    return csv_data
+@profiling.traced()
+def export_sentiment_csv(sentiment_df: pd.DataFrame):
+    """Plain CSV of the scored messages, written in chunks; returns a file-like object."""
+    return stream_sentiment_csv(sentiment_df, compress=False)
+
+
+@profiling.traced()
+def stream_sentiment_csv(sentiment_df: pd.DataFrame, compress: bool = True):
+    """Chunked (gzip) CSV of the scored messages as a file-like object."""
+    return stream_csv(sentiment_df, compress=compress)
+
+
+@profiling.traced()
+def stream_sentiment_ndjson(sentiment_df: pd.DataFrame, compress: bool = True):
+    """Chunked (gzip) NDJSON of the scored messages as a file-like object."""
+    return stream_ndjson(sentiment_df, compress=compress)
 
 
 # ==============================
 # 2️⃣ EXCEL EXPORT
 # ==============================
-def export_sentiment_excel(sentiment_summary: dict, sentiment_df: pd.DataFrame) -> bytes:
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        # Summary Sheet
-        summary_df = pd.DataFrame({
-            "Metric": ["Positive", "Neutral", "Negative", "Average Sentiment"],
-            "Value": [
-                sentiment_summary["positive"],
-                sentiment_summary["neutral"],
-                sentiment_summary["negative"],
-                round(sentiment_summary["avg_sentiment"], 3)
-            ]
-        })
-        summary_df.to_excel(writer, index=False, sheet_name="Summary")
-
-        # Messages Sheet
-        sentiment_df.to_excel(writer, index=False, sheet_name="Messages")
-    output.seek(0)
-    return output.getvalue()
+@profiling.traced()
+def export_sentiment_excel(sentiment_summary: dict, sentiment_df: pd.DataFrame):
+    """Summary + Messages workbook written in constant-memory mode; returns a file-like object."""
+    # Summary Sheet
+    summary_df = pd.DataFrame({
+        "Metric": ["Positive", "Neutral", "Negative", "Average Sentiment"],
+        "Value": [
+            sentiment_summary["positive"],
+            sentiment_summary["neutral"],
+            sentiment_summary["negative"],
+            round(sentiment_summary["avg_sentiment"], 3)
+        ]
+    })
+    # Messages Sheet streams row chunks
+    return stream_excel({"Summary": summary_df, "Messages": sentiment_df})
 
 
 # ==============================
 # 3️⃣ PDF EXPORT
 # ==============================
+@profiling.traced()
 def export_sentiment_pdf(selected_user: str, sentiment_summary: dict, sentiment_df: pd.DataFrame) -> bytes:
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4)
     styles = getSampleStyleSheet()
@@ -99,7 +113,10 @@ def export_sentiment_pdf(selected_user: str, sentiment_summary: dict, sentiment_
 # ==============================
 # 4️⃣ WORD EXPORT
 # ==============================
+@profiling.traced()
 def export_sentiment_word(selected_user: str, sentiment_summary: dict, sentiment_df: pd.DataFrame) -> bytes:
+    from docx import Document
+
     doc = Document()
     doc.add_heading("WhatsApp Sentiment Analysis Report", level=1)
     doc.add_paragraph(f"User: {selected_user}")
@@ -1,42 +1,130 @@
-from urlextract import URLExtract
-import matplotlib.pyplot as plt
-import seaborn as sns
-from wordcloud import WordCloud
 import pandas as pd
 from collections import Counter
+from functools import lru_cache
 import emoji
-
-extractor = URLExtract()  # Object for URL extraction
-from pyvis.network import Network
 import tempfile
 import os
+import profiling
+import polars_backend
+
+# urlextract, wordcloud, pyvis, seaborn and matplotlib are imported inside the
+# functions that use them, so importing this module stays cheap (see warmup.py).
+# Functions marked @polars_backend.dispatch run on Polars when that backend is
+# selected (see polars_backend.py); the pandas code below is the reference.
+
+PERIOD_ORDER = [
+    "00-1", "1-2", "2-3", "3-4", "4-5", "5-6", "6-7", "7-8", "8-9", "9-10",
+    "10-11", "11-12", "12-13", "13-14", "14-15", "15-16", "16-17",
+    "17-18", "18-19", "19-20", "20-21", "21-22", "22-23", "23-00"
+]
+
+
+def read_stop_words(warning="⚠️ stop_hinglish.txt not found. Proceeding without stop words."):
+    """Raw text of stop_hinglish.txt ("" and a printed warning when it is missing)."""
+    try:
+        with open('stop_hinglish.txt', 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        print(warning)
+        return ""
+
+
+@lru_cache(maxsize=None)
+def get_url_extractor():
+    """Shared URLExtract instance, built on first use (loads its TLD list)."""
+    from urlextract import URLExtract
+    return URLExtract()
+
+
+# =========================
+# 🗂️ Chat Filter (multi-chat workspaces)
+# =========================
+def filter_chats(df, chats=None):
+    """
+    Rows of the given chat(s) of a combined workspace frame (see workspace.py).
+    `chats` is one chat_id or a list; None, or a frame without chat_id, keeps every row.
+    """
+    if chats is None or 'chat_id' not in df.columns:
+        return df
+    if isinstance(chats, str):
+        chats = [chats]
+    return df[df['chat_id'].isin(list(chats))]
+
+# =========================
+# 🔗 Interaction Matrix
+# =========================
+@profiling.traced()
+def interaction_matrix(selected_user, df, chats=None):
+    """
+    Sender x Sender table of conversational hand-offs: how often two users
+    posted back-to-back (in either order). Symmetric, zero diagonal.
+    For a single user only the pairs involving that user are kept.
+    In a multi-chat frame, hand-offs never cross from one chat into the next.
+    """
+    df = filter_chats(df, chats)
+    if 'Sender' not in df.columns or len(df) < 2:
+        return pd.DataFrame()
+
+    senders = df['Sender'].astype(str).to_numpy()
+    prev, curr = senders[:-1], senders[1:]
+    changed = prev != curr
+    if 'chat_id' in df.columns:
+        chat_codes = df['chat_id'].cat.codes.to_numpy()
+        changed &= chat_codes[:-1] == chat_codes[1:]
+    if not changed.any():
+        return pd.DataFrame()
+
+    directed = pd.crosstab(prev[changed], curr[changed])
+    users = sorted(set(directed.index) | set(directed.columns))
+    directed = directed.reindex(index=users, columns=users, fill_value=0)
+    matrix = directed + directed.T
+    matrix.index.name = matrix.columns.name = 'Sender'
+
+    if selected_user != 'Overall':
+        if selected_user not in matrix.index:
+            return pd.DataFrame()
+        partners = matrix.index[matrix.loc[selected_user] > 0].tolist()
+        if not partners:
+            return pd.DataFrame()
+        keep = [selected_user] + partners
+        matrix = matrix.loc[keep, keep].copy()
+        others = matrix.index != selected_user
+        matrix.loc[others, others] = 0
+
+    return matrix
 
-def create_interaction_graph(selected_user, df, dynamic=True):
+
+@profiling.traced()
+def create_interaction_graph(selected_user, df, dynamic=True, matrix=None, chats=None):
     """
     Build an interactive PyVis network of user interactions.
     Each node = user; edge = frequency of interaction.
     Thicker edges mean stronger message connections.
+    Pass a precomputed interaction_matrix() to skip recounting.
     """
+    df = filter_chats(df, chats)
     if 'Sender' not in df.columns or len(df) < 5:
         return None
 
-    if selected_user != "Overall":
-        df = df[df['Sender'] == selected_user]
-
-    df = df.reset_index(drop=True)
+    if matrix is None:
+        matrix = interaction_matrix(selected_user, df)
+    if matrix.empty:
+        return None
 
-    # 🧮 Count consecutive sender pairs
+    # 🧮 Pair counts from the upper triangle of the (symmetric) matrix
+    users = matrix.index.tolist()
     interactions = {}
-    for i in range(1, len(df)):
-        s1, s2 = df.loc[i - 1, "Sender"], df.loc[i, "Sender"]
-        if s1 != s2:
-            key = tuple(sorted([s1, s2]))
-            interactions[key] = interactions.get(key, 0) + 1
+    for i, s1 in enumerate(users):
+        for s2 in users[i + 1:]:
+            count = int(matrix.at[s1, s2])
+            if count:
+                interactions[(s1, s2)] = count
 
     if not interactions:
         return None
 
     # 🎨 Create PyVis network
+    from pyvis.network import Network
     net = Network(height="700px", width="100%", bgcolor="#0a0a0a", font_color="white", directed=False, notebook=False)
 
     # ✨ Physics (controls movement and layout)
@@ -72,8 +160,8 @@ def create_interaction_graph(selected_user, df, dynamic=True):
     net.set_options(physics_options)
 
     # 🧩 Add user nodes
-    unique_users = df["Sender"].unique().tolist()
-    msg_counts = {u: df[df["Sender"] == u].shape[0] for u in unique_users}
+    unique_users = users
+    msg_counts = df["Sender"].value_counts().to_dict()
     for user in unique_users:
         color = f"hsl({hash(user) % 360}, 70%, 60%)"
         size = 15 + (msg_counts[user] ** 0.5) * 3
@@ -157,9 +245,10 @@ def create_interaction_graph(selected_user, df, dynamic=True):
 # =========================
 # 📊 Basic Chat Statistics
 # =========================
-def fetch_stats(selected_user, df):
-    df.columns = df.columns.str.strip()
-
+@profiling.traced()
+@polars_backend.dispatch
+def fetch_stats(selected_user, df, chats=None):
+    df = filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
@@ -172,9 +261,10 @@ def fetch_stats(selected_user, df):
         words.extend(str(message).split())
 
     # Media messages
-    num_media_messages = df[df['Message'] == '<Media omitted>'].shape[0]
+    num_media_messages = df[df['Type'] == 'media'].shape[0]
 
     # Links shared
+    extractor = get_url_extractor()
     links = []
     for message in df['Message']:
         links.extend(extractor.find_urls(str(message)))
@@ -185,7 +275,10 @@ def fetch_stats(selected_user, df):
 # =========================
 # 👥 Most Busy Users
 # =========================
-def most_busy_users(df):
+@profiling.traced()
+@polars_backend.dispatch
+def most_busy_users(df, chats=None):
+    df = filter_chats(df, chats)
     x = df['Sender'].value_counts().head()
 
     percentage_df = (
@@ -200,26 +293,22 @@ def most_busy_users(df):
 # =========================
 # ☁️ Word Cloud Generation
 # =========================
-def create_wordcloud(selected_user, df):
-    import re
-
+@profiling.traced()
+@polars_backend.dispatch
+def wordcloud_text(selected_user, df, chats=None):
+    """Non-media messages, lower-cased without stop words, joined into one text (None if there are none)."""
     # Load stop words safely
-    try:
-        with open('stop_hinglish.txt', 'r', encoding='utf-8') as f:
-            stop_words = f.read().split()
-    except FileNotFoundError:
-        print("⚠️ Warning: stop_hinglish.txt not found. Proceeding without stop words.")
-        stop_words = []
+    stop_words = read_stop_words("⚠️ Warning: stop_hinglish.txt not found. Proceeding without stop words.").split()
 
-    # Filter by user
+    # Filter by chat / user
+    df = filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
     # Remove media messages
-    temp = df[df['Message'] != '<Media omitted>'].copy()
+    temp = df[df['Type'] != 'media'].copy()
 
     if temp.empty:
-        print("⚠️ No messages available for WordCloud generation.")
         return None
 
     # Stop word removal
@@ -233,7 +322,18 @@ def create_wordcloud(selected_user, df):
     temp['Message'] = temp['Message'].apply(remove_stop_words)
 
     # Combine all messages
-    final_text = temp['Message'].str.cat(sep=" ").strip()
+    return temp['Message'].str.cat(sep=" ").strip()
+
+
+@profiling.traced()
+def create_wordcloud(selected_user, df, chats=None):
+    import re
+
+    final_text = wordcloud_text(selected_user, df, chats)
+    if final_text is None:
+        print("⚠️ No messages available for WordCloud generation.")
+        return None
+
     # Keep only English letters, numbers, and spaces
     final_text = re.sub(r'[^A-Za-z0-9\s]', '', final_text)
 
@@ -244,6 +344,7 @@ def create_wordcloud(selected_user, df):
 
     # Generate WordCloud with default font (no boxes, cross-platform)
     try:
+        from wordcloud import WordCloud
         wordcloud = WordCloud(
             width=800,
             height=400,
@@ -259,18 +360,16 @@ def create_wordcloud(selected_user, df):
 # =========================
 # 🧾 Most Common Words
 # =========================
-def most_common_words(selected_user, df):
-    try:
-        with open('stop_hinglish.txt', 'r', encoding='utf-8') as f:
-            stop_words = f.read()
-    except FileNotFoundError:
-        print("⚠️ stop_hinglish.txt not found. Proceeding without stop words.")
-        stop_words = []
+@profiling.traced()
+@polars_backend.dispatch
+def most_common_words(selected_user, df, chats=None):
+    stop_words = read_stop_words()  # matched as text: words contained in the file are dropped
 
+    df = filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
-    temp = df[df['Message'] != '<Media omitted>']
+    temp = df[df['Type'] != 'media']
 
     if temp.empty:
         return pd.DataFrame(columns=['Word', 'Frequency'])
@@ -292,7 +391,10 @@ def most_common_words(selected_user, df):
 # =========================
 # 😀 Emoji Analysis
 # =========================
-def emoji_helper(selected_user, df):
+@profiling.traced()
+@polars_backend.dispatch
+def emoji_helper(selected_user, df, chats=None):
+    df = filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
@@ -313,7 +415,10 @@ def emoji_helper(selected_user, df):
 # =========================
 # 📆 Monthly Timeline
 # =========================
-def monthly_timeline(selected_user, df):
+@profiling.traced()
+@polars_backend.dispatch
+def monthly_timeline(selected_user, df, chats=None):
+    df = filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
@@ -328,7 +433,10 @@ def monthly_timeline(selected_user, df):
 # =========================
 # 🗓️ Daily Timeline
 # =========================
-def daily_timeline(selected_user, df):
+@profiling.traced()
+@polars_backend.dispatch
+def daily_timeline(selected_user, df, chats=None):
+    df = filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
@@ -341,7 +449,10 @@ def daily_timeline(selected_user, df):
 # =========================
 # 🗺️ Activity Maps
 # =========================
-def week_activity_map(selected_user, df):
+@profiling.traced()
+@polars_backend.dispatch
+def week_activity_map(selected_user, df, chats=None):
+    df = filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
@@ -351,7 +462,10 @@ def week_activity_map(selected_user, df):
     return df['DayName'].value_counts()
 
 
-def month_activity_map(selected_user, df):
+@profiling.traced()
+@polars_backend.dispatch
+def month_activity_map(selected_user, df, chats=None):
+    df = filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
@@ -364,7 +478,10 @@ def month_activity_map(selected_user, df):
 # =========================
 # 🔥 Activity Heatmap
 # =========================
-def activity_heatmap(selected_user, df):
+@profiling.traced()
+@polars_backend.dispatch
+def activity_heatmap(selected_user, df, chats=None):
+    df = filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
@@ -372,17 +489,11 @@ def activity_heatmap(selected_user, df):
         print("⚠️ Warning: 'Period' column not found for heatmap.")
         return pd.DataFrame()
 
-    period_order = [
-        "00-1", "1-2", "2-3", "3-4", "4-5", "5-6", "6-7", "7-8", "8-9", "9-10",
-        "10-11", "11-12", "12-13", "13-14", "14-15", "15-16", "16-17",
-        "17-18", "18-19", "19-20", "20-21", "21-22", "22-23", "23-00"
-    ]
-
     try:
         pivot_table = (
             df.pivot_table(index='DayName', columns='Period', values='Message', aggfunc='count')
             .fillna(0)
-            .reindex(columns=period_order, fill_value=0)
+            .reindex(columns=PERIOD_ORDER, fill_value=0)
         )
         return pivot_table
     except Exception as e:
@@ -392,76 +503,19 @@ def activity_heatmap(selected_user, df):
 # =========================
 # 😊 Emoji Usage Bar Chart
 # =========================
-def create_emoji_bar_chart(selected_user, df):
-    import pandas as pd
-    import seaborn as sns
-    import matplotlib.pyplot as plt
-    import streamlit as st
-    from collections import Counter
-    import emoji
-    import matplotlib.font_manager as fm
-    import os
-    import platform
-
-    # Filter by user if not Overall
-    if selected_user != 'Overall':
-        df = df[df['Sender'] == selected_user]
-
-    # --- Extract emojis ---
-    def extract_emojis(text):
-        if not isinstance(text, str):
-            return []
-        return [ch for ch in text if ch in emoji.EMOJI_DATA]
-
-    all_emojis = []
-    for msg in df['Message']:
-        all_emojis.extend(extract_emojis(msg))
-
-    if not all_emojis:
-        st.warning("No emojis detected 😅")
-        return
-
-    emoji_counts = Counter(all_emojis).most_common(10)
-    emoji_df = pd.DataFrame(emoji_counts, columns=['emoji', 'count'])
-
-    # --- Load a system font that supports emojis ---
-    prop = None
-    try:
-        system = platform.system()
-        if system == 'Windows':
-            font_path = "C:\\Windows\\Fonts\\seguiemj.ttf"
-        elif system == 'Darwin':  # macOS
-            font_path = "/System/Library/Fonts/Apple Color Emoji.ttc"
-        else:  # Linux
-            font_path = "/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf"
-        
-        if os.path.exists(font_path):
-            prop = fm.FontProperties(fname=font_path)
-            plt.rcParams['font.family'] = prop.get_name()
-    except Exception as e:
-        st.warning("Emoji font not found, using default font.")
-
-    # --- Plot ---
-    fig, ax = plt.subplots(figsize=(8, 4))
-    sns.barplot(data=emoji_df, x='emoji', y='count', palette='viridis', ax=ax)
-
-    # Make x-axis emojis large and clear
-    if prop is not None:
-        ax.set_xticklabels(emoji_df['emoji'], fontproperties=prop, fontsize=22)
-    else:
-        ax.set_xticklabels(emoji_df['emoji'], fontsize=22)
-    ax.set_title("Top 10 Emojis Used", fontsize=14)
-    ax.set_xlabel("Emoji", fontsize=12)
-    ax.set_ylabel("Count", fontsize=12)
-    
-    plt.tight_layout()
-    st.pyplot(fig)
+def create_emoji_bar_chart(selected_user, df, chats=None):
+    """Emoji usage bar chart as a Matplotlib figure, or None when no emojis are found."""
+    fig = generate_emoji_bar_chart_figure(selected_user, df, chats=chats)
+    if fig is None:
+        print("⚠️ No emojis detected 😅")
+    return fig
 
 
 # =========================
 # 😊 Generate Emoji Bar Chart Figure (for PDF export)
 # =========================
-def generate_emoji_bar_chart_figure(selected_user, df):
+@profiling.traced()
+def generate_emoji_bar_chart_figure(selected_user, df, chats=None):
     """Generate emoji bar chart figure without displaying it (for PDF export)"""
     import pandas as pd
     import seaborn as sns
@@ -472,7 +526,8 @@ def generate_emoji_bar_chart_figure(selected_user, df):
     import os
     import platform
 
-    # Filter by user if not Overall
+    # Filter by chat / user
+    df = filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
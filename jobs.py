@@ -0,0 +1,220 @@
+"""
+===========================================================
+⏱️ jobs.py — Background Job Executor
+===========================================================
+
+One executor per server process runs analysis and export work off the
+Streamlit script thread:
+
+    - jobs are keyed by content, so sessions asking for the same work
+      share one run and one result
+    - a job function receives its Job and calls job.report(fraction,
+      message) to publish progress; report() raises JobCancelled once
+      the job is cancelled, so long work stops at the next checkpoint
+    - submitting under a group (e.g. session + page section) supersedes
+      that group's previous job, which is cancelled if nobody else wants it
+    - "heavy" (CPU-bound) jobs share a fixed number of slots per server;
+      other jobs (e.g. an export bundle waiting on its heavy parts) run on
+      their own threads, so they never hold one a heavy job needs
+===========================================================
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import profiling
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function when its job was cancelled or superseded."""
+
+
+# ==============================
+# 🧾 Job
+# ==============================
+class Job:
+    """One unit of background work, with progress and cooperative cancellation."""
+
+    def __init__(self, key, fn, heavy=True):
+        self.key = key
+        self.fn = fn
+        self.heavy = heavy
+        self.groups = set()
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.future = Future()  # resolves with the result; for code that expects futures
+        self._cancel = threading.Event()
+
+    def report(self, fraction=None, message=None):
+        """Publish progress (0..1) and/or a status message; raises JobCancelled if cancelled."""
+        if self._cancel.is_set():
+            raise JobCancelled(f"job {self.key!r} was cancelled")
+        if fraction is not None:
+            self.progress = min(1.0, max(0.0, float(fraction)))
+        if message is not None:
+            self.message = message
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def wait(self, timeout=None) -> bool:
+        try:
+            self.future.exception(timeout)
+        except Exception:
+            pass
+        return self.done()
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+# ==============================
+# 🏭 Executor
+# ==============================
+class JobExecutor:
+    """Thread pool for keyed background jobs with a server-wide cap on heavy jobs."""
+
+    def __init__(self, max_workers: int = 8, max_heavy: int | None = None, max_jobs: int = 128):
+        self.max_heavy = max_heavy or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._light_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-light")
+        self._heavy = threading.BoundedSemaphore(self.max_heavy)
+        self._jobs = OrderedDict()  # key -> Job
+        self._groups = {}  # group -> key of the group's current job
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, group=None, heavy=True) -> Job:
+        """Runs fn(job) in the background unless the same key is already queued, running or done."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job.status in (FAILED, CANCELLED) or (job.cancelled and not job.done()):
+                job = Job(key, fn, heavy)
+                self._jobs[key] = job
+                # spans recorded by the job go to the profiler of the request that started it
+                (self._pool if heavy else self._light_pool).submit(profiling.propagate(self._run), job)
+                self._evict()
+            else:
+                self._jobs.move_to_end(key)
+
+            if group is not None:
+                previous = self._groups.get(group)
+                if previous is not None and previous != key:
+                    self._release(group, previous)
+                self._groups[group] = key
+                job.groups.add(group)
+            return job
+
+    def _release(self, group, key):
+        # the group moved on: cancel the old job unless another group still waits on it
+        job = self._jobs.get(key)
+        if job is None:
+            return
+        job.groups.discard(group)
+        if not job.groups and not job.done():
+            job.cancel()
+
+    def _evict(self):
+        excess = len(self._jobs) - self.max_jobs
+        for key in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[key].done():
+                del self._jobs[key]
+                excess -= 1
+
+    def _run(self, job):
+        if job.heavy:
+            while not self._heavy.acquire(timeout=0.2):
+                if job.cancelled:
+                    return self._finish(job, CANCELLED)
+        try:
+            if job.cancelled:
+                return self._finish(job, CANCELLED)
+            job.status = RUNNING
+            job.started = time.time()
+            try:
+                result = job.fn(job)
+            except JobCancelled:
+                self._finish(job, CANCELLED)
+            except BaseException as e:
+                job.error = e
+                self._finish(job, FAILED)
+            else:
+                job.result = result
+                job.progress = 1.0
+                self._finish(job, DONE)
+        finally:
+            if job.heavy:
+                self._heavy.release()
+
+    def _finish(self, job, status):
+        job.finished = time.time()
+        job.status = status
+        if status == DONE:
+            job.future.set_result(job.result)
+        elif status == FAILED:
+            job.future.set_exception(job.error)
+        else:
+            job.future.set_exception(JobCancelled(f"job {job.key!r} was cancelled"))
+
+    def get(self, key) -> Job | None:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def forget(self, key):
+        """Drop a finished job, so the next submit() of its key runs it again (e.g. its result was evicted)."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.done():
+                del self._jobs[key]
+
+    def cancel(self, key):
+        job = self.get(key)
+        if job is not None:
+            job.cancel()
+
+    def release(self, group):
+        """Forget a group (e.g. a closed session), cancelling work only it was waiting on."""
+        with self._lock:
+            key = self._groups.pop(group, None)
+            if key is not None:
+                self._release(group, key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+        for job in jobs:
+            counts[job.status] += 1
+        counts["heavy_running"] = sum(job.heavy and job.status == RUNNING for job in jobs)
+        counts["max_heavy"] = self.max_heavy
+        return counts
@@ -0,0 +1,345 @@
+"""
+===========================================================
+🏋️ loadtest.py — Concurrent Session Load Test
+===========================================================
+
+Drives app.py with Streamlit's headless AppTest for N concurrent
+simulated analysts, each working through the upload, Generate Analysis
+(every tab), export, sentiment and interaction-graph flows on a seeded
+synthetic chat (see synthetic_chat.py). Fully offline, one process, so
+the shared caches and the job executor behave as on a real server.
+
+Reports p50/p95/max rerun latency (overall and per step), reruns/s,
+sessions/min and RSS growth, printed and written as JSON.
+
+Usage:
+    python loadtest.py --sessions 8 --messages 20000 --chats 2 --out loadtest.json
+    python loadtest.py --sessions 4 --flows upload,analysis --iterations 3
+
+AppTest cannot drive st.file_uploader, so the harness patches it to
+return the session's synthetic chat.
+===========================================================
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+FLOWS = ("upload", "analysis", "export", "sentiment", "interaction")
+ANALYSIS_TABS = ["🗺️ Activity", "💬 Words & Emojis", "🏆 Users", "📦 Export"]
+SENTIMENT_TABS = ["📈 Over Time", "🏅 Extremes"]
+CHAT_KEY = "_loadtest_chat"
+
+
+# ==============================
+# 🧩 Offline Harness Setup
+# ==============================
+class _Upload(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile."""
+
+    def __init__(self, data, name, file_id):
+        super().__init__(data)
+        self.name = name
+        self.file_id = file_id
+
+
+def install_offline_uploader(chats):
+    """Make st.file_uploader return the chat named in the session's CHAT_KEY."""
+    import streamlit as st
+    import streamlit.delta_generator as dg
+
+    def file_uploader(self, *args, **kwargs):
+        name = st.session_state.get(CHAT_KEY)
+        upload = None if name is None else _Upload(chats[name], f"{name}.txt", name)
+        if kwargs.get("accept_multiple_files"):
+            return [] if upload is None else [upload]
+        return upload
+    dg.DeltaGenerator.file_uploader = file_uploader
+
+
+def share_script_cache():
+    """
+    AppTest compiles the script into a fresh ScriptCache on every run, which a
+    server does once; concurrent compiles in one process also trip CPython's AST
+    recursion check. One shared (locked) cache fixes both.
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+
+    shared = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: shared
+
+
+def share_runtime():
+    """
+    AppTest installs a mock Runtime at the start of each run and removes it at
+    the end, pulling it out from under the other sessions' runs. Fall back to
+    the last installed one, as a server has a single Runtime.
+    """
+    from streamlit.runtime.runtime import Runtime
+
+    last = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            last[:] = [cls._instance]
+            return cls._instance
+        if not last:
+            raise RuntimeError("Runtime hasn't been created!")
+        return last[0]
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or bool(last))
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+# ==============================
+# 👤 Simulated Session
+# ==============================
+class Session:
+    """One analyst: an AppTest instance plus the latency of every rerun it triggered."""
+
+    def __init__(self, index, chat, poll=0.5, timeout=300):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = index
+        self.chat = chat
+        self.poll = poll
+        self.timeout = timeout
+        self.reruns = []  # (step, seconds)
+        self.errors = []
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.at.session_state[CHAT_KEY] = chat
+
+    def _run(self, step, action=None):
+        start = time.perf_counter()
+        self.at = (action or self.at.run)()
+        self.reruns.append((step, time.perf_counter() - start))
+        if self.at.exception:
+            self.errors.append({"session": self.index, "step": step, "error": self.at.exception[0].message})
+
+    def settle(self, step):
+        """Rerun (like the page's polling fragments) until no job progress bar is left."""
+        deadline = time.monotonic() + self.timeout
+        while self.at.get("progress") and time.monotonic() < deadline:
+            time.sleep(self.poll)
+            self._run(f"{step} (poll)")
+
+    def click(self, step, label_prefix, sidebar=False):
+        buttons = self.at.sidebar.button if sidebar else self.at.button
+        button = next((b for b in buttons if b.label.startswith(label_prefix)), None)
+        if button is None:
+            self.errors.append({"session": self.index, "step": step, "error": f"no button '{label_prefix}'"})
+            return False
+        self._run(step, button.click().run)
+        self.settle(step)
+        return True
+
+    def open_tab(self, step, key, label):
+        self.at.session_state[key] = label
+        self._run(step)
+        self.settle(step)
+
+    # ---------- flows ----------
+    def upload(self):
+        self._run("upload")
+
+    def analysis(self):
+        if self.click("generate analysis", "🚀", sidebar=True):
+            for label in ANALYSIS_TABS:
+                self.open_tab(f"analysis tab {label}", "analysis_tabs", label)
+
+    def export(self):
+        self.at.session_state["analysis_tabs"] = "📦 Export"
+        if not any(b.label.startswith("⚙️ Prepare") for b in self.at.button):
+            self.analysis()
+        if not self.click("export prepare", "⚙️ Prepare"):
+            return
+        deadline = time.monotonic() + self.timeout
+        while not self.at.get("download_button") and time.monotonic() < deadline:
+            time.sleep(self.poll)
+            self._run("export (poll)")
+
+    def sentiment(self):
+        if self.click("sentiment", "🩵", sidebar=True):
+            for label in SENTIMENT_TABS:
+                self.open_tab(f"sentiment tab {label}", "sentiment_tabs", label)
+
+    def interaction(self):
+        self.click("interaction graph", "👥", sidebar=True)
+
+
+def _run_session(session, flows, iterations, done):
+    try:
+        for _ in range(iterations):
+            for flow in flows:
+                getattr(session, flow)()
+    except Exception as e:  # keep the other sessions going
+        session.errors.append({"session": session.index, "step": "harness", "error": f"{type(e).__name__}: {e}"})
+    done.append(time.perf_counter())
+
+
+def _sample_rss(samples, stop, interval=0.25):
+    import profiling
+
+    while not stop.is_set():
+        rss = profiling.rss_bytes()
+        if rss is not None:
+            samples.append(rss)
+        stop.wait(interval)
+
+
+# ==============================
+# 🏋️ Load Run
+# ==============================
+def run_load(sessions=4, messages=20_000, chats=2, flows=FLOWS, iterations=1, ramp=0.0, seed=0, log=print):
+    """Runs `sessions` concurrent simulated analysts; returns the report dict."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import profiling
+    import synthetic_chat
+
+    texts = {f"chat{i}": synthetic_chat.generate_chat(messages=messages, seed=seed + i).encode("utf-8")
+             for i in range(max(1, chats))}
+    install_offline_uploader(texts)
+    share_script_cache()
+    share_runtime()
+    log(f"🧪 {len(texts)} synthetic chat(s) of {messages:,} messages; {sessions} session(s): {', '.join(flows)}")
+
+    rss_start = profiling.rss_bytes()
+    samples, stop = [], threading.Event()
+    sampler = threading.Thread(target=_sample_rss, args=(samples, stop), daemon=True)
+    sampler.start()
+
+    names = sorted(texts)
+    users = [Session(i, names[i % len(names)]) for i in range(sessions)]
+    done, threads = [], []
+    start = time.perf_counter()
+    for session in users:
+        thread = threading.Thread(target=_run_session, args=(session, flows, iterations, done),
+                                  name=f"session-{session.index}")
+        thread.start()
+        threads.append(thread)
+        if ramp:
+            time.sleep(ramp)
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+    rss_end = profiling.rss_bytes()
+
+    reruns = [(step, seconds) for s in users for step, seconds in s.reruns]
+    errors = [e for s in users for e in s.errors]
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "sessions": sessions, "messages": messages, "chats": len(texts),
+            "flows": list(flows), "iterations": iterations, "ramp_s": ramp, "seed": seed,
+        },
+        "summary": _summarize([seconds for _, seconds in reruns], wall, sessions * iterations,
+                              rss_start, rss_end, samples, len(errors)),
+        "steps": {step: _latency([sec for name, sec in reruns if name == step])
+                  for step in dict.fromkeys(step for step, _ in reruns)},
+        "errors": errors,
+    }
+
+
+def _latency(seconds):
+    if not seconds:
+        return {"reruns": 0}
+    return {
+        "reruns": len(seconds),
+        "p50_ms": round(percentile(seconds, 50) * 1000, 1),
+        "p95_ms": round(percentile(seconds, 95) * 1000, 1),
+        "max_ms": round(max(seconds) * 1000, 1),
+    }
+
+
+def _summarize(seconds, wall, completed, rss_start, rss_end, samples, errors):
+    mb = lambda b: None if b is None else round(b / 2**20, 1)  # noqa: E731
+    peak = max(samples) if samples else rss_end
+    return {
+        **_latency(seconds),
+        "wall_s": round(wall, 2),
+        "reruns_per_s": round(len(seconds) / wall, 2) if wall else None,
+        "sessions_per_min": round(completed / wall * 60, 2) if wall else None,
+        "rss_start_mb": mb(rss_start),
+        "rss_end_mb": mb(rss_end),
+        "rss_peak_mb": mb(peak),
+        "rss_growth_mb": mb(rss_end - rss_start) if rss_start is not None and rss_end is not None else None,
+        "errors": errors,
+    }
+
+
+# ==============================
+# 🖥️ Command Line
+# ==============================
+def print_report(report, log=print):
+    s = report["summary"]
+    log(f"\n⏱️ {s['reruns']} reruns in {s['wall_s']}s: p50 {s.get('p50_ms')} ms, p95 {s.get('p95_ms')} ms, "
+        f"max {s.get('max_ms')} ms")
+    log(f"🚀 {s['reruns_per_s']} reruns/s, {s['sessions_per_min']} sessions/min")
+    log(f"🧠 RSS {s['rss_start_mb']} → {s['rss_end_mb']} MB (peak {s['rss_peak_mb']} MB, +{s['rss_growth_mb']} MB)")
+    log(f"\n  {'step':<40} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for step, row in report["steps"].items():
+        log(f"  {step:<40} {row['reruns']:>7} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['max_ms']:>9}")
+    for error in report["errors"][:10]:
+        log(f"❌ session {error['session']} / {error['step']}: {error['error']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline concurrent-session load test for app.py (Streamlit AppTest).")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent simulated analysts (default: 4)")
+    parser.add_argument("--messages", type=int, default=20_000, help="messages per synthetic chat (default: 20000)")
+    parser.add_argument("--chats", type=int, default=2, help="distinct chats, assigned round-robin (default: 2)")
+    parser.add_argument("--flows", default=",".join(FLOWS), help=f"comma-separated subset of: {','.join(FLOWS)}")
+    parser.add_argument("--iterations", type=int, default=1, help="times each session repeats its flows")
+    parser.add_argument("--ramp", type=float, default=0.0, help="seconds between session starts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="loadtest.json", help="JSON report path (default: loadtest.json)")
+    args = parser.parse_args(argv)
+
+    args.flows = [f.strip() for f in args.flows.split(",") if f.strip()]
+    unknown = set(args.flows) - set(FLOWS)
+    if unknown:
+        parser.error(f"unknown flow(s): {', '.join(sorted(unknown))}")
+    if "upload" not in args.flows:
+        args.flows.insert(0, "upload")  # every other flow needs a parsed chat
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out = os.path.abspath(args.out)
+    os.chdir(os.path.dirname(APP_PATH))  # the app reads stop_hinglish.txt relative to its folder
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+    from streamlit.logger import set_log_level
+    set_log_level("error")  # per-rerun deprecation notices would drown the report
+
+    report = run_load(args.sessions, args.messages, args.chats, args.flows, args.iterations, args.ramp, args.seed)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"\nWrote {out}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
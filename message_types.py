@@ -0,0 +1,191 @@
+"""
+===========================================================
+🏷️ message_types.py — Locale-aware Message Classification
+===========================================================
+
+Every parsed message gets a type: text, media, deleted, poll, system,
+call or location. The markers WhatsApp writes instead of content differ
+by language and platform ("<Media omitted>", "<Multimedia omitido>",
+iOS "image omitted", "Este mensaje fue eliminado", ...), so they come
+from locale packs, which are compiled into ONE regular expression with a
+named group per type. The whole Message column is classified in a single
+vectorized pass (Arrow's RE2; the Polars backend runs the same pattern):
+
+    types = classify(df["Message"], df["Sender"])   # categorical, 1 byte per message
+    df[df["Type"] == "media"]                       # what helpers use instead of string compares
+
+Messages without a "Sender:" prefix are system messages in any language.
+Restrict the packs with WCA_LOCALES=en,es (default: every pack).
+===========================================================
+"""
+
+import os
+import re
+import warnings
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+TYPES = ("text", "media", "deleted", "poll", "system", "call", "location")
+TYPE_DTYPE = pd.CategoricalDtype(list(TYPES))
+CODES = {name: code for code, name in enumerate(TYPES)}
+SYSTEM_SENDER = "System"  # preprocessor's sender for lines without a "Sender:" prefix
+
+# Whole-message markers per locale and type; an entry ending in "*" matches messages starting with it.
+# Android and iOS exports differ, so both spellings are listed.
+LOCALE_PACKS = {
+    "en": {
+        "media": ["<Media omitted>", "image omitted", "video omitted", "audio omitted", "sticker omitted",
+                  "GIF omitted", "document omitted*", "Contact card omitted"],
+        "deleted": ["This message was deleted", "This message was deleted.", "You deleted this message",
+                    "You deleted this message."],
+        "poll": ["POLL:*"],
+        "system": ["Messages and calls are end-to-end encrypted*", "Your security code with *",
+                   "You created group *"],
+        "call": ["Missed voice call", "Missed video call", "Missed group voice call", "Missed group video call"],
+        "location": ["location: https://maps.google.com/*", "Location: https://maps.google.com/*",
+                     "Live location shared"],
+    },
+    "es": {
+        "media": ["<Multimedia omitido>", "imagen omitida", "video omitido", "audio omitido", "sticker omitido",
+                  "GIF omitido"],
+        "deleted": ["Este mensaje fue eliminado", "Eliminaste este mensaje", "Se eliminó este mensaje."],
+        "poll": ["ENCUESTA:*"],
+        "system": ["Los mensajes y las llamadas están cifrados de extremo a extremo*"],
+        "call": ["Llamada perdida", "Llamada de voz perdida", "Videollamada perdida"],
+        "location": ["ubicación: https://maps.google.com/*", "Ubicación en tiempo real compartida"],
+    },
+    "pt": {
+        "media": ["<Mídia oculta>", "<Arquivo de mídia oculto>", "imagem ocultada", "vídeo omitido"],
+        "deleted": ["Mensagem apagada", "Esta mensagem foi apagada", "Você apagou esta mensagem"],
+        "poll": ["ENQUETE:*"],
+        "system": ["As mensagens e as chamadas são protegidas com a criptografia de ponta a ponta*"],
+        "call": ["Chamada de voz perdida", "Chamada de vídeo perdida"],
+        "location": ["localização: https://maps.google.com/*", "Localização em tempo real compartilhada"],
+    },
+    "de": {
+        "media": ["<Medien ausgeschlossen>", "Bild weggelassen", "Video weggelassen", "Audio weggelassen",
+                  "Sticker weggelassen"],
+        "deleted": ["Diese Nachricht wurde gelöscht", "Diese Nachricht wurde gelöscht.",
+                    "Du hast diese Nachricht gelöscht", "Du hast diese Nachricht gelöscht."],
+        "poll": ["UMFRAGE:*"],
+        "system": ["Nachrichten und Anrufe sind Ende-zu-Ende-verschlüsselt*"],
+        "call": ["Verpasster Sprachanruf", "Verpasster Videoanruf"],
+        "location": ["Standort: https://maps.google.com/*"],
+    },
+    "fr": {
+        "media": ["<Médias omis>", "image absente", "vidéo absente", "audio omis"],
+        "deleted": ["Ce message a été supprimé", "Vous avez supprimé ce message"],
+        "poll": ["SONDAGE :*", "SONDAGE:*"],
+        "system": ["Les messages et les appels sont chiffrés de bout en bout*"],
+        "call": ["Appel vocal manqué", "Appel vidéo manqué"],
+        "location": ["position : https://maps.google.com/*", "position: https://maps.google.com/*"],
+    },
+    "it": {
+        "media": ["<Media omessi>", "immagine omessa", "video omesso", "audio omesso"],
+        "deleted": ["Questo messaggio è stato eliminato", "Hai eliminato questo messaggio"],
+        "poll": ["SONDAGGIO:*"],
+        "system": ["I messaggi e le chiamate sono crittografati end-to-end*"],
+        "call": ["Chiamata vocale persa", "Videochiamata persa"],
+        "location": ["posizione: https://maps.google.com/*"],
+    },
+}
+
+
+# ==============================
+# 🧩 Pattern
+# ==============================
+def locales() -> tuple:
+    """Locale packs in use: WCA_LOCALES (comma-separated, read on every call) or all of them."""
+    names = [n.strip() for n in os.environ.get("WCA_LOCALES", "").split(",") if n.strip()]
+    unknown = [n for n in names if n not in LOCALE_PACKS]
+    if unknown:
+        warnings.warn(f"Unknown locale packs ignored: {', '.join(unknown)}", stacklevel=2)
+    return tuple(n for n in names if n in LOCALE_PACKS) or tuple(LOCALE_PACKS)
+
+
+def _escape(text):
+    # only the metacharacters all three engines (re, RE2, Rust regex) agree on
+    return "".join("\\" + c if c in "\\.^$*+?{}[]|()" else c for c in text)
+
+
+def _entry(entry):
+    return _escape(entry[:-1]) if entry.endswith("*") else _escape(entry) + "$"  # the pattern is anchored at the start only
+
+
+def pattern(packs=None) -> str:
+    """
+    The single pattern for the given locale packs (default: locales()): one named group
+    per non-text type, anchored at the message start (after an optional iOS U+200E mark).
+    Plain syntax only, so Python's re, Arrow (RE2) and Polars (Rust regex) all accept it.
+    """
+    return _pattern(tuple(packs or locales()))
+
+
+@lru_cache(maxsize=None)
+def _pattern(packs) -> str:
+    # cached per resolved tuple of packs, so a changed WCA_LOCALES takes effect
+    groups = []
+    for name in TYPES[1:]:
+        entries = dict.fromkeys(entry for locale in packs for entry in LOCALE_PACKS[locale].get(name, ()))
+        if entries:
+            groups.append(f"(?P<{name}>{'|'.join(map(_entry, entries))})")
+    return f"^‎?(?:{'|'.join(groups)})"
+
+
+def _compiled(packs=None):
+    return _compile(tuple(packs or locales()))
+
+
+@lru_cache(maxsize=None)
+def _compile(packs):
+    return re.compile(_pattern(packs))
+
+
+# ==============================
+# 🏷️ Classification
+# ==============================
+def type_codes(values, system=None, packs=None) -> np.ndarray:
+    """
+    Type codes (int8 positions in TYPES) of an Arrow string array: one DFA pass of the
+    pattern over the column (RE2), then the matching group once per distinct marker message
+    (they repeat). `system` is an optional boolean mask of messages without a sender.
+    """
+    import pyarrow.compute as pc
+
+    packs = tuple(packs or locales())
+    codes = np.zeros(len(values), dtype=np.int8)
+    if len(values):
+        hits = pc.fill_null(pc.match_substring_regex(values, pattern(packs)), False)
+        rows = np.flatnonzero(hits.to_numpy(zero_copy_only=False))
+        if len(rows):
+            markers = values.take(rows)
+            distinct = pc.unique(markers)
+            match = _compiled(packs).match
+            distinct_codes = np.array([CODES[match(m).lastgroup] for m in distinct.to_pylist()], dtype=np.int8)
+            codes[rows] = distinct_codes[pc.index_in(markers, value_set=distinct).to_numpy(zero_copy_only=False)]
+    if system is not None:
+        codes[np.asarray(system, dtype=bool)] = CODES["system"]
+    return codes
+
+
+def classify(messages, senders=None, packs=None) -> pd.Series:
+    """Type of every message (categorical TYPE_DTYPE, aligned with `messages`); "system" wherever the sender is "System"."""
+    import pyarrow as pa
+
+    messages = pd.Series(messages, dtype="string")
+    system = None
+    if senders is not None:
+        system = pd.Series(senders, dtype="string").eq(SYSTEM_SENDER).fillna(False).to_numpy(dtype=bool)
+    codes = type_codes(pa.array(messages.fillna(""), type=pa.string()), system, packs)
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=TYPE_DTYPE), index=messages.index, name="Type")
+
+
+def message_type(message, sender=None, packs=None) -> str:
+    """Type of a single message (the same rules as classify())."""
+    if sender == SYSTEM_SENDER:
+        return "system"
+    match = _compiled(packs).match(str(message))
+    return match.lastgroup if match else "text"
@@ -0,0 +1,426 @@
+"""
+===========================================================
+🐻‍❄️ polars_backend.py — Polars Execution Backend
+===========================================================
+
+Optional Polars implementations of preprocessor.preprocess and the
+helper.py aggregations. Parsing, filtering, word / emoji tokenizing and
+group-bys run as multi-threaded Polars expressions instead of Python
+loops over rows, and every function returns the same pandas object
+(values, dtypes, index and tie order) as the pandas code path, so
+callers never see Polars.
+
+Functions decorated with @dispatch run here while the backend is
+selected and Polars is installed; otherwise, or when a function returns
+NotImplemented for an input it doesn't cover, the pandas code runs:
+
+    WCA_DATAFRAME_BACKEND=polars streamlit run app.py
+    polars_backend.use("polars")          # in code / scripts
+
+Each pandas frame is converted to Polars once (while it is alive), not
+once per helper call. Calls that need Python semantics Polars doesn't
+share (str.lower(), URL extraction, emoji lookup, stop-word matching)
+are applied to distinct values only.
+
+Usage:
+    python benchmark.py --sizes 1000000 --backend polars --compare bench.json
+===========================================================
+"""
+
+import functools
+import importlib.util
+import os
+import sys
+import threading
+import weakref
+from collections import Counter
+
+import pandas as pd
+
+
+BACKENDS = ("pandas", "polars")
+_backend = os.environ.get("WCA_DATAFRAME_BACKEND", "pandas")
+
+# Python's str.split()/strip() and re's \s use str.isspace(), which (unlike Rust's \s)
+# includes \x1c-\x1f; the regex class and strip set below are exactly that set
+WHITESPACE = "".join(chr(c) for c in range(0x3001) if chr(c).isspace())
+_WS = "".join(f"\\x{{{ord(c):x}}}" for c in WHITESPACE)
+
+# preprocessor.HEADER_PATTERN (anchored per message) with the rest of the message captured
+HEADER_RE = (
+    rf"^(?P<date>\d{{1,2}}/\d{{1,2}}/\d{{2,4}}),[{_WS}]"
+    rf"(?P<time>\d{{1,2}}:\d{{2}})"
+    rf"(?:[{_WS}]*[^\x00-\x7F]*?(?P<ampm>[AaPp][Mm]))?"
+    rf"[{_WS}][-–][{_WS}]"
+)
+USER_LINE_RE = rf"(?s)^([^:]+):[{_WS}](.*)"  # preprocessor.USER_LINE_RE
+WORD_RE = rf"[^{_WS}]+"  # one str.split() token
+SPLIT_MARK = "\x00"  # inserted before each message header; never part of a header
+
+COLUMNS = [
+    "Date", "Time (AM/PM)", "Time (24hr)", "Sender", "Message",
+    "Year", "Month", "Day", "Hour", "Minute", "DayName",
+    "Month_num", "only_date", "Period", "Type"
+]
+
+
+# ==============================
+# 🔀 Backend Selection
+# ==============================
+@functools.lru_cache(maxsize=None)
+def available() -> bool:
+    return importlib.util.find_spec("polars") is not None
+
+
+def use(name):
+    """Select the dataframe backend ("pandas" or "polars") for this process."""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown dataframe backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    if name == "polars" and not available():
+        print("⚠️ polars is not installed; keeping the pandas backend.")
+        name = "pandas"
+    _backend = name
+
+
+def active() -> bool:
+    return _backend == "polars" and available()
+
+
+def dispatch(fn):
+    """Run this module's function of the same name instead of fn while the Polars backend is active."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if active():
+            result = getattr(sys.modules[__name__], fn.__name__)(*args, **kwargs)
+            if result is not NotImplemented:
+                return result
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+# ==============================
+# 🔁 pandas <-> Polars
+# ==============================
+_frames = {}  # id(pandas frame) -> (weakref, LazyFrame)
+_frames_lock = threading.Lock()
+_READ_COLUMNS = ["Sender", "Message", "Type", "Date", "Year", "Month_num", "Month", "DayName", "Period", "chat_id"]
+
+
+def _lazy(df):
+    """The columns helpers read, as a Polars LazyFrame; converted once per (live) pandas frame."""
+    import polars as pl
+
+    key = id(df)
+    with _frames_lock:
+        entry = _frames.get(key)
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+    frame = pl.from_pandas(df[[c for c in _READ_COLUMNS if c in df.columns]], include_index=False)
+    if "chat_id" in frame.columns:
+        frame = frame.with_columns(pl.col("chat_id").cast(pl.String))
+    lazy = frame.lazy()
+    with _frames_lock:
+        _frames[key] = (weakref.ref(df, lambda _, key=key: _frames.pop(key, None)), lazy)
+    return lazy
+
+
+def _scope(df, selected_user="Overall", chats=None):
+    """helper.filter_chats() plus the selected-sender filter, as a LazyFrame."""
+    import polars as pl
+
+    lazy = _lazy(df)
+    if chats is not None and "chat_id" in df.columns:
+        lazy = lazy.filter(pl.col("chat_id").is_in([chats] if isinstance(chats, str) else list(chats)))
+    if selected_user != "Overall":
+        lazy = lazy.filter(pl.col("Sender") == selected_user)
+    return lazy
+
+
+def _first_seen_counts(lazy, column):
+    """(values, counts) of a column, most frequent first and ties in order of first appearance
+    (the order of value_counts() and Counter.most_common())."""
+    import polars as pl
+
+    counts = (
+        lazy.group_by(column, maintain_order=True).agg(pl.len().alias("n"))
+        .sort("n", descending=True, maintain_order=True)
+        .collect()
+    )
+    return counts[column].to_list(), counts["n"].to_list()
+
+
+def _most_common(values, counts, keep, n):
+    """Counter(...).most_common(n) over pre-counted distinct values, merged by keep(value) (None drops)."""
+    merged = Counter()
+    for value, count in zip(values, counts):
+        key = keep(value)
+        if key is not None:
+            merged[key] += count
+    return merged.most_common(n)
+
+
+def _value_counts(df, column, values, counts):
+    """pd.Series as df[column].value_counts() would build it."""
+    template = df[column].iloc[:0].value_counts()
+    return pd.Series(counts, index=pd.Index(values, dtype=template.index.dtype, name=template.index.name),
+                     name=template.name, dtype=template.dtype)
+
+
+# ==============================
+# 🧹 Preprocessing
+# ==============================
+@functools.lru_cache(maxsize=None)
+def _frame_dtypes():
+    import preprocessor
+    return preprocessor.build_frame([{"Date": "2020-01-01", "Time (AM/PM)": "01:00 AM", "Time (24hr)": "01:00",
+                                      "Sender": "a", "Message": "b"}]).dtypes
+
+
+def _row_index(masks):
+    """Index left after applying boolean masks one by one (pandas keeps a RangeIndex while rows stay evenly spaced)."""
+    import numpy as np
+
+    labels, is_range = np.arange(len(masks[0]) if masks else 0), True
+    for mask in masks:
+        labels = labels[mask[labels]]
+        steps = np.diff(labels)
+        is_range = is_range and (len(steps) == 0 or (steps[0] > 0 and (steps == steps[0]).all()))
+    if is_range and len(labels):
+        step = int(labels[1] - labels[0]) if len(labels) > 1 else 1
+        return pd.RangeIndex(int(labels[0]), int(labels[-1]) + step, step)
+    return pd.Index(labels, dtype="int64")
+
+
+def preprocess(data: str):
+    import numpy as np
+    import polars as pl
+    import message_types
+    import preprocessor
+
+    if SPLIT_MARK in data:
+        return NotImplemented
+
+    # one chunk per header match, exactly where HEADER_RE.finditer() starts them (text before the first is dropped)
+    chunks = (
+        pl.Series("chunk", [data]).str.replace_all(f"(?m){HEADER_RE}", SPLIT_MARK + "${0}")
+        .str.split(SPLIT_MARK).explode().slice(1)
+        .str.strip_chars_end("\n").to_frame()
+    )
+    if chunks.is_empty():
+        return NotImplemented
+
+    parts = chunks.select(
+        pl.col("chunk").str.extract_groups(f"{HEADER_RE}(?P<content>(?s:.*))").struct.unnest()
+    ).filter(pl.col("date").is_not_null())
+    parts = parts.with_columns(pl.col("content").str.strip_chars(WHITESPACE))
+    user = pl.col("content").str.extract_groups(USER_LINE_RE)
+
+    # dates and clock times repeat a lot: parse each distinct one with the preprocessor's own functions
+    dates = parts["date"].unique().to_list()
+    iso = dict(zip(dates, map(preprocessor._parse_date_iso, dates)))
+    clocks = parts.select("time", "ampm").unique().rows()
+    times = {f"{t}|{a}": preprocessor._parse_times(t, a) for t, a in clocks}
+    clock = pl.concat_str(pl.col("time"), pl.col("ampm").fill_null("None"), separator="|")
+
+    rows = parts.lazy().select(
+        pl.col("date").replace_strict(iso, return_dtype=pl.String).alias("Date"),
+        clock.replace_strict({k: v[0] for k, v in times.items()}, return_dtype=pl.String).alias("Time (AM/PM)"),
+        clock.replace_strict({k: v[1] for k, v in times.items()}, return_dtype=pl.String).alias("Time (24hr)"),
+        pl.when(user.struct.field("1").is_not_null())
+        .then(user.struct.field("1").str.strip_chars(WHITESPACE)).otherwise(pl.lit("System")).alias("Sender"),
+        pl.when(user.struct.field("1").is_not_null())
+        .then(user.struct.field("2").str.strip_chars(WHITESPACE)).otherwise(pl.col("content")).alias("Message"),
+    ).filter(pl.col("Date").is_not_null() & pl.col("Time (24hr)").is_not_null())
+
+    date = pl.col("Date").str.to_datetime("%Y-%m-%d", time_unit="us")
+    time = pl.concat_str(pl.lit("1900-01-01 "), pl.col("Time (24hr)")).str.to_datetime("%Y-%m-%d %H:%M", time_unit="us")
+    frame = rows.with_columns(
+        date.alias("Date"),
+        time.alias("Time (24hr)"),
+        (pl.col("Message") != "").alias("_kept"),
+    ).with_columns(
+        pl.col("Date").dt.year().alias("Year"),
+        pl.col("Date").dt.strftime("%B").alias("Month"),
+        pl.col("Date").dt.day().alias("Day"),
+        pl.col("Time (24hr)").dt.hour().alias("Hour"),
+        pl.col("Time (24hr)").dt.minute().alias("Minute"),
+        pl.col("Date").dt.strftime("%A").alias("DayName"),
+        pl.col("Date").dt.month().alias("Month_num"),
+    ).with_columns(
+        pl.when(pl.col("Hour") == 23).then(pl.lit("23-00"))
+        .when(pl.col("Hour") == 0).then(pl.lit("00-1"))
+        .otherwise(pl.format("{}-{}", pl.col("Hour"), pl.col("Hour") + 1)).alias("Period"),
+    ).collect()
+
+    # message types with the same compiled pattern (Arrow's RE2 over the column); dropped types as in build_frame
+    codes = message_types.type_codes(frame["Message"].to_arrow(), (frame["Sender"] == "System").to_numpy())
+    typed = ~np.isin(codes, [message_types.CODES[t] for t in preprocessor.DROPPED_TYPES])
+    masks = [frame["_kept"].to_numpy(), typed]
+    kept = masks[0] & typed
+    frame = frame.filter(pl.Series(kept))
+    if frame.is_empty():
+        return NotImplemented  # the pandas path builds the typed empty frame
+
+    df = frame.drop("_kept").to_pandas(use_pyarrow_extension_array=True)
+    df["only_date"] = df["Date"].astype("datetime64[us]").dt.date
+    df["Type"] = pd.Categorical.from_codes(codes[kept], dtype=message_types.TYPE_DTYPE)
+    df = df[COLUMNS].astype(_frame_dtypes()[COLUMNS])
+    df.index = _row_index(masks)
+    return df
+
+
+# ==============================
+# 📊 Helper Aggregations
+# ==============================
+def fetch_stats(selected_user, df, chats=None):
+    import polars as pl
+    import helper
+
+    lazy = _scope(df, selected_user, chats)
+    totals = lazy.select(
+        pl.len().alias("messages"),
+        pl.col("Message").str.count_matches(WORD_RE).sum().alias("words"),
+        (pl.col("Type") == "media").sum().alias("media"),
+    ).collect().row(0)
+    # URL extraction stays URLExtract's, once per distinct message that can hold a URL: it only
+    # reports text around a TLD match, and its TLDs all start with "." except "localhost"
+    candidates = pl.col("Message").str.contains(".", literal=True) | pl.col("Message").str.contains("(?i)localhost")
+    distinct = lazy.filter(candidates).group_by("Message").agg(pl.len().alias("n")).collect()
+    extractor = helper.get_url_extractor()
+    links = sum(len(extractor.find_urls(str(message))) * n for message, n in distinct.iter_rows())
+    return int(totals[0]), int(totals[1] or 0), int(totals[2] or 0), links
+
+
+def most_busy_users(df, chats=None):
+    senders, counts = _first_seen_counts(_scope(df, chats=chats), "Sender")
+    counts = _value_counts(df, "Sender", senders, counts)
+    x = counts.head()
+
+    percentage_df = round(counts / int(counts.sum()) * 100, 2).reset_index()
+    percentage_df.columns = ['Sender', 'Percentage']
+    return x, percentage_df
+
+
+def wordcloud_text(selected_user, df, chats=None):
+    import polars as pl
+    import helper
+
+    stop_words = helper.read_stop_words("⚠️ Warning: stop_hinglish.txt not found. Proceeding without stop words.").split()
+    lazy = _scope(df, selected_user, chats).filter(pl.col("Type") != "media")
+    words = lazy.select(pl.col("Message").str.extract_all(WORD_RE).alias("word"))
+    words = words.with_row_index("row").explode("word").collect()
+    if words.is_empty():
+        return None
+
+    lowered = {word: word.lower() for word in words["word"].drop_nulls().unique().to_list()}
+    kept = pl.col("word").is_not_null() & ~pl.col("word").is_in(stop_words)
+    messages = (
+        words.lazy()
+        .with_columns(pl.col("word").replace_strict(lowered, default=None, return_dtype=pl.String))
+        .group_by("row", maintain_order=True).agg(pl.col("word").filter(kept).str.join(" "))
+        .collect()
+    )
+    return " ".join(messages["word"].to_list()).strip()
+
+
+def most_common_words(selected_user, df, chats=None):
+    import polars as pl
+    import helper
+
+    stop_words = helper.read_stop_words()
+    lazy = _scope(df, selected_user, chats).filter(pl.col("Type") != "media")
+    words = lazy.select(pl.col("Message").str.extract_all(WORD_RE).alias("word")).explode("word").drop_nulls()
+    values, counts = _first_seen_counts(words, "word")
+    # lower() per distinct token equals lower() per message: case mapping never crosses whitespace
+    common = _most_common(values, counts, lambda w: None if w.lower() in stop_words else w.lower(), 20)
+    if not common:
+        return pd.DataFrame(columns=['Word', 'Frequency'])
+    return pd.DataFrame(common, columns=['Word', 'Frequency'])
+
+
+def emoji_helper(selected_user, df, chats=None):
+    import emoji
+    import polars as pl
+
+    chars = _scope(df, selected_user, chats).select(pl.col("Message").str.extract_all("(?s).").alias("char"))
+    values, counts = _first_seen_counts(chars.explode("char").drop_nulls(), "char")
+    common = _most_common(values, counts, lambda c: c if emoji.is_emoji(c) else None, 10)
+    if not common:
+        return pd.DataFrame(columns=['Emoji', 'Count'])
+    return pd.DataFrame(common, columns=['Emoji', 'Count'])
+
+
+def monthly_timeline(selected_user, df, chats=None):
+    import polars as pl
+
+    timeline = (
+        _scope(df, selected_user, chats)
+        .group_by("Year", "Month_num", "Month").agg(pl.col("Message").count())
+        .sort("Year", "Month_num", "Month").collect()
+    )
+    if timeline.is_empty():
+        return NotImplemented
+    timeline = pd.DataFrame({
+        "Year": pd.array(timeline["Year"].to_list(), dtype=df["Year"].dtype),
+        "Month_num": pd.array(timeline["Month_num"].to_list(), dtype=df["Month_num"].dtype),
+        "Month": pd.array(timeline["Month"].to_list(), dtype=df["Month"].dtype),
+        "Message": pd.array(timeline["Message"].to_list(), dtype="int64"),
+    })
+    timeline['time'] = [f"{m}-{y}" for m, y in zip(timeline['Month'], timeline['Year'])]
+    return timeline
+
+
+def daily_timeline(selected_user, df, chats=None):
+    import polars as pl
+
+    timeline = (
+        _scope(df, selected_user, chats)
+        .group_by(pl.col("Date").dt.date().alias("only_date")).agg(pl.col("Message").count())
+        .sort("only_date").collect()
+    )
+    if timeline.is_empty():
+        return NotImplemented
+    return pd.DataFrame({
+        "only_date": timeline["only_date"].to_list(),
+        "Message": pd.array(timeline["Message"].to_list(), dtype="int64"),
+    })
+
+
+def week_activity_map(selected_user, df, chats=None):
+    values, counts = _first_seen_counts(_scope(df, selected_user, chats), "DayName")
+    if not values:
+        return NotImplemented
+    return _value_counts(df, "DayName", values, counts)
+
+
+def month_activity_map(selected_user, df, chats=None):
+    values, counts = _first_seen_counts(_scope(df, selected_user, chats), "Month")
+    if not values:
+        return NotImplemented
+    return _value_counts(df, "Month", values, counts)
+
+
+def activity_heatmap(selected_user, df, chats=None):
+    import polars as pl
+    import helper
+
+    if "Period" not in df.columns:
+        return NotImplemented
+    counts = (
+        _scope(df, selected_user, chats)
+        .group_by("DayName", "Period").agg(pl.col("Message").count())
+        .collect()
+    )
+    if counts.is_empty():
+        return NotImplemented
+    counts = pd.DataFrame({
+        "DayName": pd.array(counts["DayName"].to_list(), dtype=df["DayName"].dtype),
+        "Period": pd.array(counts["Period"].to_list(), dtype=df["Period"].dtype),
+        "Message": pd.array(counts["Message"].to_list(), dtype="int64"),
+    })
+    return (
+        counts.pivot_table(index='DayName', columns='Period', values='Message', aggfunc='sum')
+        .fillna(0)
+        .reindex(columns=helper.PERIOD_ORDER, fill_value=0)
+    )
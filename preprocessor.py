@@ -1,8 +1,10 @@
 # Python
-import streamlit as st
 import re
 from datetime import datetime
 import pandas as pd
+import profiling
+import polars_backend
+import message_types
 
 
 # Shared header (date, time, optional AM/PM, dash or en-dash)
@@ -16,6 +18,8 @@ HEADER_PATTERN = r"""
 
 HEADER_RE = re.compile(HEADER_PATTERN, re.VERBOSE | re.MULTILINE)
 USER_LINE_RE = re.compile(r"^(?P<user>[^:]+):\s(?P<message>.*)", re.DOTALL)
+# message types (see message_types.py) that are parsed but not kept
+DROPPED_TYPES = ["deleted", "poll"]
 
 
 def _parse_date_iso(date_str: str) -> str | None:
@@ -45,19 +49,25 @@ def _parse_times(time_part: str, ampm: str | None) -> tuple[str | None, str | No
     except ValueError:
         return None, None
 
-@st.cache_data
+@profiling.traced()
+def decode_chat(bytes_data: bytes) -> str:
+    """Decode an exported chat file, trying UTF-8 first, then common fallbacks."""
+    for enc in ("utf-8", "utf-8-sig", "cp1252", "latin-1"):
+        try:
+            return bytes_data.decode(enc)
+        except UnicodeDecodeError:
+            continue
+    return bytes_data.decode("utf-8", errors="ignore")
+
+
+@profiling.traced()
+@polars_backend.dispatch
 def preprocess(data: str) -> pd.DataFrame:
     # Find the start of each message/system entry by locating header occurrences
     starts = [m.start() for m in HEADER_RE.finditer(data)]
     if not starts:
         # Return an empty DataFrame with expected columns if nothing matches
-        return pd.DataFrame(
-            columns=[
-                "Date", "Time (AM/PM)", "Time (24hr)", "Sender", "Message",
-                "Year", "Month", "Day", "Hour", "Minute", "DayName",
-                "Month_num", "only_date", "Period"
-            ]
-        )
+        return _empty_frame()
 
     starts.append(len(data))  # sentinel for slicing the last chunk
 
@@ -104,6 +114,15 @@ def preprocess(data: str) -> pd.DataFrame:
             }
         )
 
+    return build_frame(rows)
+
+
+def build_frame(rows) -> pd.DataFrame:
+    """
+    Typed, enriched chat frame from parsed rows (Date as ISO text, Time (AM/PM),
+    Time (24hr) as HH:MM, Sender, Message): a list of dicts or a dict of columns.
+    Used by preprocess() and by store.MessageStore to rebuild frames from SQL rows.
+    """
     df = pd.DataFrame(rows)
 
     # Ensure consistent dtypes before string ops
@@ -134,9 +153,10 @@ def preprocess(data: str) -> pd.DataFrame:
         df.loc[:, "Month_num"] = df["Date"].dt.month
         df.loc[:, "only_date"] = df["Date"].dt.date
 
-        # Domain-specific filters
-        df = df[df["Message"] != "POLL:"]
-        df = df[df["Message"] != "This message was deleted"]
+        # Message types (one pass over the column, any locale); deleted messages and polls are dropped
+        types = message_types.classify(df["Message"], df["Sender"])
+        kept = ~types.isin(DROPPED_TYPES)
+        df, types = df[kept], types[kept]
 
         # Period label
         period = []
@@ -149,20 +169,27 @@ def preprocess(data: str) -> pd.DataFrame:
                 period.append(f"{hour}-{hour+1}")
         df = df.copy()
         df.loc[:, "Period"] = period
+        df["Type"] = types
     else:
         # If empty, make sure all expected columns exist
-        df = pd.DataFrame(
-            columns=[
-                "Date", "Time (AM/PM)", "Time (24hr)", "Sender", "Message",
-                "Year", "Month", "Day", "Hour", "Minute", "DayName",
-                "Month_num", "only_date", "Period"
-            ]
-        ).astype(
-            {
-                "Message": "string",
-                "Sender": "string",
-                "Period": "string",
-            }
-        )
-
-    return df
\ No newline at end of file
+        df = _empty_frame()
+
+    return df
+
+
+def _empty_frame() -> pd.DataFrame:
+    """A chat without messages: every column, with the dtypes of a parsed one where it matters."""
+    return pd.DataFrame(
+        columns=[
+            "Date", "Time (AM/PM)", "Time (24hr)", "Sender", "Message",
+            "Year", "Month", "Day", "Hour", "Minute", "DayName",
+            "Month_num", "only_date", "Period", "Type"
+        ]
+    ).astype(
+        {
+            "Message": "string",
+            "Sender": "string",
+            "Period": "string",
+            "Type": message_types.TYPE_DTYPE,
+        }
+    )
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+===========================================================
+⚡ preview.py — Progressive First Paint
+===========================================================
+
+Estimates for a large export while its full parse runs in the background.
+A few small byte windows spread evenly across the file (the first at its
+start, the last at its end) are parsed as one text, and every sampled
+message stands for total / sampled bytes messages. Messages are spread
+through the bytes much as through time, so even the first round covers
+the chat's whole date range:
+
+    rounds = [sample_chat(raw, r) for r in range(3)]   # later rounds fall between earlier windows
+    estimate = ChatPreview({"team": (len(raw), rounds)})
+    estimate.stats()              # ~messages, ~words, ~media, senders seen, date range
+    estimate.top_senders()        # Sender, Messages, Share (%)
+    estimate.monthly_activity()   # estimated messages per month
+
+Everything here is approximate: the app replaces it with the full run's
+results as soon as the parse finishes.
+===========================================================
+"""
+
+import re
+
+import pandas as pd
+
+import message_types
+
+
+PREVIEW_MIN_BYTES = 16 * 2**20  # smaller exports parse in a second or two anyway
+STRATA = 16  # windows per sampling round
+STRATUM_BYTES = 64 * 2**10
+ROUNDS = 4  # sampling rounds while the parse runs (round 0 is the first paint)
+REFINE_SECONDS = 2.0  # one more round every REFINE_SECONDS of parsing
+
+# a line that starts a message (preprocessor.HEADER_RE decides what actually parses)
+_LINE_HEADER_RE = re.compile(rb"^\d{1,2}/\d{1,2}/\d{2,4},\s\d{1,2}:\d{2}", re.MULTILINE)
+
+
+# ==============================
+# 🎯 Sampling
+# ==============================
+def _offset(round_number) -> float:
+    """Where a round's windows sit between round 0's (0.5, 0.25, 0.75, ...): bit-reversed round number."""
+    offset, scale = 0.0, 0.5
+    while round_number:
+        offset += scale * (round_number & 1)
+        round_number >>= 1
+        scale /= 2
+    return offset
+
+
+def _whole_messages(raw, start, end) -> bytes:
+    """raw[start:end] trimmed to whole messages: from its first message header to its last one (or the end of the file)."""
+    first = raw.find(b"\n", start, end) + 1 if start else 0
+    heads = [m.start() for m in _LINE_HEADER_RE.finditer(raw, first, end)]
+    if not heads:
+        return b""
+    stop = end if end >= len(raw) else heads[-1]
+    return bytes(raw[heads[0]:stop])
+
+
+def sample_chat(raw, round_number=0, strata=STRATA, stratum_bytes=STRATUM_BYTES) -> tuple:
+    """
+    (parsed messages, sampled bytes) of one sampling round of an export's raw
+    bytes. Round 0 reads `strata` windows from the first byte to the last; later
+    rounds read windows between the earlier ones. A file smaller than one round is
+    read whole by round 0 (later rounds then sample nothing).
+    """
+    import preprocessor
+
+    size = len(raw)
+    if size <= strata * stratum_bytes:
+        if round_number:
+            return preprocessor.preprocess(""), 0
+        windows = [_whole_messages(raw, 0, size)]
+    else:
+        step = (size - stratum_bytes) / (strata - 1)
+        starts = ([i * step for i in range(strata)] if not round_number
+                  else [(i + _offset(round_number)) * step for i in range(strata - 1)])
+        windows = [_whole_messages(raw, int(start), int(start) + stratum_bytes) for start in starts]
+    windows = [w for w in windows if w]
+    text = preprocessor.decode_chat(b"".join(windows))
+    return preprocessor.preprocess(text), sum(len(w) for w in windows)
+
+
+# ==============================
+# 📊 Estimates
+# ==============================
+class ChatPreview:
+    """Sampled messages of one or more chats, each weighted by the bytes it stands for."""
+
+    def __init__(self, samples):
+        """samples: {chat_id: (total bytes, [(parsed sample, sampled bytes), ...])}."""
+        frames = []
+        self.total_bytes = self.sampled_bytes = 0
+        for total, rounds in samples.values():
+            sampled = sum(nbytes for _, nbytes in rounds)
+            self.total_bytes += total
+            self.sampled_bytes += sampled
+            for df, _ in rounds:
+                if not df.empty:
+                    frames.append(df[["Date", "Sender", "Message", "Type"]].assign(Weight=total / sampled))
+        self.df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({
+            "Date": pd.Series(dtype="datetime64[ns]"), "Sender": pd.Series(dtype="string"),
+            "Message": pd.Series(dtype="string"), "Type": pd.Series(dtype=message_types.TYPE_DTYPE),
+            "Weight": pd.Series(dtype="float64"),
+        })
+
+    @property
+    def coverage(self) -> float:
+        """Share of the chats' bytes that were parsed."""
+        return self.sampled_bytes / self.total_bytes if self.total_bytes else 1.0
+
+    def stats(self) -> dict:
+        """Estimated messages, words and media; senders seen so far; first and last day (the sample spans both ends)."""
+        df, weight = self.df, self.df["Weight"]
+        words = df["Message"].str.split().str.len().fillna(0)
+        return {
+            "messages": round(weight.sum()),
+            "words": round((words * weight).sum()),
+            "media": round(weight[df["Type"] == "media"].sum()),
+            "senders": int(df.loc[df["Type"] != "system", "Sender"].nunique()),
+            "first_day": df["Date"].min().date() if not df.empty else None,
+            "last_day": df["Date"].max().date() if not df.empty else None,
+        }
+
+    def top_senders(self, n=5) -> pd.DataFrame:
+        """The n senders with the most estimated messages, with their estimated share (%)."""
+        per_sender = self.df.groupby("Sender", sort=False)["Weight"].sum().sort_values(ascending=False, kind="stable")
+        table = pd.DataFrame({
+            "Messages": per_sender.round().astype("int64"),
+            "Share (%)": (per_sender / per_sender.sum() * 100).round(1),
+        })
+        return table.head(n).rename_axis("Sender").reset_index()
+
+    def monthly_activity(self) -> pd.Series:
+        """Estimated messages per month (months no window fell into are missing)."""
+        months = self.df["Date"].dt.to_period("M").dt.start_time.rename("Month")
+        return self.df["Weight"].groupby(months).sum().round().astype("int64").rename("Messages")
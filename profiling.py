@@ -0,0 +1,215 @@
+"""
+===========================================================
+🐞 profiling.py — Hot-path Spans & Trace Export
+===========================================================
+
+Lightweight timing + memory spans around the expensive stages (decode,
+preprocess, helper analytics, sentiment, charts, exports):
+
+    @profiling.traced()                   # span named "module.function"
+    def preprocess(data): ...
+
+    with profiling.span("chart", chart="heatmap"):
+        ...
+
+Spans are only recorded while a Recorder is active in the current
+context (one per Streamlit session, or `with profiling.recording():` in
+scripts). Otherwise span()/traced() cost a single ContextVar lookup.
+Background work submitted with propagate() (see jobs.py) records into
+the recorder of the request that started it.
+
+Recorders export to JSON or to the Chrome trace format
+(chrome://tracing, https://ui.perfetto.dev).
+===========================================================
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+
+_current = contextvars.ContextVar("profiling_recorder", default=None)
+_request = contextvars.ContextVar("profiling_request", default=None)  # set for work handed off by propagate()
+_NULL_SPAN = nullcontext()
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+
+def rss_bytes() -> int | None:
+    """Current resident set size (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# ==============================
+# 🧾 Recorder
+# ==============================
+class Recorder:
+    """Bounded, thread-safe store of finished spans, grouped into requests (e.g. reruns)."""
+
+    def __init__(self, max_spans: int = 20_000):
+        self.spans = deque(maxlen=max_spans)
+        self.epoch = time.perf_counter()
+        self.request_id = 0
+        self.request_label = None
+        self._lock = threading.Lock()
+
+    def start_request(self, label=None) -> int:
+        """Begin a new request; spans recorded from now on carry its id."""
+        with self._lock:
+            self.request_id += 1
+            self.request_label = label
+            return self.request_id
+
+    def add(self, name, start, end, rss_start, rss_end, attrs, request=None):
+        """Store a finished span; it belongs to `request` (default: the current request)."""
+        thread = threading.current_thread()
+        self.spans.append({
+            "name": name,
+            "request": self.request_id if request is None else request,
+            "start_ms": round((start - self.epoch) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+            "rss_mb": None if rss_end is None else round(rss_end / 2**20, 1),
+            "rss_delta_mb": None if rss_start is None or rss_end is None else round((rss_end - rss_start) / 2**20, 2),
+            "thread": thread.name,
+            "tid": thread.ident,
+            "attrs": attrs,
+        })
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def records(self, request=None) -> list:
+        spans = list(self.spans)
+        return spans if request is None else [s for s in spans if s["request"] == request]
+
+    def summary(self, request=None) -> list:
+        """Per span name: calls, total / mean / max milliseconds, slowest first."""
+        totals = {}
+        for s in self.records(request):
+            row = totals.setdefault(s["name"], {"name": s["name"], "calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            row["calls"] += 1
+            row["total_ms"] += s["duration_ms"]
+            row["max_ms"] = max(row["max_ms"], s["duration_ms"])
+        for row in totals.values():
+            row["total_ms"] = round(row["total_ms"], 3)
+            row["mean_ms"] = round(row["total_ms"] / row["calls"], 3)
+        return sorted(totals.values(), key=lambda row: row["total_ms"], reverse=True)
+
+    # ---------- export ----------
+    def to_json(self, request=None) -> str:
+        return json.dumps({"spans": self.records(request), "summary": self.summary(request)}, indent=2, default=str)
+
+    def to_chrome_trace(self, request=None) -> str:
+        """Complete ("X") events in the Chrome trace event format."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": s["name"],
+                "cat": s["name"].split(".")[0],
+                "ph": "X",
+                "ts": round(s["start_ms"] * 1000, 1),
+                "dur": round(s["duration_ms"] * 1000, 1),
+                "pid": pid,
+                "tid": s["tid"],
+                "args": {**{k: str(v) for k, v in s["attrs"].items()},
+                         "request": s["request"], "rss_mb": s["rss_mb"], "rss_delta_mb": s["rss_delta_mb"]},
+            }
+            for s in self.records(request)
+        ]
+        threads = {s["tid"]: s["thread"] for s in self.records(request)}
+        events += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                   for tid, name in threads.items()]
+        return json.dumps({"traceEvents": events, "displayTimeUnit": "ms"})
+
+
+# ==============================
+# ⏱️ Spans
+# ==============================
+def current() -> Recorder | None:
+    return _current.get()
+
+
+def activate(recorder):
+    """Make `recorder` current for this context; returns a token for deactivate()."""
+    return _current.set(recorder)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def recording(recorder=None):
+    """Record spans inside the block: `with recording() as rec: ...; rec.summary()`."""
+    recorder = recorder or Recorder()
+    token = activate(recorder)
+    try:
+        yield recorder
+    finally:
+        deactivate(token)
+
+
+def _request_id(recorder):
+    request = _request.get()
+    return recorder.request_id if request is None else request
+
+
+@contextmanager
+def _span(recorder, name, attrs):
+    request = _request_id(recorder)  # taken at the start: a span can outlive its request
+    rss_start = rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, start, time.perf_counter(), rss_start, rss_bytes(), attrs, request)
+
+
+def span(name, **attrs):
+    """Context manager timing a block; a shared no-op when nothing is recording."""
+    recorder = _current.get()
+    if recorder is None:
+        return _NULL_SPAN
+    return _span(recorder, name, attrs)
+
+
+def traced(name=None):
+    """Decorator: record each call of the function as a span (default name "module.function")."""
+    def decorate(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = _current.get()
+            if recorder is None:
+                return fn(*args, **kwargs)
+            with _span(recorder, label, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def propagate(fn):
+    """
+    Wrap fn to run in a copy of the caller's context, for handing work to another thread.
+    Its spans belong to the caller's request, even if they start after the next one began.
+    """
+    recorder = _current.get()
+    if recorder is None:
+        return fn
+    context = contextvars.copy_context()
+    context.run(_request.set, _request_id(recorder))
+    return functools.partial(context.run, fn)
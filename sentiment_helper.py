@@ -9,14 +9,23 @@ Description:
         - Sentiment distribution (bar & pie)
         - Most positive & negative messages
         - Sentiment polarity scores (-1 to +1)
+        - Pluggable scoring backends (TextBlob reference, vectorized lexicon)
 ===========================================================
 """
 
-from textblob import TextBlob
+import re
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import streamlit as st
+
+import helper
+import message_types
+import profiling
+
+# textblob, seaborn and matplotlib are imported where they are used.
 
 
 # ==============================
@@ -24,9 +33,10 @@ import streamlit as st
 # ==============================
 def _get_sentiment(message: str) -> str:
     """Classifies a message into Positive, Negative, or Neutral."""
+    from textblob import TextBlob
     try:
         message = str(message).strip()
-        if not message or message == "<Media omitted>":
+        if not message or message_types.message_type(message) == "media":
             return "Neutral"
 
         polarity = TextBlob(message).sentiment.polarity
@@ -40,41 +50,354 @@ def _get_sentiment(message: str) -> str:
         return "Neutral"
 
 
+# ==============================
+# ⚙️ Sentiment Backends
+# ==============================
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+PROGRESS_CHUNK = 5_000  # messages scored between progress callbacks
+
+# Hinglish polarity terms. Most of these (accha, sahi, theek, ...) come straight
+# from stop_hinglish.txt, so they are the words this project's chats actually use.
+HINGLISH_LEXICON = {
+    "accha": 0.5, "acha": 0.5, "achcha": 0.5, "achha": 0.5,
+    "sahi": 0.4, "theek": 0.2, "thik": 0.2,
+    "badhiya": 0.7, "badiya": 0.7, "mast": 0.6, "zabardast": 0.8,
+    "shandar": 0.8, "kamaal": 0.7, "khush": 0.6, "pyaar": 0.5, "pyar": 0.5,
+    "shukriya": 0.5, "dhanyavad": 0.5,
+    "bekar": -0.6, "bekaar": -0.6, "bakwas": -0.7, "bakwaas": -0.7,
+    "ganda": -0.6, "bura": -0.5, "galat": -0.4, "pagal": -0.3,
+    "dukh": -0.6, "gussa": -0.6,
+}
+HINGLISH_INTENSIFIERS = {"bahut": 1.3, "bohot": 1.3, "bhot": 1.3, "bahot": 1.3, "zyada": 1.2}
+NEGATIONS = ("no", "not", "never", "n't", "nahi", "nahin", "na", "mat")
+
+TOKEN_RE = re.compile(r"[a-z0-9']+|!")
+
+
+def label_polarity(polarity: pd.Series) -> pd.Series:
+    """Maps polarity scores to Positive / Neutral / Negative labels."""
+    values = polarity.to_numpy(dtype="float64")
+    labels = np.select(
+        [values > POSITIVE_THRESHOLD, values < NEGATIVE_THRESHOLD],
+        ["Positive", "Negative"],
+        default="Neutral",
+    )
+    return pd.Series(labels, index=polarity.index, dtype="object")
+
+
+class SentimentBackend(ABC):
+    """Base class: turns a Series of messages into a Series of polarity scores."""
+
+    name = "base"
+
+    @abstractmethod
+    def polarity(self, messages: pd.Series) -> pd.Series:
+        """Polarity (-1..1) of every message, index-aligned with `messages`."""
+
+
+class TextBlobBackend(SentimentBackend):
+    """Reference implementation: one TextBlob parse per message."""
+
+    name = "textblob"
+
+    def polarity(self, messages: pd.Series) -> pd.Series:
+        from textblob import TextBlob
+        return messages.apply(lambda x: TextBlob(str(x)).sentiment.polarity).astype("float64")
+
+
+@lru_cache(maxsize=1)
+def _compile_lexicon():
+    """Builds the lookup arrays used by LexiconBackend (done once per process)."""
+    from textblob.en import sentiment as pattern_lexicon
+
+    words, polarity, intensity, modifier = [], [], [], []
+    for word, entry in pattern_lexicon.items():
+        p, _, i = entry[None]
+        words.append(word)
+        polarity.append(p)
+        intensity.append(i)
+        modifier.append(any(pos in entry for pos in pattern_lexicon.modifiers))
+
+    for word, p in HINGLISH_LEXICON.items():
+        words.append(word)
+        polarity.append(p)
+        intensity.append(1.0)
+        modifier.append(False)
+    for word, i in HINGLISH_INTENSIFIERS.items():
+        words.append(word)
+        polarity.append(0.0)
+        intensity.append(i)
+        modifier.append(True)
+
+    # Later entries (Hinglish) win on duplicates; the extra trailing slot is
+    # the "unknown word" sentinel that get_indexer's -1 lands on.
+    vocab = pd.Index(words)
+    keep = ~vocab.duplicated(keep="last")
+    vocab = vocab[keep]
+    known = np.append(np.ones(len(vocab), dtype=bool), False)
+    return (
+        vocab,
+        np.append(np.asarray(polarity, dtype="float64")[keep], 0.0),
+        np.append(np.asarray(intensity, dtype="float64")[keep], 1.0),
+        np.append(np.asarray(modifier, dtype=bool)[keep], False),
+        known,
+    )
+
+
+class LexiconBackend(SentimentBackend):
+    """
+    Vectorized approximation of TextBlob's pattern scorer.
+
+    The whole column is tokenized at once, every token is resolved to a
+    lexicon slot with a single hash lookup, and message scores are the mean
+    of the assessed tokens (np.bincount sums). Handles modifiers ("very good"),
+    negation ("not good" = -0.5 x good), trailing "!" and Hinglish terms.
+    """
+
+    name = "lexicon"
+
+    def polarity(self, messages: pd.Series) -> pd.Series:
+        n = len(messages)
+        if n == 0:
+            return pd.Series(dtype="float64", index=messages.index)
+
+        vocab, pol_arr, int_arr, mod_arr, known_arr = _compile_lexicon()
+
+        tokens = messages.astype(str).str.lower().str.findall(TOKEN_RE)
+        lengths = tokens.str.len().fillna(0).to_numpy(dtype="int64")
+        flat = tokens.explode().dropna().to_numpy(dtype=object)
+        msg_ids = np.repeat(np.arange(n), lengths)
+        if len(flat) == 0:
+            return pd.Series(0.0, index=messages.index)
+
+        codes = vocab.get_indexer(flat)  # -1 for unknown -> sentinel slot
+        pol = pol_arr[codes]
+        intensity = int_arr[codes]
+        known = known_arr[codes]
+        is_mod = mod_arr[codes]
+        flat_str = flat.astype(str)
+        is_neg = np.isin(flat_str, NEGATIONS) | np.char.endswith(flat_str, "n't")
+        is_bang = flat_str == "!"
+
+        def prev(arr, fill):
+            out = np.empty_like(arr)
+            out[0] = fill
+            out[1:] = arr[:-1]
+            return out
+
+        def nxt(arr, fill):
+            out = np.empty_like(arr)
+            out[-1] = fill
+            out[:-1] = arr[1:]
+            return out
+
+        same_prev = prev(msg_ids, -1) == msg_ids
+        same_next = nxt(msg_ids, -1) == msg_ids
+        prev_mod = prev(known & is_mod, False) & same_prev
+        prev_neg = prev(is_neg, False) & same_prev
+        prev2_neg = prev(prev_neg, False) & prev_mod
+
+        # "very good": the modifier's intensity scales the word it precedes
+        # and the modifier itself is folded into that single assessment.
+        pol = np.where(known & prev_mod, np.clip(pol * prev(intensity, 1.0), -1.0, 1.0), pol)
+        merged = known & is_mod & nxt(known, False) & same_next
+
+        # Each "!" boosts the last assessed word before it in the same message.
+        positions = np.arange(len(flat))
+        last_known = np.maximum.accumulate(np.where(known & ~merged, positions, -1))
+        bang_pos = positions[is_bang]
+        targets = last_known[bang_pos]
+        valid = (targets >= 0) & (msg_ids[np.maximum(targets, 0)] == msg_ids[bang_pos])
+        boosts = np.zeros(len(flat))
+        np.add.at(boosts, targets[valid], 1)
+        pol = np.clip(pol * 1.25 ** boosts, -1.0, 1.0)
+        pol = np.where(known & (prev_neg | prev2_neg), pol * -0.5, pol)
+
+        counted = (known & ~merged).astype("float64")
+        sums = np.bincount(msg_ids, weights=pol * counted, minlength=n)
+        counts = np.bincount(msg_ids, weights=counted, minlength=n)
+        scores = np.divide(sums, counts, out=np.zeros(n), where=counts > 0)
+        return pd.Series(scores, index=messages.index)
+
+
+SENTIMENT_BACKENDS = {
+    TextBlobBackend.name: TextBlobBackend,
+    LexiconBackend.name: LexiconBackend,
+}
+DEFAULT_BACKEND = TextBlobBackend.name
+
+
+def get_backend(backend=None) -> SentimentBackend:
+    """Resolves a backend name (or instance) to a SentimentBackend."""
+    if isinstance(backend, SentimentBackend):
+        return backend
+    name = backend or DEFAULT_BACKEND
+    if name not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unknown sentiment backend '{name}'. Choose from: {', '.join(SENTIMENT_BACKENDS)}")
+    return SENTIMENT_BACKENDS[name]()
+
+
+def score_polarity(messages: pd.Series, backend=None, progress=None, chunk_size: int = PROGRESS_CHUNK) -> pd.Series:
+    """
+    Polarity for every message. With a progress callback, scores in chunks and calls
+    progress(fraction_done) after each one; the callback may raise to abort.
+    """
+    engine = get_backend(backend)
+    with profiling.span("sentiment_helper.score_polarity", backend=engine.name, messages=len(messages)):
+        if progress is None or len(messages) <= chunk_size:
+            scores = engine.polarity(messages)
+        else:
+            parts = []
+            for start in range(0, len(messages), chunk_size):
+                parts.append(engine.polarity(messages.iloc[start:start + chunk_size]))
+                progress(min(start + chunk_size, len(messages)) / len(messages))
+            scores = pd.concat(parts)
+    if progress is not None:
+        progress(1.0)
+    return scores
+
+
+@profiling.traced()
+def compare_backends(messages: pd.Series, reference="textblob", candidate="lexicon") -> dict:
+    """
+    Scores the same messages with two backends and reports how well they agree.
+    Returns label agreement, polarity correlation / MAE, a label confusion
+    matrix and throughput (messages per second) for each backend.
+    """
+    messages = messages[message_types.classify(messages).ne("media").to_numpy()]
+    results = {}
+    scores = {}
+    for name in (reference, candidate):
+        backend = get_backend(name)
+        start = time.perf_counter()
+        scores[name] = backend.polarity(messages)
+        elapsed = time.perf_counter() - start
+        results[f"{backend.name}_seconds"] = round(elapsed, 4)
+        results[f"{backend.name}_msgs_per_sec"] = round(len(messages) / elapsed, 1) if elapsed > 0 else float("inf")
+
+    ref, cand = scores[reference], scores[candidate]
+    ref_labels, cand_labels = label_polarity(ref), label_polarity(cand)
+    results.update({
+        "messages": len(messages),
+        "label_agreement": round(float((ref_labels == cand_labels).mean()), 4) if len(messages) else 0.0,
+        "polarity_correlation": round(float(ref.corr(cand)), 4) if len(messages) > 1 else float("nan"),
+        "polarity_mae": round(float((ref - cand).abs().mean()), 4) if len(messages) else 0.0,
+        "confusion": pd.crosstab(ref_labels, cand_labels, rownames=[reference], colnames=[candidate]),
+    })
+    return results
+
+
 # ==============================
 # 🔍 Core Analysis
 # ==============================
-def analyze_sentiment(selected_user: str, df: pd.DataFrame) -> pd.DataFrame:
-    """Returns DataFrame with Sender, Message, Polarity, Sentiment."""
+@profiling.traced()
+def analyze_sentiment(selected_user: str, df: pd.DataFrame, backend=None, progress=None, chats=None) -> pd.DataFrame:
+    """Returns DataFrame with Sender, Message, Polarity, Sentiment (optionally for some chats only)."""
+    df = helper.filter_chats(df, chats)
     if selected_user != 'Overall':
         df = df[df['Sender'] == selected_user]
 
-    df = df[df['Message'] != '<Media omitted>'].copy()
-    if df.empty:
-        st.warning("⚠️ No valid messages available for sentiment analysis.")
+    # a fresh two-column frame: adding scores never touches the shared chat frame
+    df = df.loc[df['Type'] != 'media', ['Sender', 'Message']]
+    if df.empty:  # callers show "No valid messages" (the app) or report zero counts (the CLI)
         return pd.DataFrame(columns=['Sender', 'Message', 'Polarity', 'Sentiment'])
 
-    df['Polarity'] = df['Message'].apply(lambda x: TextBlob(str(x)).sentiment.polarity)
-    df['Sentiment'] = df['Polarity'].apply(
-        lambda p: 'Positive' if p > 0.1 else ('Negative' if p < -0.1 else 'Neutral')
-    )
+    df['Polarity'] = score_polarity(df['Message'], backend, progress)
+    df['Sentiment'] = label_polarity(df['Polarity'])
     return df[['Sender', 'Message', 'Polarity', 'Sentiment']]
 
 
+# ==============================
+# 📈 Sentiment Over Time (Cube)
+# ==============================
+class SentimentCube:
+    """
+    Pre-aggregated polarity indexed by (date, sender).
+
+    Each cell holds the polarity sum, message count and Positive / Neutral /
+    Negative tallies, so daily / weekly / monthly trends and rolling means for
+    any sender are cheap re-aggregations rather than a rescoring of the chat.
+    """
+
+    COLUMNS = ["polarity_sum", "count", "positive", "neutral", "negative"]
+    FREQUENCIES = {"D": "D", "W": "W", "M": "MS"}
+
+    def __init__(self, table: pd.DataFrame | None = None):
+        if table is None:
+            index = pd.MultiIndex.from_arrays(
+                [pd.DatetimeIndex([], name="Date"), pd.Index([], name="Sender", dtype="object")]
+            )
+            table = pd.DataFrame(0, index=index, columns=self.COLUMNS)
+        self.table = table
+
+    @classmethod
+    def _aggregate(cls, df: pd.DataFrame, backend=None, progress=None) -> pd.DataFrame:
+        df = df[df['Type'] != 'media']
+        polarity = score_polarity(df['Message'], backend, progress)
+        labels = label_polarity(polarity)
+        scored = pd.DataFrame({
+            "Date": pd.to_datetime(df['Date']).dt.normalize(),
+            "Sender": df['Sender'].astype("object"),
+            "polarity_sum": polarity,
+            "count": 1,
+            "positive": (labels == "Positive").astype("int64"),
+            "neutral": (labels == "Neutral").astype("int64"),
+            "negative": (labels == "Negative").astype("int64"),
+        })
+        return scored.groupby(["Date", "Sender"], sort=True)[cls.COLUMNS].sum()
+
+    @classmethod
+    @profiling.traced("sentiment_helper.SentimentCube.from_chat")
+    def from_chat(cls, df: pd.DataFrame, backend=None, progress=None) -> "SentimentCube":
+        """Scores every message once and builds the cube."""
+        return cls(cls._aggregate(df, backend, progress))
+
+    @property
+    def senders(self) -> list:
+        return sorted(self.table.index.get_level_values("Sender").unique())
+
+    def trend(self, selected_user: str = "Overall", freq: str = "D", window: int | None = None) -> pd.DataFrame:
+        """
+        Returns per-period count, tallies and mean polarity for one sender
+        (or 'Overall'). freq is 'D', 'W' or 'M'; window adds a rolling mean
+        over that many periods, weighted by message count.
+        """
+        if self.table.empty or (selected_user != "Overall" and selected_user not in self.senders):
+            return pd.DataFrame(columns=["count", "positive", "neutral", "negative", "mean_polarity"])
+
+        if selected_user != "Overall":
+            table = self.table.xs(selected_user, level="Sender")
+        else:
+            table = self.table.groupby(level="Date").sum()
+
+        trend = table.resample(self.FREQUENCIES[freq]).sum()
+        trend["mean_polarity"] = trend["polarity_sum"] / trend["count"].where(trend["count"] > 0)
+        if window:
+            rolling = trend[["polarity_sum", "count"]].rolling(window, min_periods=1).sum()
+            trend["rolling_mean"] = rolling["polarity_sum"] / rolling["count"].where(rolling["count"] > 0)
+        return trend.drop(columns="polarity_sum")
+
+
 # ==============================
 # 📊 Sentiment Distribution
 # ==============================
-def sentiment_distribution(selected_user: str, df: pd.DataFrame) -> pd.Series:
+def sentiment_distribution(selected_user: str, df: pd.DataFrame, backend=None) -> pd.Series:
     """Returns a Series showing sentiment distribution counts."""
-    sentiment_df = analyze_sentiment(selected_user, df)
+    sentiment_df = analyze_sentiment(selected_user, df, backend)
     if sentiment_df.empty:
         return pd.Series(dtype='int64')
 
     return sentiment_df['Sentiment'].value_counts()
 
 
-def plot_sentiment_charts(selected_user: str, df: pd.DataFrame):
+def plot_sentiment_charts(selected_user: str, df: pd.DataFrame, backend=None):
     """Displays both bar chart and pie chart for sentiment distribution."""
-    sentiment_counts = sentiment_distribution(selected_user, df)
+    import streamlit as st
+    import seaborn as sns
+    import matplotlib.pyplot as plt
+
+    sentiment_counts = sentiment_distribution(selected_user, df, backend)
 
     if sentiment_counts.empty:
         st.warning("⚠️ No sentiment data available for visualization.")
@@ -112,44 +435,107 @@ def plot_sentiment_charts(selected_user: str, df: pd.DataFrame):
 # ==============================
 # 💬 Top Positive / Negative Messages
 # ==============================
-def top_positive_messages(selected_user: str, df: pd.DataFrame, n=10):
-    """Returns top 'n' most positive messages with sender and polarity score."""
-    sentiment_df = analyze_sentiment(selected_user, df)
-    if sentiment_df.empty:
-        return pd.DataFrame(columns=['Sender', 'Message', 'Polarity', 'Sentiment'])
+class SentimentResult:
+    """
+    Scored messages held once, answering top-k / bottom-k queries.
+
+    Queries use np.argpartition to pick the k (+ offset) candidates and only
+    sort those, so a "top 10" on a large chat never sorts the whole frame.
+    slice() narrows by sender and date range without rescoring, and the
+    offset argument pages through results ("next 10 most negative").
+    """
 
-    top_pos = sentiment_df.sort_values(by='Polarity', ascending=False).head(n)
-    top_pos['Polarity'] = top_pos['Polarity'].round(3)
-    return top_pos[['Sender', 'Message', 'Polarity', 'Sentiment']]
+    COLUMNS = ['Sender', 'Message', 'Polarity', 'Sentiment']
+
+    def __init__(self, sentiment_df: pd.DataFrame, dates: pd.Series | None = None):
+        self.frame = sentiment_df
+        self.dates = dates
+        self._polarity = sentiment_df['Polarity'].to_numpy(dtype="float64") if not sentiment_df.empty else np.empty(0)
+
+    @classmethod
+    def from_chat(cls, selected_user: str, df: pd.DataFrame, backend=None) -> "SentimentResult":
+        sentiment_df = analyze_sentiment(selected_user, df, backend)
+        dates = df.loc[sentiment_df.index, 'Date'] if 'Date' in df.columns else None
+        return cls(sentiment_df, dates)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def slice(self, sender: str | None = None, start=None, end=None) -> "SentimentResult":
+        """Restricts to one sender and/or an inclusive [start, end] date range."""
+        mask = np.ones(len(self.frame), dtype=bool)
+        if sender and sender != 'Overall':
+            mask &= (self.frame['Sender'] == sender).to_numpy(dtype=bool)
+        if self.dates is not None and (start is not None or end is not None):
+            dates = pd.to_datetime(self.dates)
+            if start is not None:
+                mask &= (dates >= pd.Timestamp(start)).to_numpy(dtype=bool)
+            if end is not None:
+                mask &= (dates <= pd.Timestamp(end)).to_numpy(dtype=bool)
+        dates = self.dates[mask] if self.dates is not None else None
+        return SentimentResult(self.frame[mask], dates)
+
+    def _select(self, k: int, offset: int, largest: bool) -> pd.DataFrame:
+        total = len(self._polarity)
+        stop = min(offset + k, total)
+        if k <= 0 or offset >= total:
+            return pd.DataFrame(columns=self.COLUMNS)
+
+        keys = -self._polarity if largest else self._polarity
+        if stop < total:
+            # Partition finds the cut-off value; ties at the cut-off are
+            # taken in chat order so results match a stable full sort.
+            cutoff = keys[np.argpartition(keys, stop - 1)[stop - 1]]
+            below = np.flatnonzero(keys < cutoff)
+            ties = np.flatnonzero(keys == cutoff)[:stop - len(below)]
+            candidates = np.concatenate([below, ties])
+        else:
+            candidates = np.arange(total)
+        # Order only the candidates; ties keep chat order.
+        ordered = candidates[np.lexsort((candidates, keys[candidates]))][offset:stop]
 
+        result = self.frame.iloc[ordered][self.COLUMNS].copy()
+        result['Polarity'] = result['Polarity'].round(3)
+        return result
 
-def top_negative_messages(selected_user: str, df: pd.DataFrame, n=10):
-    """Returns top 'n' most negative messages with sender and polarity score."""
-    sentiment_df = analyze_sentiment(selected_user, df)
-    if sentiment_df.empty:
-        return pd.DataFrame(columns=['Sender', 'Message', 'Polarity', 'Sentiment'])
+    def top(self, k: int = 10, offset: int = 0) -> pd.DataFrame:
+        """Most positive messages, ranks [offset, offset + k)."""
+        return self._select(k, offset, largest=True)
+
+    def bottom(self, k: int = 10, offset: int = 0) -> pd.DataFrame:
+        """Most negative messages, ranks [offset, offset + k)."""
+        return self._select(k, offset, largest=False)
 
-    top_neg = sentiment_df.sort_values(by='Polarity', ascending=True).head(n)
-    top_neg['Polarity'] = top_neg['Polarity'].round(3)
-    return top_neg[['Sender', 'Message', 'Polarity', 'Sentiment']]
+
+def top_positive_messages(selected_user: str, df: pd.DataFrame, n=10, backend=None):
+    """Returns top 'n' most positive messages with sender and polarity score."""
+    return SentimentResult.from_chat(selected_user, df, backend).top(n)
+
+
+def top_negative_messages(selected_user: str, df: pd.DataFrame, n=10, backend=None):
+    """Returns top 'n' most negative messages with sender and polarity score."""
+    return SentimentResult.from_chat(selected_user, df, backend).bottom(n)
 
 
 # ==============================
 # 🧠 Summary for Streamlit Integration
 # ==============================
-def sentiment_summary(selected_user: str, df: pd.DataFrame):
+def sentiment_summary(selected_user: str, df: pd.DataFrame, backend=None):
     """Displays sentiment distribution and top messages with scores."""
+    import streamlit as st
+
     st.title("💡 Sentiment Analysis Summary")
     st.caption("Understand the emotional tone and sentiment strength of each message.")
 
     # Charts
-    plot_sentiment_charts(selected_user, df)
+    plot_sentiment_charts(selected_user, df, backend)
 
-    # Top Messages
+    # Top Messages (scored once, queried twice)
+    result = SentimentResult.from_chat(selected_user, df, backend)
     col1, col2 = st.columns(2)
     with col1:
         st.subheader("😊 Most Positive Messages")
-        pos_df = top_positive_messages(selected_user, df)
+        pos_df = result.top()
         if pos_df.empty:
             st.info("No positive messages found.")
         else:
@@ -157,7 +543,7 @@ def sentiment_summary(selected_user: str, df: pd.DataFrame):
 
     with col2:
         st.subheader("😞 Most Negative Messages")
-        neg_df = top_negative_messages(selected_user, df)
+        neg_df = result.bottom()
         if neg_df.empty:
             st.info("No negative messages found.")
         else:
@@ -167,12 +553,13 @@ def sentiment_summary(selected_user: str, df: pd.DataFrame):
 # ==============================
 # 🔄 For app.py integration
 # ==============================
-def analyze_sentiments(selected_user, df):
+@profiling.traced()
+def analyze_sentiments(selected_user, df, backend=None, progress=None, chats=None):
     """
     Extracts sentiment summary stats + detailed dataframe.
     Returns (summary_dict, sentiment_df)
     """
-    sentiment_df = analyze_sentiment(selected_user, df)
+    sentiment_df = analyze_sentiment(selected_user, df, backend, progress, chats)
     if sentiment_df.empty:
         return None, pd.DataFrame()
 
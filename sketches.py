@@ -0,0 +1,342 @@
+"""
+===========================================================
+🧮 sketches.py — Bounded-memory Approximate Analytics
+===========================================================
+
+Fixed-size, mergeable summaries for chats too long (or too continuous)
+to count exactly. Memory depends only on the chosen accuracy, never on
+the length of the history:
+
+    - TopK: heavy hitters (Misra-Gries / space-saving) with an additive
+      error bound of at most total / (capacity + 1)
+    - HyperLogLog: distinct counts, relative standard error 1.04 / sqrt(2**p)
+    - QuantileSketch: quantiles within a relative error (DDSketch-style
+      log buckets)
+
+ChatSketch combines them for one chat, updated batch by batch in chat
+order (store.MessageStore keeps one per loaded chat), and reports
+results shaped like the helper.py outputs plus their error bounds:
+
+    sketch = ChatSketch()
+    for batch in parsed_batches:
+        sketch.update_frame(batch)
+    sketch.most_common_words()      # Word, Frequency, Max Error
+    sketch.distinct_words()         # (estimate, relative standard error)
+===========================================================
+"""
+
+import hashlib
+import heapq
+import math
+import pickle
+from collections import Counter
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+import message_types
+
+
+BATCH_ROWS = 50_000  # rows per update when sketching an in-memory frame
+
+
+# ==============================
+# 🏆 Heavy Hitters
+# ==============================
+class TopK:
+    """
+    Mergeable Misra-Gries summary: at most `capacity` counters. Every reported
+    count is a lower bound and the true count is at most `error` higher, where
+    error <= total / (capacity + 1). Items missing from the summary occur at most
+    `error` times.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.counts = {}
+        self.error = 0
+        self.total = 0
+
+    def update(self, counts):
+        """Add pre-aggregated counts (a mapping item -> occurrences, e.g. one batch's Counter)."""
+        for item, n in counts.items():
+            self.counts[item] = self.counts.get(item, 0) + n
+            self.total += n
+        self._prune()
+
+    def merge(self, other):
+        self.update(other.counts)
+        self.total += other.total - sum(other.counts.values())
+        self.error += other.error
+        self._prune()
+        return self
+
+    def _prune(self):
+        if len(self.counts) <= self.capacity:
+            return
+        # subtracting the (capacity+1)-th largest count removes at least (capacity+1) x cut occurrences
+        cut = heapq.nlargest(self.capacity + 1, self.counts.values())[-1]
+        self.error += cut
+        self.counts = {item: n - cut for item, n in self.counts.items() if n > cut}
+
+    def top(self, n=10) -> list:
+        """[(item, count lower bound)], largest first (ties in first-seen order)."""
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+
+
+# ==============================
+# 🔢 Distinct Counts
+# ==============================
+def _hash64(items) -> np.ndarray:
+    """Stable 64-bit hashes (the same in every process, so sketches can be stored and merged)."""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(str(item).encode("utf-8"), digest_size=8).digest(), "little")
+         for item in items),
+        dtype=np.uint64,
+    )
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    lengths = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= np.uint64(1 << shift)
+        lengths[high] += shift
+        values = np.where(high, values >> np.uint64(shift), values)
+    return lengths + (values > 0)
+
+
+class HyperLogLog:
+    """Distinct-count estimate in 2**precision one-byte registers."""
+
+    def __init__(self, precision=14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, items):
+        """Add distinct items (duplicates are harmless but cost a hash each)."""
+        hashes = _hash64(items)
+        if not len(hashes):
+            return
+        rest_bits = 64 - self.precision
+        index = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        rank = (rest_bits - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:  # small range: linear counting is more accurate
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+# ==============================
+# 📏 Quantiles
+# ==============================
+class QuantileSketch:
+    """
+    Log-bucketed histogram: every quantile of values >= 1 is returned within
+    `relative_error` of a value of that rank; values below 1 are counted as 0.
+    """
+
+    def __init__(self, relative_error=0.01, buckets=2048):
+        self.relative_error = relative_error
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.counts = np.zeros(buckets, dtype=np.int64)
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values) & (values >= 0)]
+        if not len(values):
+            return
+        small = values < 1
+        self.zeros += int(small.sum())
+        index = np.ceil(np.log(values[~small]) / math.log(self.gamma)).astype(np.int64)
+        self.counts += np.bincount(np.clip(index, 0, len(self.counts) - 1), minlength=len(self.counts))
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantiles(self, qs) -> list:
+        """Estimates for each q in qs (None when empty)."""
+        if not self.count:
+            return [None for _ in qs]
+        cumulative = self.zeros + np.cumsum(self.counts)
+        estimates = []
+        for q in qs:
+            rank = q * (self.count - 1)
+            if rank < self.zeros:
+                estimates.append(0.0)
+                continue
+            i = int(np.searchsorted(cumulative, rank, side="right"))
+            value = 2 * self.gamma ** i / (self.gamma + 1)
+            estimates.append(min(max(value, self.min), self.max))
+        return estimates
+
+
+# ==============================
+# 💬 Chat Sketch
+# ==============================
+@lru_cache(maxsize=None)
+def _stop_words():
+    import helper
+    return helper.read_stop_words()
+
+
+def _domain(url):
+    host = urlsplit(url if "://" in url else f"http://{url}").hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+class ChatSketch:
+    """Words, emojis, domains, distinct words / senders, message length and reply latency of one or more chats."""
+
+    def __init__(self, capacity=1000, precision=14, relative_error=0.01):
+        self.words = TopK(capacity)
+        self.emojis = TopK(capacity)
+        self.domains = TopK(capacity)
+        self.vocabulary = HyperLogLog(precision)
+        self.senders = HyperLogLog(precision)
+        self.message_length = QuantileSketch(relative_error)
+        self.reply_latency = QuantileSketch(relative_error)
+        self.messages = 0
+        self._last = None  # (sender, seconds) of the last message, for a reply at the next batch's start
+
+    # ---------- updates ----------
+    def update(self, messages, senders, timestamps, types=None):
+        """
+        Add a batch of messages in chat order: message texts, senders,
+        timestamps in seconds and (optionally) their message_types, which are
+        classified here when not given. Counts follow helper.py: words are
+        lower-cased tokens of non-media messages without (Hinglish) stop words.
+        """
+        import emoji
+        import helper
+
+        messages = [str(m) for m in messages]
+        senders = [str(s) for s in senders]
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if not messages:
+            return
+        self.messages += len(messages)
+        types = message_types.classify(messages, senders) if types is None else pd.Series(types)
+        media = (types == "media").to_numpy(dtype=bool)
+        system = (types == "system").to_numpy(dtype=bool)
+
+        texts = [m for m, is_media in zip(messages, media) if not is_media]
+        tokens = Counter(" ".join(texts).lower().split())
+        self.vocabulary.update(tokens)
+        stop_words = _stop_words()
+        self.words.update({word: n for word, n in tokens.items() if word not in stop_words})
+        self.message_length.update([len(m) for m in texts])
+
+        chars = Counter("".join(messages))
+        self.emojis.update({char: n for char, n in chars.items() if emoji.is_emoji(char)})
+
+        extractor = helper.get_url_extractor()
+        domains = Counter(
+            _domain(url) for m in messages if "." in m or "localhost" in m.lower() for url in extractor.find_urls(m)
+        )
+        domains.pop("", None)
+        self.domains.update(domains)
+
+        self.senders.update({s for s, is_system in zip(senders, system) if not is_system})
+
+        # reply latency: time since the previous message whenever the sender changes
+        previous_senders = np.array(([self._last[0]] if self._last else [None]) + senders[:-1], dtype=object)
+        previous_times = np.concatenate([[self._last[1] if self._last else 0], timestamps[:-1]])
+        replies = previous_senders != np.array(senders, dtype=object)
+        if self._last is None:
+            replies[0] = False
+        self.reply_latency.update((timestamps - previous_times)[replies])
+        self._last = (senders[-1], int(timestamps[-1]))
+
+    def update_frame(self, df):
+        """Add a parsed chat frame (preprocess() output, in chat order)."""
+        if df.empty:
+            return
+        seconds = (df["Date"].to_numpy().astype("datetime64[s]").astype(np.int64)
+                   + df["Hour"].to_numpy(dtype=np.int64) * 3600 + df["Minute"].to_numpy(dtype=np.int64) * 60)
+        self.update(df["Message"].tolist(), df["Sender"].tolist(), seconds, df["Type"])
+
+    @classmethod
+    def from_frame(cls, df, batch_rows=BATCH_ROWS, **options):
+        sketch = cls(**options)
+        for start in range(0, len(df), batch_rows):
+            sketch.update_frame(df.iloc[start:start + batch_rows])
+        return sketch
+
+    def merge(self, other):
+        """Fold another chat's sketch into this one (for multi-chat summaries)."""
+        for name in ("words", "emojis", "domains", "vocabulary", "senders", "message_length", "reply_latency"):
+            getattr(self, name).merge(getattr(other, name))
+        self.messages += other.messages
+        self._last = None
+        return self
+
+    def to_bytes(self) -> bytes:
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def from_bytes(data):
+        return pickle.loads(data)
+
+    # ---------- results ----------
+    @staticmethod
+    def _top_frame(top_k, n, columns):
+        rows = [(item, count, top_k.error) for item, count in top_k.top(n)]
+        return pd.DataFrame(rows, columns=columns + ["Max Error"])
+
+    def most_common_words(self, n=20) -> pd.DataFrame:
+        """As helper.most_common_words; the true frequency is within [Frequency, Frequency + Max Error]."""
+        return self._top_frame(self.words, n, ["Word", "Frequency"])
+
+    def emoji_helper(self, n=10) -> pd.DataFrame:
+        """As helper.emoji_helper; the true count is within [Count, Count + Max Error]."""
+        return self._top_frame(self.emojis, n, ["Emoji", "Count"])
+
+    def top_domains(self, n=10) -> pd.DataFrame:
+        """Most linked domains (www. dropped); the true count is within [Count, Count + Max Error]."""
+        return self._top_frame(self.domains, n, ["Domain", "Count"])
+
+    def distinct_words(self) -> tuple:
+        """(estimate, relative standard error) of distinct lower-cased words."""
+        return self.vocabulary.estimate(), self.vocabulary.relative_error
+
+    def active_senders(self) -> tuple:
+        """(estimate, relative standard error) of distinct senders (system messages excluded)."""
+        return self.senders.estimate(), self.senders.relative_error
+
+    def quantiles(self, qs=(0.5, 0.9, 0.99)) -> pd.DataFrame:
+        """Message length (characters) and reply latency (minutes) at each quantile, with the relative error."""
+        latency = [None if v is None else v / 60 for v in self.reply_latency.quantiles(qs)]
+        return pd.DataFrame({
+            "Message length (chars)": self.message_length.quantiles(qs),
+            "Reply latency (min)": latency,
+            "Relative error": self.message_length.relative_error,
+        }, index=pd.Index([f"p{round(q * 100):g}" for q in qs], name="Quantile"))
@@ -0,0 +1,443 @@
+"""
+===========================================================
+🗄️ store.py — Embedded SQL Message Store
+===========================================================
+
+Optional file-based storage for large, multi-year archives. Parsed
+messages are streamed into SQLite in bounded-size batches (a chat never
+has to fit in memory), indexed on (chat, timestamp) and (chat, sender,
+timestamp), and the aggregations behind helper.fetch_stats,
+most_busy_users, monthly_timeline, daily_timeline and activity_heatmap
+run as SQL queries that return only the aggregated rows:
+
+    store = MessageStore("archive.sqlite")
+    store.load("team", digest, "team.txt")              # once per digest
+    store.monthly_timeline("Overall", {"team": digest})  # same frame as helper
+
+Query results are identical to the helpers run on the parsed frame.
+Other analyses use frame(), which loads only the requested chats and
+date window (see analysis.ChatAnalysis(store=...)). Each chat also keeps
+a fixed-size sketches.ChatSketch, built while loading, for approximate
+word / emoji / domain counts and distributions (sketch()).
+
+Usage:
+    python store.py archive.sqlite chats/*.txt
+    python store.py archive.sqlite --list
+    python store.py archive.sqlite --summary
+===========================================================
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import closing
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import profiling
+import sketches
+
+
+CHUNK_BYTES = 4 * 2**20  # export text parsed per batch while loading: bounds memory for any chat size
+ENCODINGS = ("utf-8", "utf-8-sig", "cp1252", "latin-1")  # tried in the same order as preprocessor.decode_chat
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MONTHS = ["January", "February", "March", "April", "May", "June",
+          "July", "August", "September", "October", "November", "December"]
+# value_counts() of the parsed Sender column returns this dtype (Arrow-backed with pandas 3)
+SENDER_COUNT_DTYPE = pd.Series([], dtype="string").value_counts().dtype
+PERIOD_ORDER = [
+    "00-1", "1-2", "2-3", "3-4", "4-5", "5-6", "6-7", "7-8", "8-9", "9-10",
+    "10-11", "11-12", "12-13", "13-14", "14-15", "15-16", "16-17",
+    "17-18", "18-19", "19-20", "20-21", "21-22", "22-23", "23-00"
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    messages INTEGER NOT NULL DEFAULT 0,
+    loaded_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    chat INTEGER NOT NULL REFERENCES chats(id),
+    ts TEXT NOT NULL,            -- 'YYYY-MM-DD HH:MM', sorts chronologically
+    sender TEXT NOT NULL,
+    message TEXT NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    weekday INTEGER NOT NULL,    -- 0 = Monday
+    words INTEGER NOT NULL,
+    media INTEGER NOT NULL,
+    links INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_ts ON messages (chat, ts);
+CREATE INDEX IF NOT EXISTS messages_sender ON messages (chat, sender, ts);
+CREATE TABLE IF NOT EXISTS sketches (
+    chat INTEGER PRIMARY KEY REFERENCES chats(id),
+    data BLOB NOT NULL           -- pickled sketches.ChatSketch
+);
+"""
+
+
+def _period(hour):
+    if hour == 23:
+        return "23-00"
+    if hour == 0:
+        return "00-1"
+    return f"{hour}-{hour + 1}"
+
+
+def _day_text(value):
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _iter_text(binary, encoding, chunk_bytes):
+    """Export text in batches of about chunk_bytes, always cut before a message header."""
+    import preprocessor
+
+    wrapper = io.TextIOWrapper(binary, encoding=encoding, newline="")  # keep \r\n like decode_chat
+    try:
+        batch, size = [], 0
+        for line in wrapper:
+            if size >= chunk_bytes and preprocessor.HEADER_RE.match(line):
+                yield "".join(batch)
+                batch, size = [], 0
+            batch.append(line)
+            size += len(line)
+        if batch:
+            yield "".join(batch)
+    finally:
+        wrapper.detach()  # the caller owns (and may rewind) the binary stream
+
+
+# ==============================
+# 🗄️ MessageStore
+# ==============================
+class MessageStore:
+    """SQLite-backed message archive; safe to share across threads (one connection per call)."""
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._write_lock = threading.Lock()
+        with closing(self._connect()) as con:
+            con.execute("PRAGMA journal_mode=WAL")  # readers don't wait for a chat being loaded
+            con.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=60, isolation_level=None, check_same_thread=False)
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as con:
+            return con.execute(sql, params).fetchall()
+
+    # ---------- loading ----------
+    def has(self, digest) -> bool:
+        return bool(self._query("SELECT 1 FROM chats WHERE digest = ?", (digest,)))
+
+    @profiling.traced()
+    def load(self, name, digest, source, chunk_bytes=CHUNK_BYTES, progress=None) -> int:
+        """
+        Stream one chat export (path, bytes or binary file) into the store, once per
+        digest; returns its message count. progress(bytes_read) is called per batch.
+        """
+        # a chat stored earlier is answered without the write lock, so reruns never wait on another load
+        row = self._query("SELECT messages FROM chats WHERE digest = ?", (digest,))
+        if row:
+            return row[0][0]
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        elif isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                return self.load(name, digest, f, chunk_bytes, progress)
+
+        with self._write_lock, closing(self._connect()) as con:
+            start = source.tell()
+            for encoding in ENCODINGS:
+                source.seek(start)
+                con.execute("BEGIN IMMEDIATE")
+                try:
+                    row = con.execute("SELECT messages FROM chats WHERE digest = ?", (digest,)).fetchone()
+                    if row is not None:  # loaded earlier (or by another session meanwhile)
+                        con.execute("COMMIT")
+                        return row[0]
+                    chat = con.execute(
+                        "INSERT INTO chats (digest, name, loaded_at) VALUES (?, ?, ?)",
+                        (digest, name, datetime.now().isoformat(timespec="seconds")),
+                    ).lastrowid
+                    count, sketch = 0, sketches.ChatSketch()
+                    for text in _iter_text(source, encoding, chunk_bytes):
+                        count += self._insert(con, chat, text, sketch)
+                        if progress is not None:
+                            progress(source.tell() - start)
+                    con.execute("UPDATE chats SET messages = ? WHERE id = ?", (count, chat))
+                    con.execute("INSERT INTO sketches VALUES (?, ?)", (chat, sketch.to_bytes()))
+                    con.execute("COMMIT")
+                    return count
+                except UnicodeDecodeError:
+                    con.execute("ROLLBACK")
+                except BaseException:
+                    con.execute("ROLLBACK")
+                    raise
+        raise ValueError(f"could not decode {name}")
+
+    @staticmethod
+    def _insert(con, chat, text, sketch=None) -> int:
+        import helper
+        import preprocessor
+
+        df = preprocessor.preprocess(text)
+        if df.empty:
+            return 0
+        if sketch is not None:
+            sketch.update_frame(df)
+        extractor = helper.get_url_extractor()
+        messages = [str(m) for m in df["Message"]]
+        ts = (df["Date"].dt.strftime("%Y-%m-%d") + " " + df["Time (24hr)"].dt.strftime("%H:%M")).tolist()
+        con.executemany(
+            "INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            zip(
+                [chat] * len(df), ts, df["Sender"].astype(str).tolist(), messages,
+                df["Year"].tolist(), df["Month_num"].tolist(), df["Hour"].tolist(),
+                df["Date"].dt.weekday.tolist(),
+                [len(m.split()) for m in messages],
+                (df["Type"] == "media").astype(int).tolist(),
+                [len(extractor.find_urls(m)) for m in messages],
+            ),
+        )
+        return len(df)
+
+    def remove(self, digest):
+        with self._write_lock, closing(self._connect()) as con:
+            con.execute("BEGIN IMMEDIATE")
+            con.execute("DELETE FROM messages WHERE chat IN (SELECT id FROM chats WHERE digest = ?)", (digest,))
+            con.execute("DELETE FROM sketches WHERE chat IN (SELECT id FROM chats WHERE digest = ?)", (digest,))
+            con.execute("DELETE FROM chats WHERE digest = ?", (digest,))
+            con.execute("COMMIT")
+
+    def chats(self) -> list:
+        """Stored chats, oldest load first: [{"name", "digest", "messages", "loaded_at"}]."""
+        rows = self._query("SELECT name, digest, messages, loaded_at FROM chats ORDER BY id")
+        return [dict(zip(("name", "digest", "messages", "loaded_at"), row)) for row in rows]
+
+    # ---------- scoping ----------
+    def _where(self, chats, selected_user="Overall", start=None, end=None):
+        """WHERE clause + params for chats ({chat_id: digest}), an optional sender and an inclusive day window."""
+        digests = list(chats.values()) if isinstance(chats, dict) else list(chats)
+        clauses = [f"chat IN (SELECT id FROM chats WHERE digest IN ({', '.join('?' * len(digests))}))"]
+        params = digests
+        if selected_user != "Overall":
+            clauses.append("sender = ?")
+            params.append(selected_user)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(_day_text(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(_day_text(pd.Timestamp(end) + pd.Timedelta(days=1)))
+        return " AND ".join(clauses), params
+
+    def count(self, chats, selected_user="Overall", start=None, end=None) -> int:
+        where, params = self._where(chats, selected_user, start, end)
+        return self._query(f"SELECT COUNT(*) FROM messages WHERE {where}", params)[0][0]
+
+    def senders(self, chats) -> list:
+        where, params = self._where(chats)
+        return [row[0] for row in self._query(f"SELECT DISTINCT sender FROM messages WHERE {where}", params)]
+
+    def date_bounds(self, chats):
+        """(first day, last day) as datetime.date, or (None, None) when empty."""
+        where, params = self._where(chats)
+        first, last = self._query(f"SELECT MIN(ts), MAX(ts) FROM messages WHERE {where}", params)[0]
+        if first is None:
+            return None, None
+        return pd.Timestamp(first[:10]).date(), pd.Timestamp(last[:10]).date()
+
+    # ---------- frames (for analyses that are not pushed down) ----------
+    @profiling.traced()
+    def frame(self, chats, start=None, end=None, limit=None) -> pd.DataFrame:
+        """
+        The chats ({chat_id: digest}) as preprocess() would return them, in chat order;
+        with several chats, combined with a chat_id column like workspace.combine_chats.
+        """
+        import preprocessor
+        import workspace
+
+        frames = {}
+        for chat_id, digest in chats.items():
+            where, params = self._where({chat_id: digest}, start=start, end=end)
+            sql = f"SELECT ts, sender, message FROM messages WHERE {where} ORDER BY rowid"
+            if limit is not None:
+                sql += f" LIMIT {int(limit)}"
+            rows = self._query(sql, params)
+            if not rows:
+                frames[chat_id] = preprocessor.preprocess("")
+                continue
+            ts, senders, messages = zip(*rows)
+            times = pd.to_datetime(pd.Series([t[11:] for t in ts]), format="%H:%M")
+            frames[chat_id] = preprocessor.build_frame({
+                "Date": [t[:10] for t in ts],
+                "Time (AM/PM)": times.dt.strftime("%I:%M %p").tolist(),
+                "Time (24hr)": [t[11:] for t in ts],
+                "Sender": senders,
+                "Message": messages,
+            })
+        if len(frames) == 1:
+            return next(iter(frames.values())).reset_index(drop=True)
+        return workspace.combine_chats(frames)
+
+    # ---------- approximate summaries ----------
+    @profiling.traced()
+    def sketch(self, chats):
+        """Merged sketches.ChatSketch of the chats ({chat_id: digest}); built and kept for chats loaded without one."""
+        digests = list(chats.values()) if isinstance(chats, dict) else list(chats)
+        merged = sketches.ChatSketch()
+        for digest in digests:
+            rows = self._query(
+                "SELECT chats.id, sketches.data FROM chats LEFT JOIN sketches ON sketches.chat = chats.id "
+                "WHERE chats.digest = ?", (digest,)
+            )
+            if not rows:
+                continue
+            chat, data = rows[0]
+            merged.merge(sketches.ChatSketch.from_bytes(data) if data is not None else self._build_sketch(chat))
+        return merged
+
+    def _build_sketch(self, chat, batch_rows=sketches.BATCH_ROWS):
+        sketch = sketches.ChatSketch()
+        with closing(self._connect()) as con:
+            cursor = con.execute("SELECT ts, sender, message FROM messages WHERE chat = ? ORDER BY rowid", (chat,))
+            while rows := cursor.fetchmany(batch_rows):
+                ts, senders, messages = zip(*rows)
+                minutes = np.array([t.replace(" ", "T") for t in ts], dtype="datetime64[m]")
+                sketch.update(messages, senders, minutes.astype("datetime64[s]").astype(np.int64))
+        with self._write_lock, closing(self._connect()) as con:
+            con.execute("INSERT OR REPLACE INTO sketches VALUES (?, ?)", (chat, sketch.to_bytes()))
+        return sketch
+
+    # ---------- pushed-down helper aggregations ----------
+    @profiling.traced()
+    def fetch_stats(self, selected_user, chats, start=None, end=None):
+        """(messages, words, media, links), as helper.fetch_stats."""
+        where, params = self._where(chats, selected_user, start, end)
+        row = self._query(
+            f"SELECT COUNT(*), SUM(words), SUM(media), SUM(links) FROM messages WHERE {where}", params
+        )[0]
+        return tuple(int(value or 0) for value in row)
+
+    @profiling.traced()
+    def most_busy_users(self, chats, start=None, end=None):
+        """(top-5 counts, percentage table), as helper.most_busy_users."""
+        where, params = self._where(chats, start=start, end=end)
+        rows = self._query(
+            f"SELECT sender, COUNT(*) AS n FROM messages WHERE {where} "
+            "GROUP BY sender ORDER BY n DESC, MIN(rowid)", params
+        )
+        counts = pd.Series([n for _, n in rows], index=pd.Index([s for s, _ in rows], dtype="string", name="Sender"),
+                           name="count", dtype=SENDER_COUNT_DTYPE)
+        percentage_df = round(counts / counts.sum() * 100, 2).reset_index()
+        percentage_df.columns = ['Sender', 'Percentage']
+        return counts.head(), percentage_df
+
+    @profiling.traced()
+    def monthly_timeline(self, selected_user, chats, start=None, end=None):
+        where, params = self._where(chats, selected_user, start, end)
+        rows = self._query(
+            f"SELECT year, month, COUNT(*) FROM messages WHERE {where} GROUP BY year, month ORDER BY year, month",
+            params,
+        )
+        if not rows:
+            return pd.DataFrame(columns=['Year', 'Month_num', 'Month', 'Message', 'time'])
+        timeline = pd.DataFrame({
+            "Year": pd.array([r[0] for r in rows], dtype="int32"),
+            "Month_num": pd.array([r[1] for r in rows], dtype="int32"),
+            "Month": pd.array([MONTHS[r[1] - 1] for r in rows], dtype="str"),
+            "Message": pd.array([r[2] for r in rows], dtype="int64"),
+        })
+        timeline['time'] = [f"{m}-{y}" for m, y in zip(timeline['Month'], timeline['Year'])]
+        return timeline
+
+    @profiling.traced()
+    def daily_timeline(self, selected_user, chats, start=None, end=None):
+        where, params = self._where(chats, selected_user, start, end)
+        rows = self._query(
+            f"SELECT substr(ts, 1, 10) AS day, COUNT(*) FROM messages WHERE {where} GROUP BY day ORDER BY day",
+            params,
+        )
+        if not rows:
+            return pd.DataFrame(columns=['only_date', 'Message'])
+        return pd.DataFrame({
+            "only_date": [datetime.strptime(day, "%Y-%m-%d").date() for day, _ in rows],
+            "Message": pd.array([n for _, n in rows], dtype="int64"),
+        })
+
+    @profiling.traced()
+    def activity_heatmap(self, selected_user, chats, start=None, end=None):
+        """DayName x Period message counts, as helper.activity_heatmap."""
+        where, params = self._where(chats, selected_user, start, end)
+        rows = self._query(
+            f"SELECT weekday, hour, COUNT(*) FROM messages WHERE {where} GROUP BY weekday, hour", params
+        )
+        if not rows:  # nothing in range (the columns always exist here)
+            return pd.DataFrame()
+        counts = pd.DataFrame({
+            "DayName": [DAYS[r[0]] for r in rows],
+            "Period": [_period(r[1]) for r in rows],
+            "Message": pd.array([r[2] for r in rows], dtype="int64"),
+        })
+        return (
+            counts.pivot_table(index='DayName', columns='Period', values='Message', aggfunc='sum')
+            .fillna(0)
+            .reindex(columns=PERIOD_ORDER, fill_value=0)
+        )
+
+
+def file_digest(path) -> str:
+    """sha256 of a file, read in blocks (same digest the app computes for an upload)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ==============================
+# 🖥️ Command Line
+# ==============================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load WhatsApp chat exports into an SQLite message store.")
+    parser.add_argument("database", help="SQLite file (created if missing)")
+    parser.add_argument("chats", nargs="*", help="chat export files to load (each loaded once per content)")
+    parser.add_argument("--list", action="store_true", help="list the stored chats")
+    parser.add_argument("--summary", action="store_true", help="approximate summary of all stored chats")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    store = MessageStore(args.database)
+    for path in args.chats:
+        name = os.path.splitext(os.path.basename(path))[0]
+        count = store.load(name, file_digest(path), path)
+        print(f"🗄️ {name}: {count} messages")
+    if args.list or not args.chats:
+        for chat in store.chats():
+            print(f"{chat['loaded_at']}  {chat['messages']:>10}  {chat['digest'][:12]}  {chat['name']}")
+    if args.summary:
+        sketch = store.sketch([chat["digest"] for chat in store.chats()])
+        (words, words_error), (senders, senders_error) = sketch.distinct_words(), sketch.active_senders()
+        print(f"\n🧮 ~{words:,} distinct words (±{words_error:.1%}), ~{senders:,} active senders (±{senders_error:.1%})")
+        for table in (sketch.most_common_words(10), sketch.emoji_helper(), sketch.top_domains(), sketch.quantiles()):
+            print(f"\n{table.to_string()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
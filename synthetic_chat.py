@@ -0,0 +1,190 @@
+"""
+===========================================================
+🧪 synthetic_chat.py — Seeded Synthetic WhatsApp Exports
+===========================================================
+
+Generates realistic WhatsApp "Export chat" text for benchmarks and demos:
+Zipf-like sender activity, evening-heavy timestamps, Hinglish/English
+messages (stop words from stop_hinglish.txt plus content words), emojis,
+links, media, deleted and system messages, and multiline messages.
+
+    text = generate_chat(messages=100_000, senders=12, seed=7)
+    df = preprocessor.preprocess(text)
+
+Same options + same seed -> byte-identical output.
+
+Usage:
+    python synthetic_chat.py chat.txt --messages 100000 --senders 12 --time-format 12h
+===========================================================
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+import numpy as np
+
+import sentiment_helper
+
+
+STOP_WORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stop_hinglish.txt")
+
+CONTENT_WORDS = [
+    "meeting", "project", "exam", "movie", "party", "dinner", "office", "trip", "cricket",
+    "match", "train", "weekend", "birthday", "photo", "song", "college", "assignment",
+    "chai", "khana", "ghar", "paisa", "kaam", "dost", "mummy", "papa", "shaadi", "gaadi",
+    "good", "great", "happy", "love", "awesome", "sad", "bad", "terrible", "tired", "late",
+    "tomorrow", "today", "tonight", "morning", "call", "plan", "ready", "done", "thanks",
+] + sorted(sentiment_helper.HINGLISH_LEXICON)
+
+EMOJIS = ["😂", "😀", "😍", "🙏", "👍", "❤️", "🔥", "😭", "🎉", "😅", "🤣", "😢", "😡", "🙄", "💯"]
+DOMAINS = ["youtube.com", "instagram.com", "example.com", "news.ycombinator.com", "maps.google.com"]
+MEDIA_MESSAGE = "<Media omitted>"
+DELETED_MESSAGES = ["This message was deleted", "You deleted this message"]
+SYSTEM_TEMPLATES = [
+    "{a} added {b}", "{a} left", "{a} removed {b}", "{a} changed the subject to \"{word} gang\"",
+    "{a} changed this group's icon", "{a} joined using this group's invite link",
+]
+SENDER_NAMES = [
+    "Aarav", "Ananya", "Rohan", "Priya", "Vikram", "Neha", "Arjun", "Sneha", "Kabir", "Isha",
+    "Rahul", "Pooja", "Aditya", "Kavya", "Sameer", "Riya", "Karan", "Meera", "Dev", "Tara",
+]
+# relative message volume per hour of day: quiet nights, busy evenings
+HOUR_WEIGHTS = np.array([3, 2, 1, 1, 1, 1, 2, 4, 6, 7, 7, 7, 8, 7, 6, 6, 7, 8, 9, 10, 11, 11, 9, 6], dtype=float)
+
+
+def load_stop_words(path=STOP_WORDS_FILE) -> list:
+    """Hinglish stop words (punctuation-only and numeric entries dropped)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            words = f.read().split()
+    except FileNotFoundError:
+        print(f"⚠️ {path} not found. Generating without Hinglish stop words.")
+        return []
+    return [w for w in words if w.isalpha()]
+
+
+def sender_names(count: int) -> list:
+    names = SENDER_NAMES[:count]
+    names += [f"User {i + 1}" for i in range(len(names), count)]
+    return names
+
+
+# ==============================
+# 🧪 Generator
+# ==============================
+def generate_chat(messages: int = 10_000, senders: int = 8, start: str = "2023-01-01", days: int = 365,
+                  time_format: str = "24h", multiline_ratio: float = 0.03, emoji_rate: float = 0.15,
+                  url_rate: float = 0.03, media_rate: float = 0.06, deleted_rate: float = 0.01,
+                  system_rate: float = 0.005, seed: int = 0) -> str:
+    """
+    Synthetic export text with `messages` entries (system lines included).
+    Rates are per-entry probabilities; time_format is "24h" (13:05) or "12h" (1:05 pm).
+    """
+    if time_format not in ("12h", "24h"):
+        raise ValueError("time_format must be '12h' or '24h'")
+    if messages <= 0:
+        return ""
+    rng = np.random.default_rng(seed)
+    names = sender_names(max(1, senders))
+    vocab = np.array(load_stop_words() + CONTENT_WORDS * 4)  # content words get extra weight
+
+    # timestamps: uniform days, weighted hours, sorted like a real export
+    day_offsets = rng.integers(0, max(1, days), messages)
+    hours = rng.choice(24, messages, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    minutes = rng.integers(0, 60, messages)
+    stamps = np.sort(
+        np.datetime64(start, "m")
+        + day_offsets.astype("timedelta64[D]")
+        + hours.astype("timedelta64[h]")
+        + minutes.astype("timedelta64[m]")
+    )
+
+    # Zipf-like activity: a few members send most messages
+    weights = 1.0 / np.arange(1, len(names) + 1) ** 1.1
+    speakers = rng.choice(len(names), messages, p=weights / weights.sum())
+    kind = rng.random(messages)
+    lengths = rng.integers(1, 16, messages)
+    words = vocab[rng.integers(0, len(vocab), int(lengths.sum()))]
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    extras = rng.random((messages, 3))  # emoji, url, multiline
+    picks = rng.integers(0, 1 << 30, (messages, 3))
+
+    media_cut = media_rate
+    deleted_cut = media_cut + deleted_rate
+    system_cut = deleted_cut + system_rate
+
+    lines = []
+    for i in range(messages):
+        stamp = stamps[i].astype(datetime)
+        if time_format == "24h":
+            header = f"{stamp:%d/%m/%y}, {stamp:%H:%M} - "
+        else:
+            header = f"{stamp:%d/%m/%y}, {stamp.hour % 12 or 12}:{stamp:%M} {'am' if stamp.hour < 12 else 'pm'} - "
+        sender = names[speakers[i]]
+
+        if kind[i] < media_cut:
+            lines.append(f"{header}{sender}: {MEDIA_MESSAGE}")
+            continue
+        if kind[i] < deleted_cut:
+            lines.append(f"{header}{sender}: {DELETED_MESSAGES[picks[i, 0] % len(DELETED_MESSAGES)]}")
+            continue
+        if kind[i] < system_cut:
+            template = SYSTEM_TEMPLATES[picks[i, 0] % len(SYSTEM_TEMPLATES)]
+            other = names[picks[i, 1] % len(names)]
+            lines.append(header + template.format(a=sender, b=other, word=CONTENT_WORDS[picks[i, 2] % len(CONTENT_WORDS)]))
+            continue
+
+        chunk = words[offsets[i]:offsets[i + 1]]
+        if extras[i, 2] < multiline_ratio and len(chunk) > 1:
+            split = 1 + picks[i, 2] % (len(chunk) - 1)
+            text = " ".join(chunk[:split]) + "\n" + " ".join(chunk[split:])
+        else:
+            text = " ".join(chunk)
+        if extras[i, 0] < emoji_rate:
+            text += " " + EMOJIS[picks[i, 0] % len(EMOJIS)] * (1 + picks[i, 1] % 3)
+        if extras[i, 1] < url_rate:
+            text += f" https://{DOMAINS[picks[i, 2] % len(DOMAINS)]}/{picks[i, 1] % 100000}"
+        lines.append(f"{header}{sender}: {text}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_chat(path, **options) -> str:
+    """Write generate_chat(**options) to `path` (UTF-8); returns the path."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(generate_chat(**options))
+    return path
+
+
+# ==============================
+# 🖥️ Command Line
+# ==============================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic WhatsApp chat export.")
+    parser.add_argument("out", help="output .txt path")
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--senders", type=int, default=8)
+    parser.add_argument("--start", default="2023-01-01", help="first day (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=365, help="date span in days")
+    parser.add_argument("--time-format", choices=("24h", "12h"), default="24h")
+    parser.add_argument("--multiline-ratio", type=float, default=0.03)
+    parser.add_argument("--emoji-rate", type=float, default=0.15)
+    parser.add_argument("--url-rate", type=float, default=0.03)
+    parser.add_argument("--media-rate", type=float, default=0.06)
+    parser.add_argument("--deleted-rate", type=float, default=0.01)
+    parser.add_argument("--system-rate", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = vars(parse_args(argv))
+    out = args.pop("out")
+    write_chat(out, **args)
+    print(f"Wrote {args['messages']} messages to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)  # the app's modules live at the top level
+
+
+@pytest.fixture(autouse=True)
+def repo_cwd(monkeypatch):
+    """Helpers read stop_hinglish.txt relative to the working directory, as the app does."""
+    monkeypatch.chdir(ROOT)
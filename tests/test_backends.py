@@ -0,0 +1,178 @@
+"""
+Alternative backends must give the pandas helpers' answers: the same
+synthetic chats go through pandas and through the SQLite message store
+or the Polars backend.
+"""
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal, assert_series_equal
+
+import analysis
+import charts
+import helper
+import polars_backend
+import preprocessor
+import store
+import synthetic_chat
+import workspace
+
+
+WINDOW = (pd.Timestamp("2023-03-05"), pd.Timestamp("2023-08-20"))
+
+
+@pytest.fixture(scope="module")
+def texts():
+    return {
+        "a": synthetic_chat.generate_chat(messages=3000, seed=1, time_format="12h", multiline_ratio=0.1),
+        "b": synthetic_chat.generate_chat(messages=2000, seed=2).replace("\n", "\r\n"),
+    }
+
+
+@pytest.fixture(scope="module")
+def frames(texts):
+    return {name: preprocessor.preprocess(preprocessor.decode_chat(text.encode())) for name, text in texts.items()}
+
+
+def _window(df, window):
+    if window is None:
+        return df
+    start, end = window
+    return df[(df["Date"] >= start) & (df["Date"] < end + pd.Timedelta(days=1))]
+
+
+# ==============================
+# 🗄️ Message Store
+# ==============================
+@pytest.fixture(scope="module")
+def message_store(texts, tmp_path_factory):
+    message_store = store.MessageStore(str(tmp_path_factory.mktemp("store") / "chats.sqlite"))
+    for name, text in texts.items():
+        message_store.load(name, f"{name}-digest", text.encode(), chunk_bytes=20_000)  # several chunks per chat
+    return message_store
+
+
+def test_store_frame_round_trips(message_store, frames):
+    digests = {name: f"{name}-digest" for name in frames}
+    for name, df in frames.items():
+        assert_frame_equal(message_store.frame({name: digests[name]}), df.reset_index(drop=True))
+    assert_frame_equal(message_store.frame(digests), workspace.combine_chats(frames))
+
+
+def test_store_reload_is_a_no_op(message_store, texts):
+    assert message_store.load("a", "a-digest", texts["a"].encode()) == message_store.count({"a": "a-digest"})
+    with message_store._write_lock:  # another session streaming a large export
+        assert message_store.load("a", "a-digest", texts["a"].encode()) == message_store.count({"a": "a-digest"})
+
+
+@pytest.mark.parametrize("window", [None, WINDOW], ids=["all", "window"])
+@pytest.mark.parametrize("chats", ["a", "both"])
+def test_store_aggregations_match_pandas(message_store, frames, chats, window):
+    names = ["a"] if chats == "a" else list(frames)
+    digests = {name: f"{name}-digest" for name in names}
+    df = _window(frames["a"] if chats == "a" else workspace.combine_chats(frames), window)
+    start, end = window or (None, None)
+    for user in ["Overall", df["Sender"].value_counts().index[1]]:
+        assert message_store.fetch_stats(user, digests, start, end) == helper.fetch_stats(user, df)
+        assert_frame_equal(message_store.monthly_timeline(user, digests, start, end), helper.monthly_timeline(user, df))
+        assert_frame_equal(message_store.daily_timeline(user, digests, start, end), helper.daily_timeline(user, df))
+        assert_frame_equal(message_store.activity_heatmap(user, digests, start, end), helper.activity_heatmap(user, df))
+    counts, shares = message_store.most_busy_users(digests, start, end)
+    expected_counts, expected_shares = helper.most_busy_users(df)
+    assert_series_equal(counts, expected_counts)
+    assert_frame_equal(shares, expected_shares)
+
+
+def test_store_frame_is_kept_out_of_the_result_cache(message_store, frames):
+    cache, chat_frames = charts.FigureCache(), workspace.ChatFrames()
+    chat = analysis.ChatAnalysis(store=message_store, store_chats={"a": "a-digest"}, cache=cache, frames=chat_frames)
+    assert_frame_equal(chat.for_user("Overall").df, frames["a"].reset_index(drop=True))
+    assert chat.between(*WINDOW).df is chat.df  # loaded once, shared by derived views
+    assert chat_frames.stats()["misses"] == 1
+    assert cache.get(workspace.parsed_key(chat.digest)) is None
+
+
+def test_store_empty_window_gives_an_empty_heatmap(message_store, capsys):
+    heatmap = message_store.activity_heatmap("Overall", {"a": "a-digest"}, pd.Timestamp("1990-01-01"),
+                                             pd.Timestamp("1990-01-02"))
+    assert heatmap.empty
+    assert capsys.readouterr().out == ""
+
+
+# ==============================
+# 🐻‍❄️ Polars Backend
+# ==============================
+LOCALIZED = (
+    "12/01/23, 10:00 - A: hi\x1cthere  \n"
+    "12/1/2023, 9:05 pm - B: multi\nline\r\nmsg 😀😀 www.example.com\n"
+    "13/01/23, 23:59 - Someone joined\n"
+    "13/01/23, 23:59 - C: This message was deleted\n"
+    "14/01/23, 12:00 - C: <Media omitted>\n"
+    "15/01/23, 12:01 - Ünï: Σίσυφος ΣΑΣ İstanbul ok ok OK ok  \n"
+    "15/01/23, 12:02 - D: <Multimedia omitido>\n"
+    "15/01/23, 12:03 - D: \u200eimage omitted\n"
+    "15/01/23, 12:04 - D: Este mensaje fue eliminado\n"
+    "15/01/23, 12:05 - D: POLL:\nLunch?\nOPTION: yes (2 votes)\n"
+    "15/01/23, 12:06 - D: Missed voice call\n"
+    "15/01/23, 12:07 - D: location: https://maps.google.com/?q=1,2\n"
+)
+HELPERS = [helper.fetch_stats, helper.monthly_timeline, helper.daily_timeline, helper.week_activity_map,
+           helper.month_activity_map, helper.activity_heatmap, helper.most_common_words, helper.emoji_helper,
+           helper.wordcloud_text]
+
+
+@pytest.fixture
+def on_polars():
+    """Call fn with the pandas backend, then with Polars; returns both results."""
+    pytest.importorskip("polars")
+
+    def both(fn, *args):
+        polars_backend.use("pandas")
+        expected = fn(*args)
+        polars_backend.use("polars")
+        try:
+            return expected, fn(*args)
+        finally:
+            polars_backend.use("pandas")
+    return both
+
+
+def _assert_same(expected, got):
+    if isinstance(expected, tuple):
+        assert len(expected) == len(got)
+        for e, g in zip(expected, got):
+            _assert_same(e, g)
+    elif isinstance(expected, pd.DataFrame):
+        assert_frame_equal(got, expected, check_index_type=True, check_column_type=True)
+    elif isinstance(expected, pd.Series):
+        assert_series_equal(got, expected, check_index_type=True)
+    else:
+        assert got == expected and type(got) is type(expected)
+
+
+@pytest.mark.parametrize("name", ["a", "b", "localized"])
+def test_polars_parses_like_pandas(texts, on_polars, name):
+    text = LOCALIZED if name == "localized" else texts[name]
+    expected, got = on_polars(preprocessor.preprocess, text)
+    _assert_same(expected, got)
+    assert polars_backend.preprocess(text) is not NotImplemented  # no silent fallback to pandas
+
+
+@pytest.mark.parametrize("name", ["a", "localized"])
+def test_polars_helpers_match_pandas(texts, on_polars, name):
+    df = preprocessor.preprocess(LOCALIZED if name == "localized" else texts[name])
+    for user in ["Overall", df["Sender"].value_counts().index[0], "nobody"]:
+        for fn in HELPERS:
+            _assert_same(*on_polars(fn, user, df))
+    _assert_same(*on_polars(helper.most_busy_users, df))
+
+
+def test_polars_helpers_match_pandas_across_chats(frames, on_polars):
+    combined = workspace.combine_chats(frames)
+    for chats in (None, "b", ["a"]):
+        _assert_same(*on_polars(helper.most_busy_users, combined, chats))
+        for fn in (helper.fetch_stats, helper.monthly_timeline, helper.activity_heatmap, helper.most_common_words):
+            _assert_same(*on_polars(fn, "Overall", combined, chats))
+    window = _window(frames["a"], WINDOW)  # not a RangeIndex any more
+    for fn in (helper.fetch_stats, helper.daily_timeline, helper.emoji_helper):
+        _assert_same(*on_polars(fn, "Overall", window))
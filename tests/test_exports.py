@@ -0,0 +1,90 @@
+"""
+Export artifacts kept in the result cache: one evicted from there must be
+built again on the next request, on the JobExecutor or on the manager's pool.
+"""
+
+import io
+import time
+import zipfile
+
+import pandas as pd
+import pytest
+
+import charts
+import export_manager
+import export_sentiment_helper
+import jobs
+
+
+def _wait(manager, key, timeout=10):
+    deadline = time.time() + timeout
+    while manager.status(key) == export_manager.RUNNING and time.time() < deadline:
+        time.sleep(0.01)
+    return manager.status(key)
+
+
+@pytest.mark.parametrize("on_jobs", [True, False], ids=["job-executor", "own-pool"])
+def test_evicted_artifact_is_built_again(on_jobs):
+    cache = charts.FigureCache(max_bytes=1000)
+    manager = export_manager.ExportManager(executor=jobs.JobExecutor(max_heavy=1) if on_jobs else None, cache=cache)
+    calls = []
+
+    def build():
+        calls.append(1)
+        return b"x" * 600
+
+    key = ("digest", "Overall", "report.csv")
+    manager.submit(key, build)
+    assert _wait(manager, key) == export_manager.READY
+    assert manager.result(key) == b"x" * 600
+
+    cache.put("something else", "y" * 600)  # over budget: the artifact is evicted
+    assert manager.status(key) == export_manager.IDLE
+
+    manager.submit(key, build)
+    assert _wait(manager, key) == export_manager.READY
+    assert manager.result(key) == b"x" * 600
+    assert len(calls) == 2
+
+
+def test_bundle_reuses_built_artifacts():
+    manager = export_manager.ExportManager(executor=jobs.JobExecutor(max_heavy=1), cache=charts.FigureCache())
+    calls = []
+
+    def build():
+        calls.append(1)
+        return b"data"
+
+    manager.submit(("digest", "a.csv"), build)
+    assert _wait(manager, ("digest", "a.csv")) == export_manager.READY
+    spool = manager.build_bundle([("a.csv", ("digest", "a.csv"), build), ("b.csv", ("digest", "b.csv"), build)])
+    with zipfile.ZipFile(spool) as archive:
+        assert sorted(archive.namelist()) == ["a.csv", "b.csv"]
+        assert archive.read("a.csv") == b"data"
+    assert len(calls) == 2
+
+
+def test_bundle_is_served_from_its_file():
+    manager = export_manager.ExportManager(executor=jobs.JobExecutor(max_heavy=1), cache=charts.FigureCache())
+    entries = [(f"part{i}.csv", ("digest", f"part{i}"), lambda i=i: str(i).encode() * 1000) for i in range(3)]
+    manager.submit(("digest", "bundle"), lambda: manager.build_bundle(entries), heavy=False)
+    assert _wait(manager, ("digest", "bundle")) == export_manager.READY
+
+    spool = manager.result(("digest", "bundle"))
+    assert not isinstance(spool, bytes)
+    spool.seek(5)  # reads always start at the beginning, wherever another reader left the file
+    data = export_manager.read_artifact(spool)
+    assert export_manager.read_artifact(spool) == data
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.read("part2.csv") == b"2" * 1000
+
+
+def test_streamed_exports_are_files_the_cache_can_size():
+    sentiment_df = pd.DataFrame({"Message": ["hi there"] * 1000, "Polarity": 0.5})
+    spool = export_sentiment_helper.export_sentiment_csv(sentiment_df)
+    assert not isinstance(spool, bytes)
+    data = export_manager.read_artifact(spool)
+    assert data.startswith(b"Message,Polarity") and data.count(b"\n") == 1001
+    assert charts.estimate_size(spool) == len(data)
+    spool.rollover()  # spilled to disk: no longer held in memory
+    assert charts.estimate_size(spool) == 0
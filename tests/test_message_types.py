@@ -0,0 +1,32 @@
+"""
+Locale packs follow WCA_LOCALES as it is set now, and every empty parse has
+the categorical Type column of a parsed chat.
+"""
+
+import pytest
+
+import message_types
+import preprocessor
+
+
+def test_locales_follow_the_environment(monkeypatch):
+    monkeypatch.setenv("WCA_LOCALES", "en")
+    assert message_types.message_type("<Multimedia omitido>") == "text"
+    monkeypatch.setenv("WCA_LOCALES", "en,es")
+    assert message_types.message_type("<Multimedia omitido>") == "media"
+    assert list(message_types.classify(["<Multimedia omitido>", "hola"])) == ["media", "text"]
+    monkeypatch.delenv("WCA_LOCALES")
+    assert message_types.locales() == tuple(message_types.LOCALE_PACKS)
+
+
+def test_unknown_locales_warn(monkeypatch):
+    monkeypatch.setenv("WCA_LOCALES", "en,xx")
+    with pytest.warns(UserWarning, match="xx"):
+        assert message_types.locales() == ("en",)
+
+
+@pytest.mark.parametrize("text", ["", "no chat here\n", "01/02/23, 10:00 - A: This message was deleted\n"],
+                         ids=["empty", "no-headers", "only-dropped"])
+def test_empty_parses_keep_the_type_dtype(text):
+    df = preprocessor.preprocess(text)
+    assert df.empty and df["Type"].dtype == message_types.TYPE_DTYPE
@@ -0,0 +1,84 @@
+"""
+SentimentResult answers top / bottom queries from a partial selection; every
+page must be what a stable full sort of the scored messages would show.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+import preprocessor
+import sentiment_helper
+import synthetic_chat
+
+
+@pytest.fixture(scope="module")
+def chat():
+    text = synthetic_chat.generate_chat(messages=2000, seed=3)
+    return preprocessor.preprocess(preprocessor.decode_chat(text.encode()))
+
+
+@pytest.fixture(scope="module")
+def result(chat):
+    # the lexicon backend gives many messages the same score, so pages cut through ties
+    return sentiment_helper.SentimentResult.from_chat("Overall", chat, backend="lexicon")
+
+
+def _full_sort(frame, largest):
+    ordered = frame.sort_values("Polarity", ascending=not largest, kind="stable")
+    ordered = ordered[sentiment_helper.SentimentResult.COLUMNS].copy()
+    ordered["Polarity"] = ordered["Polarity"].round(3)
+    return ordered
+
+
+def _pages(select, k, total):
+    """Every page of k up to the end, concatenated; the page after the end must be empty."""
+    assert select(k, total).empty
+    return pd.concat([select(k, offset) for offset in range(0, total, k)])
+
+
+@pytest.mark.parametrize("k", [1, 7, 10, 64])
+@pytest.mark.parametrize("largest", [True, False])
+def test_pages_match_a_stable_full_sort(result, k, largest):
+    assert result.frame["Polarity"].duplicated().sum() > len(result) // 2  # plenty of ties
+    select = result.top if largest else result.bottom
+    expected = _full_sort(result.frame, largest)
+    assert_frame_equal(select(k), expected.head(k))
+    assert_frame_equal(_pages(select, k, len(result)), expected)
+
+
+def test_pages_past_the_end_are_empty(result):
+    assert result.top(10, offset=len(result)).empty
+    assert result.bottom(0).empty
+    assert list(result.top(10, offset=len(result)).columns) == sentiment_helper.SentimentResult.COLUMNS
+
+
+def test_slice_pages_like_a_rescored_sender(chat, result):
+    sender = chat.loc[chat["Type"] == "text", "Sender"].value_counts().index[0]
+    start, end = chat["Date"].quantile(0.25).normalize(), chat["Date"].quantile(0.75).normalize()
+    sliced = result.slice(sender, start, end)
+
+    days = chat.loc[sliced.frame.index, "Date"]
+    assert (sliced.frame["Sender"] == sender).all() and days.between(start, end).all()
+    rescored = sentiment_helper.analyze_sentiment(sender, chat, backend="lexicon")
+    in_range = chat.loc[rescored.index, "Date"].between(start, end).to_numpy(dtype=bool)
+    assert_frame_equal(sliced.frame, rescored[in_range])
+    for largest in (True, False):
+        select = sliced.top if largest else sliced.bottom
+        assert_frame_equal(_pages(select, 5, len(sliced)), _full_sort(rescored[in_range], largest))
+
+
+def test_top_and_bottom_helpers_use_the_same_ranking(chat, result):
+    assert_frame_equal(sentiment_helper.top_positive_messages("Overall", chat, n=10, backend="lexicon"), result.top(10))
+    assert_frame_equal(sentiment_helper.top_negative_messages("Overall", chat, n=10, backend="lexicon"),
+                       result.bottom(10))
+    assert np.all(np.diff(result.top(50)["Polarity"].to_numpy()) <= 0)
+
+
+def test_incomplete_backend_fails_when_created():
+    class Incomplete(sentiment_helper.SentimentBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,132 @@
+"""
+Sketches must stay within their stated error bounds of the exact answers,
+also after merging and a round trip through to_bytes() / from_bytes().
+"""
+
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import helper
+import preprocessor
+import sketches
+import synthetic_chat
+
+
+CAPACITY = 50  # small enough that the word counters are pruned many times
+
+
+@pytest.fixture(scope="module")
+def chat():
+    text = synthetic_chat.generate_chat(messages=12000, seed=7)
+    return preprocessor.preprocess(preprocessor.decode_chat(text.encode()))
+
+
+@pytest.fixture(scope="module")
+def exact_words(chat):
+    stop_words = helper.read_stop_words()
+    texts = chat.loc[chat["Type"] != "media", "Message"]
+    return Counter(word for message in texts for word in message.lower().split() if word not in stop_words)
+
+
+@pytest.fixture(scope="module")
+def sketch(chat):
+    return sketches.ChatSketch.from_frame(chat, batch_rows=1000, capacity=CAPACITY)
+
+
+def _assert_top_k_bounds(top_k, exact):
+    assert top_k.total == sum(exact.values())
+    assert len(top_k.counts) <= top_k.capacity
+    assert top_k.error <= top_k.total / (top_k.capacity + 1)
+    for item, n in exact.items():
+        estimate = top_k.counts.get(item, 0)
+        assert estimate <= n <= estimate + top_k.error, (item, estimate, n, top_k.error)
+
+
+# ==============================
+# 🏆 Heavy Hitters
+# ==============================
+def test_top_k_bounds(sketch, exact_words):
+    assert sketch.words.error > 0  # the bound is exercised, not trivially exact
+    _assert_top_k_bounds(sketch.words, exact_words)
+    top = sketch.most_common_words(5)
+    assert top["Word"].tolist() == [word for word, _ in exact_words.most_common(5)]
+
+
+def test_top_k_bounds_after_merge_and_serialization(chat, exact_words):
+    half = len(chat) // 2
+    first = sketches.ChatSketch.from_frame(chat.iloc[:half], batch_rows=1000, capacity=CAPACITY)
+    second = sketches.ChatSketch.from_frame(chat.iloc[half:], batch_rows=1000, capacity=CAPACITY)
+    merged = sketches.ChatSketch.from_bytes(first.to_bytes()).merge(sketches.ChatSketch.from_bytes(second.to_bytes()))
+    assert merged.messages == len(chat)
+    _assert_top_k_bounds(merged.words, exact_words)
+
+
+def test_top_k_is_exact_below_capacity():
+    top_k = sketches.TopK(capacity=10)
+    top_k.update(Counter("abracadabra"))
+    assert top_k.error == 0 and top_k.counts == Counter("abracadabra")
+
+
+# ==============================
+# 🔢 Distinct Counts
+# ==============================
+@pytest.mark.parametrize("n", [100, 5000, 200_000])
+def test_hyperloglog_within_three_standard_errors(n):
+    hll = sketches.HyperLogLog()
+    hll.update(f"item-{i}" for i in range(n))
+    hll.update(f"item-{i}" for i in range(0, n, 3))  # duplicates change nothing
+    assert abs(hll.estimate() - n) <= 3 * hll.relative_error * n
+
+
+def test_hyperloglog_merge_is_the_union():
+    left, right, union = sketches.HyperLogLog(), sketches.HyperLogLog(), sketches.HyperLogLog()
+    left.update(range(0, 30000))
+    right.update(range(20000, 50000))
+    union.update(range(0, 50000))
+    left.merge(right)
+    assert np.array_equal(left.registers, union.registers)
+    assert abs(left.estimate() - 50000) <= 3 * left.relative_error * 50000
+
+
+def test_chat_sketch_distinct_counts(chat, sketch):
+    words = {w for m in chat.loc[chat["Type"] != "media", "Message"] for w in m.lower().split()}
+    senders = chat.loc[chat["Type"] != "system", "Sender"].nunique()
+    estimate, error = sketch.distinct_words()
+    assert abs(estimate - len(words)) <= 3 * error * len(words)
+    assert sketch.active_senders()[0] == senders  # a handful of senders is counted exactly (linear counting)
+
+
+# ==============================
+# 📏 Quantiles
+# ==============================
+QS = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0)
+
+
+def _assert_quantiles_within(sketch, values):
+    ordered = np.sort(values)
+    for q, estimate in zip(QS, sketch.quantiles(QS)):
+        expected = ordered[int(q * (len(ordered) - 1))]
+        if expected < 1:
+            assert estimate == 0.0
+        else:
+            assert abs(estimate - expected) <= sketch.relative_error * expected, (q, estimate, expected)
+
+
+def test_quantiles_within_relative_error():
+    values = np.random.default_rng(0).lognormal(mean=4, sigma=2, size=50_000)
+    halves = sketches.QuantileSketch(), sketches.QuantileSketch()
+    halves[0].update(values[:20_000])
+    halves[1].update(values[20_000:])
+    merged = halves[0].merge(halves[1])
+    whole = sketches.QuantileSketch()
+    whole.update(values)
+    _assert_quantiles_within(whole, values)
+    _assert_quantiles_within(merged, values)
+    assert sketches.QuantileSketch().quantiles(QS) == [None] * len(QS)
+
+
+def test_chat_sketch_message_length_quantiles(chat, sketch):
+    lengths = chat.loc[chat["Type"] != "media", "Message"].str.len().to_numpy()
+    _assert_quantiles_within(sketch.message_length, lengths)
@@ -0,0 +1,131 @@
+"""
+===========================================================
+🔥 warmup.py — Lazy Imports, Warm-up & Import-time Report
+===========================================================
+
+Heavy third-party libraries (matplotlib, seaborn, wordcloud, pyvis,
+textblob, reportlab, python-docx, urlextract) are imported inside the
+functions that use them, so the upload page paints without paying for
+them. After the first paint the app calls start_warmup(), which imports
+the likely-needed ones on a daemon thread while the user picks a file.
+
+    - timed(label): record how long a block (e.g. the app's imports) took
+    - timed_import(name): import a module, recording its cold import time
+    - start_warmup(): import WARMUP_TARGETS once per process, off-thread
+    - import_report(): every recorded timing, slowest first
+
+Run `python warmup.py` for a cold import-time report of this process.
+===========================================================
+"""
+
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+STARTUP = "startup"
+WARMUP = "warm-up"
+ON_DEMAND = "on demand"
+
+# in the order features are usually opened: charts, stats, sentiment, exports, graph
+WARMUP_TARGETS = (
+    "matplotlib.pyplot",
+    "seaborn",
+    "helper:get_url_extractor",
+    "wordcloud",
+    "textblob",
+    "reportlab.platypus",
+    "pyvis.network",
+    "docx",
+)
+
+_timings = {}  # label -> (seconds, phase)
+_lock = threading.Lock()
+_warmup_thread = None
+
+
+# ==============================
+# ⏱️ Timing
+# ==============================
+def _record(label, seconds, phase):
+    with _lock:
+        _timings.setdefault(label, (seconds, phase))  # first (cold) measurement wins
+
+
+@contextmanager
+def timed(label, phase=STARTUP):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(label, time.perf_counter() - start, phase)
+
+
+def timed_import(name, phase=ON_DEMAND):
+    """
+    Import a module (or call "module:function") and record the cold cost.
+    Modules that are already loaded are returned without a new timing.
+    """
+    module_name, _, attr = name.partition(":")
+    if not attr and module_name in sys.modules:
+        return sys.modules[module_name]
+    if module_name == "matplotlib.pyplot":
+        # pyplot may be first imported off the main thread: never pick a GUI backend
+        os.environ.setdefault("MPLBACKEND", "Agg")
+
+    with timed(name, phase):
+        module = importlib.import_module(module_name)
+        return getattr(module, attr)() if attr else module
+
+
+# ==============================
+# 🔥 Background Warm-up
+# ==============================
+def _warm(targets):
+    start = time.perf_counter()
+    for name in targets:
+        try:
+            timed_import(name, WARMUP)
+        except Exception as e:  # a missing optional dependency only disables its feature
+            print(f"⚠️ Warm-up of {name} failed: {e}")
+    print(f"🔥 Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+
+def start_warmup(targets=WARMUP_TARGETS):
+    """Start the warm-up thread once per process; set WCA_WARMUP=0 to disable."""
+    global _warmup_thread
+    if os.environ.get("WCA_WARMUP", "1") == "0":
+        return None
+    with _lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm, args=(tuple(targets),), name="warmup", daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
+
+
+def warmup_done() -> bool:
+    return _warmup_thread is not None and not _warmup_thread.is_alive()
+
+
+# ==============================
+# 📋 Report
+# ==============================
+def import_report() -> list:
+    """Recorded timings as [{"name", "seconds", "phase"}], slowest first."""
+    with _lock:
+        rows = [{"name": label, "seconds": round(seconds, 3), "phase": phase}
+                for label, (seconds, phase) in _timings.items()]
+    return sorted(rows, key=lambda row: row["seconds"], reverse=True)
+
+
+if __name__ == "__main__":
+    with timed("app modules"):
+        import preprocessor, sentiment_helper, export_helper, analysis, charts, export_manager, jobs  # noqa: F401
+        import export_sentiment_helper  # noqa: F401
+    for target in WARMUP_TARGETS:
+        timed_import(target, WARMUP)
+    for row in import_report():
+        print(f"{row['seconds']:8.3f}s  {row['phase']:<9}  {row['name']}")
@@ -0,0 +1,292 @@
+"""
+===========================================================
+🗂️ workspace.py — Multi-chat Workspace
+===========================================================
+
+Several exported chats analyzed together: each file is parsed once (per
+content digest, concurrently) and the frames are combined into one with
+a categorical `chat_id` column, so every helper and ChatAnalysis view
+works on a single chat, a subset or all of them.
+
+    frames = parse_chats([(chat_id, digest, raw_bytes), ...], cache=ChatFrames())
+    df = combine_chats(frames)
+    helper.fetch_stats("Overall", df, chats=["Team A", "Team B"])
+
+Cross-chat comparisons (activity, top senders, sentiment) are derived
+from chat_cube(): one groupby pass over the combined frame.
+===========================================================
+"""
+
+import hashlib
+import multiprocessing
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+import profiling
+
+
+CHAT_ID = "chat_id"
+# smaller files are parsed in-process: starting a worker process would cost more than it saves
+PARALLEL_MIN_BYTES = 2 * 2**20
+
+
+# ==============================
+# 📥 Parsing
+# ==============================
+def chat_names(file_names) -> list:
+    """chat_ids from upload file names: extension dropped, duplicates numbered ("group (2)")."""
+    names, seen = [], {}
+    for file_name in file_names:
+        base = os.path.splitext(os.path.basename(file_name))[0] or "chat"
+        seen[base] = seen.get(base, 0) + 1
+        names.append(base if seen[base] == 1 else f"{base} ({seen[base]})")
+    return names
+
+
+def parsed_key(digest):
+    """Key of one parsed chat (or a combined or store-backed workspace) in ChatFrames."""
+    return (digest, "*", (None, None), "parsed", ())
+
+
+def parse_chat(raw: bytes) -> pd.DataFrame:
+    import preprocessor
+    return preprocessor.preprocess(preprocessor.decode_chat(raw))
+
+
+@profiling.traced()
+def parse_chats(files, cache=None, workers=None) -> dict:
+    """
+    files: [(chat_id, digest, raw bytes or a callable returning them)].
+    Returns {chat_id: parsed frame} in the given order. Chats already in `cache`
+    (anything with get_or_create) are reused; the rest are parsed concurrently,
+    in worker processes once there is enough text to make that pay off.
+    """
+    files = list(files)
+    workers = workers or min(len(files), os.cpu_count() or 1)
+    pool, lock = [], threading.Lock()
+
+    def parse(chat_id, raw):
+        raw = raw() if callable(raw) else raw
+        with profiling.span("workspace.parse_chat", chat=chat_id, bytes=len(raw)):
+            if workers < 2 or len(files) < 2 or len(raw) < PARALLEL_MIN_BYTES:
+                return parse_chat(raw)
+            with lock:
+                if not pool:
+                    # spawn: forking a process that runs server threads is unsafe
+                    pool.append(ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")))
+            return pool[0].submit(parse_chat, raw).result()
+
+    def load(entry):
+        chat_id, digest, raw = entry
+        if cache is None:
+            return parse(chat_id, raw)
+        return cache.get_or_create(parsed_key(digest), lambda: parse(chat_id, raw))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(files)), thread_name_prefix="parse") as threads:
+            futures = [threads.submit(profiling.propagate(load), entry) for entry in files]
+            frames = [future.result() for future in futures]
+    finally:
+        if pool:
+            pool[0].shutdown()
+    return {chat_id: frame for (chat_id, _, _), frame in zip(files, frames)}
+
+
+class ChatFrames:
+    """
+    Parsed chats by key, kept out of the result cache's byte budget: a frame larger
+    than the budget would be evicted by the next insert and parsed again on every
+    rerun. The `keep` most recently used frames are held here; older ones stay
+    reachable for as long as a session still holds them (weak references), so a chat
+    in use is never parsed twice. Has a cache's get_or_create(), for parse_chats().
+    """
+
+    def __init__(self, keep: int = 8):
+        self.keep = keep
+        self._recent = OrderedDict()  # key -> frame, most recently used last
+        self._alive = weakref.WeakValueDictionary()  # key -> frame, while anything holds it
+        self._inflight = {}  # key -> Future, while a frame is parsed
+        self._sizes = {}  # key -> bytes, measured once per parse
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _use(self, key, frame):
+        self._recent[key] = frame
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.keep:
+            self._recent.popitem(last=False)
+
+    def get_or_create(self, key, builder):
+        with self._lock:
+            frame = self._alive.get(key)
+            if frame is not None:
+                self._use(key, frame)
+                self.hits += 1
+                return frame
+            # Single-flight: concurrent callers for the same key wait for one parse.
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            return pending.result()
+        try:
+            frame = builder()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            pending.set_exception(e)
+            raise
+        size = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            del self._inflight[key]
+            self._alive[key] = frame
+            self._sizes[key] = size
+            self._use(key, frame)
+        pending.set_result(frame)
+        return frame
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+            self._alive.clear()
+            self._sizes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            alive = list(self._alive.keys())
+            for key in set(self._sizes) - set(alive):
+                del self._sizes[key]
+            return {
+                "frames": len(alive),
+                "held": len(self._recent),
+                "bytes": sum(self._sizes[key] for key in alive),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+def combine_chats(frames: dict) -> pd.DataFrame:
+    """One frame of all chats (in the given order) with a categorical chat_id column."""
+    frames = {chat_id: df for chat_id, df in frames.items() if not df.empty}
+    if not frames:
+        return pd.DataFrame(columns=[CHAT_ID])
+    combined = pd.concat(frames.values(), ignore_index=True)
+    combined[CHAT_ID] = pd.Categorical(
+        pd.Series(list(frames), dtype="object").repeat([len(df) for df in frames.values()]).to_numpy(),
+        categories=list(frames),
+    )
+    return combined
+
+
+def workspace_digest(digests) -> str:
+    """Digest of a set of chats (order-sensitive, like the combined frame)."""
+    return hashlib.sha256("\n".join(f"{chat_id}={digest}" for chat_id, digest in digests).encode()).hexdigest()
+
+
+def chat_ids(df) -> list:
+    """chat_ids present in a combined frame, in upload order."""
+    if CHAT_ID not in df.columns:
+        return []
+    present = set(df[CHAT_ID].unique())
+    return [c for c in df[CHAT_ID].cat.categories if c in present]
+
+
+# ==============================
+# 📊 Cross-chat Comparisons
+# ==============================
+@profiling.traced()
+def chat_cube(df) -> pd.DataFrame:
+    """Message and media counts per (chat_id, day, hour, sender): one pass over the combined frame."""
+    counts = pd.DataFrame({
+        "messages": 1,
+        "media": (df["Type"] == "media").astype("int64"),
+    }, index=df.index)
+    keys = [df[CHAT_ID], df["Date"].dt.normalize().rename("day"), df["Hour"].rename("hour"), df["Sender"]]
+    return counts.groupby(keys, observed=True, sort=True).sum()
+
+
+def chat_summary(cube) -> pd.DataFrame:
+    """One row per chat: messages, media, senders, first/last day, active days, messages per active day."""
+    if cube.empty:
+        return pd.DataFrame(columns=["messages", "media", "senders", "first_day", "last_day",
+                                     "active_days", "messages_per_day"])
+    flat = cube.reset_index()
+    per_day = flat.groupby([CHAT_ID, "day"], observed=True)["messages"].sum().reset_index()
+    summary = flat.groupby(CHAT_ID, observed=True).agg(
+        messages=("messages", "sum"), media=("media", "sum"), senders=("Sender", "nunique"),
+    )
+    days = per_day.groupby(CHAT_ID, observed=True).agg(
+        first_day=("day", "min"), last_day=("day", "max"), active_days=("day", "size"),
+    )
+    summary = summary.join(days)
+    summary["first_day"] = summary["first_day"].dt.date
+    summary["last_day"] = summary["last_day"].dt.date
+    summary["messages_per_day"] = (summary["messages"] / summary["active_days"]).round(1)
+    return summary
+
+
+def activity_by_chat(cube, freq="M") -> pd.DataFrame:
+    """Messages per period (rows) and chat (columns); freq is 'D', 'W' or 'M'."""
+    rule = {"D": "D", "W": "W", "M": "MS"}[freq]
+    per_day = cube["messages"].groupby(level=[CHAT_ID, "day"], observed=True).sum()
+    if per_day.empty:
+        return pd.DataFrame()
+    table = per_day.unstack(CHAT_ID, fill_value=0).resample(rule).sum()
+    table.columns = table.columns.astype("object")  # plain chat names for chart legends
+    return table.rename_axis("Date")
+
+
+def hourly_share_by_chat(cube) -> pd.DataFrame:
+    """Share of each chat's messages (%) sent in each hour of the day."""
+    per_hour = cube["messages"].groupby(level=[CHAT_ID, "hour"], observed=True).sum()
+    if per_hour.empty:
+        return pd.DataFrame()
+    table = per_hour.unstack(CHAT_ID, fill_value=0).reindex(range(24), fill_value=0)
+    table.columns = table.columns.astype("object")
+    return (table / table.sum() * 100).round(2).rename_axis("Hour")
+
+
+def top_senders_by_chat(cube, n=5) -> pd.DataFrame:
+    """The n most active senders of each chat with their share (%) of its messages."""
+    per_sender = cube["messages"].groupby(level=[CHAT_ID, "Sender"], observed=True).sum()
+    if per_sender.empty:
+        return pd.DataFrame(columns=[CHAT_ID, "Sender", "Messages", "Share (%)"])
+    table = per_sender.rename("Messages").reset_index()
+    table["Share (%)"] = (table["Messages"] / table.groupby(CHAT_ID, observed=True)["Messages"].transform("sum")
+                          * 100).round(2)
+    table = table.sort_values([CHAT_ID, "Messages", "Sender"], ascending=[True, False, True], kind="stable")
+    return table.groupby(CHAT_ID, observed=True).head(n).reset_index(drop=True)
+
+
+def sentiment_by_chat(sentiment_df, chat_column) -> pd.DataFrame:
+    """
+    Per chat: scored messages, Positive / Neutral / Negative share (%) and mean polarity.
+    sentiment_df is analyze_sentiments()'s frame over all chats; chat_column is
+    the combined frame's chat_id (index-aligned), so nothing is scored twice.
+    """
+    columns = ["messages", "positive_%", "neutral_%", "negative_%", "mean_polarity"]
+    if sentiment_df is None or sentiment_df.empty:
+        return pd.DataFrame(columns=columns)
+    scored = sentiment_df[["Polarity", "Sentiment"]].assign(**{CHAT_ID: chat_column.loc[sentiment_df.index]})
+    grouped = scored.groupby(CHAT_ID, observed=True)
+    shares = pd.crosstab(scored[CHAT_ID], scored["Sentiment"], normalize="index") * 100
+    shares = shares.reindex(columns=["Positive", "Neutral", "Negative"], fill_value=0.0)
+    table = pd.DataFrame({
+        "messages": grouped.size(),
+        "positive_%": shares["Positive"].round(1),
+        "neutral_%": shares["Neutral"].round(1),
+        "negative_%": shares["Negative"].round(1),
+        "mean_polarity": grouped["Polarity"].mean().round(3),
+    })
+    return table[columns]